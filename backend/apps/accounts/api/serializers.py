@@ -1,10 +1,15 @@
 """
 Serializers for authentication and user management
 """
+from datetime import timedelta
+
 from rest_framework import serializers
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django.contrib.auth.password_validation import validate_password
+from apps.accounts.tokens import RefreshToken
 
 User = get_user_model()
 
@@ -13,8 +18,11 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     """
     Custom JWT serializer to include user data in the response
     """
+    token_class = RefreshToken
+
     def validate(self, attrs):
         data = super().validate(attrs)
+        self.update_last_login()
 
         # Add user data to the response
         user_serializer = UserSerializer(self.user)
@@ -31,6 +39,25 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
             'tokens': tokens,
         }
 
+    def update_last_login(self):
+        """
+        Record the login at most once per LAST_LOGIN_UPDATE_INTERVAL, without save()
+        so the cached authentication user stays valid
+        """
+        now = timezone.now()
+        last_login = self.user.last_login
+        if last_login and now - last_login < timedelta(seconds=settings.LAST_LOGIN_UPDATE_INTERVAL):
+            return
+        User.objects.filter(pk=self.user.pk).update(last_login=now)
+        self.user.last_login = now
+
+
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Token refresh that checks the blacklist through the blacklist filter
+    """
+    token_class = RefreshToken
+
 
 class UserSerializer(serializers.ModelSerializer):
     """
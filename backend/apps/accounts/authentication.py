@@ -0,0 +1,171 @@
+"""
+JWT authentication with cached user resolution.
+
+Resolving request.user from an access token normally costs a users query per
+request. CachedJWTAuthentication keeps the user's row (minus the password
+hash) and team member id in a short-lived in-process cache backed by the
+shared cache. Entries carry a per-user version that is bumped whenever the
+user (or their team member) is saved or deleted, so profile, password and
+is_active changes are seen by every process within AUTH_USER_LOCAL_TTL
+seconds, and at once by the process that made them.
+
+Writes that bypass save() (queryset update()) must call invalidate_users().
+"""
+import secrets
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+VERSION_KEY = 'auth:user:{}:version'
+RECORD_KEY = 'auth:user:{}'
+
+# Never cached; loaded on access (e.g. by check_password)
+UNCACHED_FIELDS = ('password',)
+
+# Expired in-process entries are swept once there are this many
+LOCAL_MAX_ENTRIES = 10000
+
+_local = {}
+_local_lock = threading.Lock()
+
+
+def _fields():
+    return [
+        field.attname for field in get_user_model()._meta.concrete_fields
+        if field.attname not in UNCACHED_FIELDS
+    ]
+
+
+def _bump(user_id):
+    key = VERSION_KEY.format(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Counters start at a random value so a flushed cache cannot reproduce an old version
+        cache.add(key, secrets.randbits(48), timeout=None)
+
+
+def invalidate_users(user_ids):
+    """
+    Drop cached users once the transaction commits
+    """
+    user_ids = [user_id for user_id in user_ids if user_id is not None]
+
+    def publish():
+        with _local_lock:
+            for user_id in user_ids:
+                _local.pop(user_id, None)
+        for user_id in user_ids:
+            _bump(user_id)
+    transaction.on_commit(publish)
+
+
+def _load(user_id):
+    """
+    Cache record of a user read from the database, or None
+    """
+    User = get_user_model()
+    fields = _fields()
+    row = User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).values_list(
+        *fields, 'password', 'team_member__id'
+    ).first()
+    if row is None:
+        return None
+    *values, password, team_member_id = row
+    return {
+        'fields': fields,
+        'values': values,
+        'team_member_id': team_member_id,
+        # Compared with the token's revoke claim when CHECK_REVOKE_TOKEN is on
+        'password_hash': get_md5_hash_password(password),
+    }
+
+
+def _record(user_id):
+    now = time.monotonic()
+    local = _local.get(user_id)
+    if local is not None and local[0] > now:
+        return local[1]
+
+    version_key, record_key = VERSION_KEY.format(user_id), RECORD_KEY.format(user_id)
+    cached = cache.get_many([version_key, record_key])
+    version = cached.get(version_key)
+    if version is None:
+        cache.add(version_key, secrets.randbits(48), timeout=None)
+        version = cache.get(version_key)
+    record = cached.get(record_key)
+    if record is None or record['version'] != version:
+        record = _load(user_id)
+        if record is None:
+            return None
+        record['version'] = version
+        cache.set(record_key, record, settings.AUTH_USER_CACHE_TIMEOUT)
+
+    with _local_lock:
+        if len(_local) >= LOCAL_MAX_ENTRIES:
+            for expired in [key for key, (expires, _) in _local.items() if expires <= now]:
+                del _local[expired]
+        _local[user_id] = (now + settings.AUTH_USER_LOCAL_TTL, record)
+    return record
+
+
+def cached_user(user_id):
+    """
+    User instance built from the cache, or None if there is no such user.
+    The password is deferred; saving the instance writes only the cached fields.
+    """
+    record = _record(user_id)
+    if record is None:
+        return None
+    User = get_user_model()
+    user = User.from_db(User.objects.db, record['fields'], record['values'])
+    user.team_member_id = record['team_member_id']
+    user._auth_password_hash = record['password_hash']
+    return user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves users through the auth user cache
+    """
+    def authenticate(self, request):
+        # Other authenticators and views may ask again within the same request
+        django_request = getattr(request, '_request', request)
+        resolved = getattr(django_request, '_cached_jwt_auth', None)
+        if resolved is not None:
+            return resolved
+        resolved = super().authenticate(request)
+        if resolved is not None:
+            django_request._cached_jwt_auth = resolved
+        return resolved
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        user = cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != user._auth_password_hash:
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code='password_changed'
+                )
+
+        return user
@@ -0,0 +1,230 @@
+"""
+Refresh token blacklist upkeep.
+
+Every login adds an OutstandingToken row and every refresh rotation or
+logout adds a BlacklistedToken row. prune_expired() deletes both once the
+token has expired, since an expired token is rejected before the blacklist
+matters.
+
+Refreshes look up the blacklist through a Bloom filter first: a token the
+filter has never seen cannot be blacklisted, so only probable members (and
+the filter's small false-positive share) reach the database. The filter is a
+bitmap in Redis shared by every process; with another cache backend there is
+no filter and every check goes to the database. It is rebuilt from the table
+by rebuild_filter(), sized for the current number of blacklisted tokens.
+While a rebuild runs, new blacklist entries are written to both the current
+and the next filter, so no entry is lost in the swap.
+
+Bits are only ever added to a bitmap that already has its full size, and a
+bitmap that is missing or shorter than its spec (e.g. evicted) sends every
+check to the database, so the filter never answers "not blacklisted" from
+partial data.
+"""
+import hashlib
+import math
+import secrets
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.redis import RedisCache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+CURRENT_KEY = 'auth:blacklist:filter:current'
+NEXT_KEY = 'auth:blacklist:filter:next'
+BITMAP_KEY = 'auth:blacklist:filter:bits:{}'
+
+PRUNE_BATCH_SIZE = 5000
+LOAD_BATCH_SIZE = 20000
+
+
+class RedisBitmaps:
+    """
+    Bitmaps stored in the Redis cache with SETBIT/GETBIT (most significant bit first)
+    """
+    # SETBIT on a missing key would create a partial bitmap, so only add to existing ones
+    SET_BITS_SCRIPT = """
+        if redis.call('EXISTS', KEYS[1]) == 0 then
+            return 0
+        end
+        for _, position in ipairs(ARGV) do
+            redis.call('SETBIT', KEYS[1], position, 1)
+        end
+        return 1
+    """
+
+    def _client(self):
+        # Django's cache API has no bit operations; use its connection pool directly
+        return cache._cache.get_client(write=True)
+
+    @staticmethod
+    def _key(key):
+        return cache.make_and_validate_key(key)
+
+    def create(self, key, bits):
+        self._client().set(self._key(key), bytes(_byte_length(bits)))
+
+    def merge(self, key, data):
+        client = self._client()
+        staging = self._key(f'{key}:staging')
+        pipeline = client.pipeline()
+        pipeline.set(staging, bytes(data))
+        pipeline.bitop('OR', self._key(key), self._key(key), staging)
+        pipeline.delete(staging)
+        pipeline.execute()
+
+    def set_bits(self, key, positions):
+        if positions:
+            self._client().eval(self.SET_BITS_SCRIPT, 1, self._key(key), *positions)
+
+    def all_set(self, key, positions, bits):
+        """
+        Whether every position is set; None when the bitmap is missing or partial
+        """
+        client = self._client()
+        pipeline = client.pipeline(transaction=False)
+        pipeline.strlen(self._key(key))
+        for position in positions:
+            pipeline.getbit(self._key(key), position)
+        length, *found = pipeline.execute()
+        if length < _byte_length(bits):
+            return None
+        return all(found)
+
+    def delete(self, key):
+        self._client().delete(self._key(key))
+
+
+def _byte_length(bits):
+    return (bits + 7) // 8
+
+
+def bitmaps():
+    """
+    The bitmap store, or None when the cache cannot share one between processes
+    """
+    # cache is a proxy to the default backend, never an instance of it
+    return RedisBitmaps() if isinstance(caches['default'], RedisCache) else None
+
+
+def filter_size(count):
+    """
+    (bits, hashes) for a filter holding count entries at the configured error rate
+    """
+    capacity = max(count * 2, settings.TOKEN_BLACKLIST_FILTER_CAPACITY)
+    error_rate = settings.TOKEN_BLACKLIST_FILTER_ERROR_RATE
+    bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+    hashes = max(1, round(bits / capacity * math.log(2)))
+    return bits, hashes
+
+
+def _hash_pair(jti):
+    digest = hashlib.blake2b(jti.encode(), digest_size=16).digest()
+    return int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big') | 1
+
+
+def positions(jti, bits, hashes):
+    """
+    Bit positions of a jti, by double hashing
+    """
+    first, second = _hash_pair(jti)
+    return [(first + i * second) % (1 << 64) % bits for i in range(hashes)]
+
+
+def _filters():
+    return [spec for spec in cache.get_many([CURRENT_KEY, NEXT_KEY]).values() if spec]
+
+
+def might_be_blacklisted(jti):
+    """
+    False when the token is certainly not blacklisted; True when the
+    database has to be asked (probable member, or no filter yet)
+    """
+    store = bitmaps()
+    spec = cache.get(CURRENT_KEY) if store else None
+    if spec is None:
+        return True
+    found = store.all_set(spec['key'], positions(jti, spec['bits'], spec['hashes']), spec['bits'])
+    return True if found is None else found
+
+
+def add_to_filter(jtis):
+    """
+    Add blacklisted jtis to the filters once the transaction commits
+    """
+    def add():
+        store = bitmaps()
+        if store is None:
+            return
+        for spec in _filters():
+            store.set_bits(spec['key'], [
+                position for jti in jtis for position in positions(jti, spec['bits'], spec['hashes'])
+            ])
+    transaction.on_commit(add)
+
+
+def _build(jtis, bits, hashes):
+    """
+    Bitmap bytes (most significant bit first) with the given jtis set
+    """
+    bitmap = np.zeros(bits, dtype=bool)
+    steps = np.arange(hashes, dtype=np.uint64)
+    for start in range(0, len(jtis), LOAD_BATCH_SIZE):
+        pairs = np.array([_hash_pair(jti) for jti in jtis[start:start + LOAD_BATCH_SIZE]], dtype=np.uint64)
+        if not pairs.size:
+            continue
+        # uint64 arithmetic wraps like the % (1 << 64) in positions()
+        with np.errstate(over='ignore'):
+            combined = pairs[:, :1] + steps * pairs[:, 1:]
+        bitmap[(combined % np.uint64(bits)).ravel()] = True
+    return np.packbits(bitmap).tobytes()
+
+
+def rebuild_filter():
+    """
+    Rebuild the filter from the blacklist table and make it current.
+    Returns the number of jtis loaded (0 when the cache is not Redis).
+    """
+    store = bitmaps()
+    if store is None:
+        return 0
+    count = BlacklistedToken.objects.count()
+    bits, hashes = filter_size(count)
+    spec = {'key': BITMAP_KEY.format(secrets.token_hex(8)), 'bits': bits, 'hashes': hashes}
+
+    # The bitmap exists at full size before entries blacklisted from here on
+    # are also written to it
+    store.create(spec['key'], bits)
+    cache.set(NEXT_KEY, spec, timeout=None)
+    jtis = list(BlacklistedToken.objects.values_list('token__jti', flat=True).iterator(chunk_size=LOAD_BATCH_SIZE))
+    store.merge(spec['key'], _build(jtis, bits, hashes))
+
+    previous = cache.get(CURRENT_KEY)
+    cache.set(CURRENT_KEY, spec, timeout=None)
+    cache.delete(NEXT_KEY)
+    if previous and previous['key'] != spec['key']:
+        store.delete(previous['key'])
+    return len(jtis)
+
+
+def prune_expired(batch_size=PRUNE_BATCH_SIZE, now=None):
+    """
+    Delete expired outstanding and blacklisted tokens in batches.
+    Returns (outstanding, blacklisted) rows deleted.
+    """
+    now = now or timezone.now()
+    deleted = [0, 0]
+    for position, (model, field) in enumerate((
+        (BlacklistedToken, 'token__expires_at__lt'),
+        (OutstandingToken, 'expires_at__lt'),
+    )):
+        expired = model.objects.filter(**{field: now}).order_by()
+        while True:
+            batch = list(expired.values_list('id', flat=True)[:batch_size])
+            if not batch:
+                break
+            model.objects.filter(id__in=batch).delete()
+            deleted[position] += len(batch)
+    return deleted[1], deleted[0]
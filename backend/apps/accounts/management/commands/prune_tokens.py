@@ -0,0 +1,24 @@
+"""
+Prune expired JWT tokens and rebuild the blacklist filter
+"""
+from django.core.management.base import BaseCommand
+
+from apps.accounts.blacklist import PRUNE_BATCH_SIZE, prune_expired, rebuild_filter
+
+
+class Command(BaseCommand):
+    help = 'Delete expired outstanding and blacklisted tokens, then rebuild the blacklist filter'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=PRUNE_BATCH_SIZE, help='Rows deleted per statement')
+        parser.add_argument('--no-filter', action='store_true', help='Skip rebuilding the blacklist filter')
+
+    def handle(self, *args, **options):
+        outstanding, blacklisted = prune_expired(batch_size=options['batch_size'])
+        self.stdout.write(f'Deleted {outstanding} outstanding and {blacklisted} blacklisted tokens')
+
+        if not options['no_filter']:
+            loaded = rebuild_filter()
+            self.stdout.write(f'Blacklist filter rebuilt with {loaded} tokens')
+
+        self.stdout.write(self.style.SUCCESS('Done'))
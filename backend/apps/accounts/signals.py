@@ -0,0 +1,27 @@
+"""
+Signal handlers that invalidate cached authentication users
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.accounts.authentication import invalidate_users
+
+
+@receiver(post_save, sender=get_user_model())
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Login timestamps are not worth a cache miss on every process
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    invalidate_users([instance.pk])
+
+
+@receiver(post_delete, sender=get_user_model())
+def user_deleted(sender, instance, **kwargs):
+    invalidate_users([instance.pk])
+
+
+@receiver([post_save, post_delete], sender='resources.TeamMember')
+def team_member_changed(sender, instance, **kwargs):
+    # The cached user carries their team member id
+    invalidate_users([instance.user_id])
@@ -0,0 +1,15 @@
+"""
+Background jobs for accounts
+"""
+from celery import shared_task
+
+from apps.accounts.blacklist import prune_expired, rebuild_filter
+
+
+@shared_task
+def prune_tokens():
+    """
+    Delete expired tokens, then rebuild the blacklist filter without them
+    """
+    outstanding, blacklisted = prune_expired()
+    return {'outstanding': outstanding, 'blacklisted': blacklisted, 'filter': rebuild_filter()}
@@ -0,0 +1,59 @@
+from unittest import mock
+
+import fakeredis
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.exceptions import TokenError
+
+from apps.accounts import blacklist
+from apps.accounts.tokens import RefreshToken
+
+
+REDIS_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://blacklist-tests:6379/0',
+        'OPTIONS': {'connection_class': fakeredis.FakeConnection},
+    }
+}
+
+
+@override_settings(CACHES=REDIS_CACHES)
+class BlacklistFilterTests(TestCase):
+    """
+    The Bloom filter in front of the refresh token blacklist, on a Redis cache
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            username='blacklist', email='blacklist@example.com', password='blacklist-password'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_filter_is_used_with_a_redis_cache(self):
+        self.assertIsInstance(blacklist.bitmaps(), blacklist.RedisBitmaps)
+
+    def test_unseen_token_skips_the_database(self):
+        blacklist.rebuild_filter()
+        token = RefreshToken.for_user(self.user)
+        with mock.patch('apps.accounts.tokens.BlacklistedToken.objects') as objects:
+            token.check_blacklist()
+        objects.filter.assert_not_called()
+
+    def test_blacklisted_token_is_rejected(self):
+        token = RefreshToken.for_user(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            token.blacklist()
+        blacklist.rebuild_filter()
+        self.assertTrue(blacklist.might_be_blacklisted(token['jti']))
+        with self.assertRaises(TokenError):
+            token.check_blacklist()
+
+    def test_missing_bitmap_asks_the_database(self):
+        blacklist.rebuild_filter()
+        blacklist.bitmaps().delete(cache.get(blacklist.CURRENT_KEY)['key'])
+        self.assertTrue(blacklist.might_be_blacklisted('never-blacklisted'))
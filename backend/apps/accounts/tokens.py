@@ -0,0 +1,27 @@
+"""
+JWT token classes
+"""
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+
+from apps.accounts.blacklist import add_to_filter, might_be_blacklisted
+
+
+class RefreshToken(BaseRefreshToken):
+    """
+    Refresh token whose blacklist checks go through the blacklist filter
+    """
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if not might_be_blacklisted(jti):
+            return
+        if BlacklistedToken.objects.filter(token__jti=jti).exists():
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        blacklisted = super().blacklist()
+        add_to_filter([self.payload[api_settings.JTI_CLAIM]])
+        return blacklisted
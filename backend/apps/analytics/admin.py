@@ -1,3 +1,20 @@
 from django.contrib import admin
+from .models import ReportExport, ProjectForecast
 
-# Register your models here (analytics uses services, no models yet)
+
+@admin.register(ReportExport)
+class ReportExportAdmin(admin.ModelAdmin):
+    list_display = ('dataset', 'file_format', 'status', 'row_count', 'created_by', 'created_at', 'completed_at')
+    list_filter = ('status', 'dataset', 'file_format', 'created_at')
+    readonly_fields = ('id', 'created_at', 'completed_at')
+    ordering = ('-created_at',)
+
+
+@admin.register(ProjectForecast)
+class ProjectForecastAdmin(admin.ModelAdmin):
+    list_display = (
+        'project', 'remaining_tasks', 'throughput_per_week',
+        'forecast_completion', 'forecast_completion_high', 'fitted_at'
+    )
+    readonly_fields = ('fitted_at',)
+    ordering = ('forecast_completion',)
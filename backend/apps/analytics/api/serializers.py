@@ -0,0 +1,28 @@
+"""
+Serializers for Analytics
+"""
+from rest_framework import serializers
+from django.urls import reverse
+from apps.analytics.models import ReportExport
+
+
+class ReportExportSerializer(serializers.ModelSerializer):
+    """
+    Serializer for ReportExport jobs
+    """
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReportExport
+        fields = (
+            'id', 'dataset', 'file_format', 'filters', 'status', 'row_count',
+            'error', 'download_url', 'created_at', 'completed_at'
+        )
+        read_only_fields = fields
+
+    def get_download_url(self, obj):
+        if obj.status != 'completed':
+            return None
+        url = reverse('report-export-download', kwargs={'export_id': obj.id})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
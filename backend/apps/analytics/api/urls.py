@@ -2,10 +2,24 @@
 URL patterns for Analytics API
 """
 from django.urls import path
-from .views import DashboardView, ProjectAnalyticsView, PortfolioOverviewView
+from .views import (
+    DashboardView,
+    ProjectAnalyticsView,
+    PortfolioOverviewView,
+    FlowMetricsView,
+    PivotView,
+    ReportExportView,
+    ReportExportDetailView,
+    ReportExportDownloadView
+)
 
 urlpatterns = [
     path('dashboard/', DashboardView.as_view(), name='dashboard'),
     path('project/<uuid:project_id>/', ProjectAnalyticsView.as_view(), name='project-analytics'),
     path('portfolio/', PortfolioOverviewView.as_view(), name='portfolio-overview'),
+    path('flow/', FlowMetricsView.as_view(), name='flow-metrics'),
+    path('pivot/', PivotView.as_view(), name='pivot'),
+    path('export/<str:dataset>/<str:file_format>/', ReportExportView.as_view(), name='report-export'),
+    path('exports/<uuid:export_id>/', ReportExportDetailView.as_view(), name='report-export-detail'),
+    path('exports/<uuid:export_id>/download/', ReportExportDownloadView.as_view(), name='report-export-download'),
 ]
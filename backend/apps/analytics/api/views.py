@@ -4,12 +4,44 @@ API views for Analytics and Reports
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.db import transaction
 from django.db.models import Count, Sum, Avg, Q
+from django.http import FileResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from datetime import timedelta
+from django.utils.dateparse import parse_datetime, parse_date
+from datetime import datetime, time, timedelta
+from uuid import UUID
+from apps.analytics.cache import cached_result, table_tag, project_tag, member_tag
+from apps.analytics.exports import EXPORT_DATASETS, EXPORT_FORMATS, stream_csv
+from apps.analytics.models import ReportExport, ProjectForecast
+from apps.analytics.pivot import PIVOT_SOURCES, PivotError, normalize_query, run_pivot, tables_for
+from apps.analytics.services import FLOW_GROUP_FIELDS, flow_metrics
+from apps.analytics.tasks import build_report_export
+from apps.projects.access import get_access, scope_queryset
 from apps.projects.models import Project
-from apps.tasks.models import Task
+from apps.tasks.models import Task, TaskAssignment
 from apps.resources.models import TeamMember
+from .serializers import ReportExportSerializer
+
+EXPORT_FILTER_PARAMS = ('project', 'client')
+
+
+def parse_boundary(value, end_of_day=False):
+    """
+    Parse a date or datetime query parameter into an aware datetime
+    """
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        parsed_date = parse_date(value)
+        if parsed_date is None:
+            raise ValueError(value)
+        parsed = datetime.combine(parsed_date, time.max if end_of_day else time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
 
 
 class DashboardView(APIView):
@@ -19,30 +51,44 @@ class DashboardView(APIView):
     permission_classes = (IsAuthenticated,)
 
     def get(self, request):
+        today = timezone.now().date()
+        # Users who see the same projects share cached results
+        dashboard_data, _ = cached_result(
+            'dashboard',
+            {'today': today, 'access': get_access(request.user).digest},
+            [table_tag('projects'), table_tag('tasks'), table_tag('team_members')],
+            lambda: self.build(today, request.user)
+        )
+        return Response(dashboard_data)
+
+    def build(self, today, user):
+        projects = scope_queryset(Project.objects.all(), user, 'id')
+        tasks = scope_queryset(Task.objects.all(), user)
+
         # Project statistics
-        total_projects = Project.objects.count()
-        active_projects = Project.objects.filter(status='active').count()
-        completed_projects = Project.objects.filter(status='completed').count()
+        total_projects = projects.count()
+        active_projects = projects.filter(status='active').count()
+        completed_projects = projects.filter(status='completed').count()
 
         # Task statistics
-        total_tasks = Task.objects.count()
-        completed_tasks = Task.objects.filter(status='done').count()
-        in_progress_tasks = Task.objects.filter(status='in_progress').count()
-        overdue_tasks = Task.objects.filter(
-            end_date__lt=timezone.now().date(),
+        total_tasks = tasks.count()
+        completed_tasks = tasks.filter(status='done').count()
+        in_progress_tasks = tasks.filter(status='in_progress').count()
+        overdue_tasks = tasks.filter(
+            end_date__lt=today,
             status__in=['todo', 'in_progress']
         ).count()
 
         # Financial statistics
-        total_budget = Project.objects.aggregate(total=Sum('budget'))['total'] or 0
-        total_actual_cost = Project.objects.aggregate(total=Sum('actual_cost'))['total'] or 0
+        total_budget = projects.aggregate(total=Sum('budget'))['total'] or 0
+        total_actual_cost = projects.aggregate(total=Sum('actual_cost'))['total'] or 0
 
         # Team statistics
         total_team_members = TeamMember.objects.filter(is_active=True).count()
 
         # Recent activity
-        recent_projects = Project.objects.order_by('-created_at')[:5]
-        recent_tasks = Task.objects.order_by('-created_at')[:10]
+        recent_projects = projects.order_by('-created_at')[:5]
+        recent_tasks = tasks.select_related('project').order_by('-created_at')[:10]
 
         dashboard_data = {
             'projects': {
@@ -83,7 +129,7 @@ class DashboardView(APIView):
             ],
         }
 
-        return Response(dashboard_data)
+        return dashboard_data
 
 
 class ProjectAnalyticsView(APIView):
@@ -94,10 +140,24 @@ class ProjectAnalyticsView(APIView):
 
     def get(self, request, project_id):
         try:
-            project = Project.objects.get(id=project_id)
+            project = scope_queryset(Project.objects.all(), request.user, 'id').get(id=project_id)
         except Project.DoesNotExist:
             return Response({"error": "Project not found"}, status=404)
 
+        member_ids = project.team_members.values_list('id', flat=True)
+        analytics_data, _ = cached_result(
+            'project',
+            {'project': project.id},
+            [
+                project_tag(project.id),
+                table_tag('project_forecasts'),
+                *[member_tag(member_id) for member_id in member_ids]
+            ],
+            lambda: self.build(project)
+        )
+        return Response(analytics_data)
+
+    def build(self, project):
         tasks = project.tasks.all()
 
         # Task status distribution
@@ -117,14 +177,18 @@ class ProjectAnalyticsView(APIView):
         critical_tasks = tasks.filter(is_critical=True).count()
 
         # Team member workload
+        assigned = dict(
+            TaskAssignment.objects.filter(task__project=project).order_by().values('team_member_id').annotate(
+                count=Count('task_id', distinct=True)
+            ).values_list('team_member_id', 'count')
+        )
         team_workload = []
-        for member in project.team_members.all():
-            assigned_tasks = tasks.filter(assigned_to=member).count()
+        for member in project.team_members.select_related('user'):
             team_workload.append({
                 'member_id': str(member.id),
                 'name': member.full_name,
                 'role': member.role,
-                'assigned_tasks': assigned_tasks
+                'assigned_tasks': assigned.get(member.id, 0)
             })
 
         analytics_data = {
@@ -149,9 +213,33 @@ class ProjectAnalyticsView(APIView):
                 'variance': float(total_estimated_cost - total_actual_cost),
             },
             'team_workload': team_workload,
+            'forecast': self.forecast_data(project),
         }
 
-        return Response(analytics_data)
+        return analytics_data
+
+    def forecast_data(self, project):
+        """
+        Latest stored completion forecast (fitted nightly)
+        """
+        try:
+            forecast = project.forecast
+        except ProjectForecast.DoesNotExist:
+            return None
+
+        return {
+            'planned_end': project.end_date,
+            'forecast_completion': forecast.forecast_completion,
+            'forecast_completion_low': forecast.forecast_completion_low,
+            'forecast_completion_high': forecast.forecast_completion_high,
+            'progress_forecast_completion': forecast.progress_forecast_completion,
+            'throughput_per_week': forecast.throughput_per_week,
+            'throughput_std': forecast.throughput_std,
+            'progress_rate_per_week': forecast.progress_rate_per_week,
+            'remaining_tasks': forecast.remaining_tasks,
+            'weeks_observed': forecast.weeks_observed,
+            'fitted_at': forecast.fitted_at,
+        }
 
 
 class PortfolioOverviewView(APIView):
@@ -161,14 +249,24 @@ class PortfolioOverviewView(APIView):
     permission_classes = (IsAuthenticated,)
 
     def get(self, request):
-        projects = Project.objects.all()
+        today = timezone.now().date()
+        portfolio_data, _ = cached_result(
+            'portfolio',
+            {'today': today, 'access': get_access(request.user).digest},
+            [table_tag('projects'), table_tag('tasks'), table_tag('clients')],
+            lambda: self.build(today, request.user)
+        )
+        return Response(portfolio_data)
+
+    def build(self, today, user):
+        projects = scope_queryset(Project.objects.all(), user, 'id')
 
         # Status distribution
         status_distribution = projects.values('status').annotate(count=Count('id'))
 
         # Financial overview
         financial_data = []
-        for project in projects:
+        for project in projects.with_progress():
             financial_data.append({
                 'project_id': str(project.id),
                 'name': project.name,
@@ -180,9 +278,9 @@ class PortfolioOverviewView(APIView):
 
         # Timeline overview
         upcoming_projects = projects.filter(
-            start_date__gte=timezone.now().date(),
-            start_date__lte=timezone.now().date() + timedelta(days=30)
-        )
+            start_date__gte=today,
+            start_date__lte=today + timedelta(days=30)
+        ).select_related('client')
 
         portfolio_data = {
             'total_projects': projects.count(),
@@ -200,4 +298,153 @@ class PortfolioOverviewView(APIView):
             ],
         }
 
-        return Response(portfolio_data)
+        return portfolio_data
+
+
+class FlowMetricsView(APIView):
+    """
+    Cycle time, lead time, throughput and aging WIP percentiles
+    from the task status transition log
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        group_by = request.query_params.get('group_by', 'project')
+        if group_by not in FLOW_GROUP_FIELDS:
+            return Response(
+                {"error": f"group_by must be one of {list(FLOW_GROUP_FIELDS)}"},
+                status=400
+            )
+
+        try:
+            since = parse_boundary(request.query_params.get('since'))
+            until = parse_boundary(request.query_params.get('until'), end_of_day=True)
+        except ValueError:
+            return Response({"error": "since and until must be ISO dates"}, status=400)
+
+        try:
+            project_id = request.query_params.get('project')
+            project_id = str(UUID(project_id)) if project_id else None
+        except ValueError:
+            return Response({"error": "project must be a project id"}, status=400)
+        access = get_access(request.user)
+        if project_id and not access.can_view(project_id):
+            return Response({"error": "Project not found"}, status=404)
+        if since is None and until is None:
+            # The default window moves with the clock; bucket it by day so it can be cached
+            until = parse_boundary(str(timezone.now().date()), end_of_day=True)
+        query = {
+            'group_by': group_by, 'project': project_id, 'since': since, 'until': until,
+            'access': None if project_id else access.digest
+        }
+        tags = [project_tag(project_id) if project_id else table_tag('tasks')]
+        if group_by == 'member':
+            tags.append(table_tag('task_assignments'))
+
+        metrics, _ = cached_result(
+            'flow',
+            query,
+            tags,
+            lambda: flow_metrics(
+                group_by=group_by,
+                project_id=project_id,
+                since=since,
+                until=until,
+                project_ids=None if project_id or access.unrestricted else access.project_filter()
+            )
+        )
+        return Response(metrics)
+
+
+class PivotView(APIView):
+    """
+    Group tasks or assignments by whitelisted dimensions and return
+    the chosen measures, e.g.
+    ?source=tasks&dimensions=project,status&measures=count,estimated_cost
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        params = request.query_params
+        source = params.get('source', 'tasks')
+        dimensions = [d for d in params.get('dimensions', '').split(',') if d]
+        measures = [m for m in params.get('measures', '').split(',') if m]
+        filter_names = PIVOT_SOURCES.get(source, {}).get('filters', {})
+        filters = {key: params[key] for key in filter_names if params.get(key)}
+
+        try:
+            query = normalize_query(source, dimensions, measures, filters)
+        except PivotError as exc:
+            return Response({"error": str(exc)}, status=400)
+
+        access = get_access(request.user)
+        tags = [table_tag(table) for table in tables_for(query, scoped=not access.unrestricted)]
+        result, cached = cached_result(
+            'pivot',
+            {**query, 'access': access.digest},
+            tags,
+            lambda: run_pivot(query, project_ids=None if access.unrestricted else access.project_filter())
+        )
+        return Response({**result, 'cached': cached})
+
+
+class ReportExportView(APIView):
+    """
+    Export a report. CSV is streamed straight from a server-side cursor;
+    XLSX and Parquet (or CSV with ?background=true) are built by a background job.
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, dataset, file_format):
+        if dataset not in EXPORT_DATASETS:
+            return Response({"error": f"dataset must be one of {list(EXPORT_DATASETS)}"}, status=404)
+        if file_format not in EXPORT_FORMATS:
+            return Response({"error": f"format must be one of {list(EXPORT_FORMATS)}"}, status=404)
+
+        filters = {
+            key: request.query_params[key]
+            for key in EXPORT_FILTER_PARAMS if request.query_params.get(key)
+        }
+
+        if file_format == 'csv' and request.query_params.get('background') != 'true':
+            access = get_access(request.user)
+            scoped = filters if access.unrestricted else {**filters, 'projects': access.project_filter()}
+            response = StreamingHttpResponse(stream_csv(dataset, scoped), content_type='text/csv')
+            response['Content-Disposition'] = f'attachment; filename="{dataset}.csv"'
+            return response
+
+        export = ReportExport.objects.create(
+            dataset=dataset,
+            file_format=file_format,
+            filters=filters,
+            created_by=request.user
+        )
+        transaction.on_commit(lambda: build_report_export.delay(str(export.id)))
+
+        serializer = ReportExportSerializer(export, context={'request': request})
+        return Response(serializer.data, status=202)
+
+
+class ReportExportDetailView(APIView):
+    """
+    Status of a background export job
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, export_id):
+        export = get_object_or_404(ReportExport, id=export_id, created_by=request.user)
+        serializer = ReportExportSerializer(export, context={'request': request})
+        return Response(serializer.data)
+
+
+class ReportExportDownloadView(APIView):
+    """
+    Download the file produced by a completed export job
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, export_id):
+        export = get_object_or_404(ReportExport, id=export_id, created_by=request.user)
+        if export.status != 'completed' or not export.file:
+            return Response({"error": "Export is not ready"}, status=409)
+        return FileResponse(export.file.open('rb'), as_attachment=True, filename=export.file.name.split('/')[-1])
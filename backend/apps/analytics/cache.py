@@ -0,0 +1,98 @@
+"""
+Cache helpers for analytics results.
+
+Every cached result declares the tags it depends on: whole tables
+(``table:tasks``) or single entities (``project:<id>``, ``member:<id>``).
+Each tag has a version counter in the cache and the result is stored under a
+key built from the query plus the current version of every declared tag.
+Writes bump the versions of the tags they touch, which makes exactly the
+dependent entries unreachable; everything else stays cached.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+TAG_VERSION_KEY = 'analytics:tag-version:{}'
+
+
+def table_tag(table):
+    return f'table:{table}'
+
+
+def project_tag(project_id):
+    return f'project:{project_id}'
+
+
+def member_tag(member_id):
+    return f'member:{member_id}'
+
+
+def client_tag(client_id):
+    return f'client:{client_id}'
+
+
+def get_tag_versions(tags):
+    """
+    Current version of each tag
+    """
+    keys = {TAG_VERSION_KEY.format(tag): tag for tag in tags}
+    found = cache.get_many(keys.keys())
+    versions = {}
+    for key, tag in keys.items():
+        if key not in found:
+            cache.add(key, 1, timeout=None)
+            found[key] = cache.get(key, 1)
+        versions[tag] = found[key]
+    return versions
+
+
+def invalidate_tags(*tags, defer=True):
+    """
+    Mark tags as changed so results that depend on them are recomputed.
+    Deferred until commit so a concurrent reader cannot cache pre-commit data
+    under the new version; defer=False bumps the versions at once, for
+    measurements that run inside a transaction that never commits.
+    """
+    tags = {tag for tag in tags if tag}
+    if tags and defer:
+        transaction.on_commit(lambda: _increment_versions(tags))
+    elif tags:
+        _increment_versions(tags)
+
+
+def _increment_versions(tags):
+    for tag in tags:
+        key = TAG_VERSION_KEY.format(tag)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, timeout=None)
+            cache.incr(key)
+
+
+def make_key(prefix, query, tags):
+    """
+    Cache key for a normalized query and the versions of the tags it depends on
+    """
+    versions = get_tag_versions(sorted(set(tags)))
+    payload = json.dumps({'query': query, 'versions': versions}, sort_keys=True, default=str)
+    digest = hashlib.sha1(payload.encode()).hexdigest()
+    return f'analytics:{prefix}:{digest}'
+
+
+def cached_result(prefix, query, tags, compute, timeout=None):
+    """
+    Return (result, cached) for a query, computing and storing it on a miss
+    """
+    key = make_key(prefix, query, tags)
+    result = cache.get(key)
+    if result is not None:
+        return result, True
+
+    result = compute()
+    cache.set(key, result, timeout or settings.ANALYTICS_CACHE_TIMEOUT)
+    return result, False
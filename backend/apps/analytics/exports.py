@@ -0,0 +1,300 @@
+"""
+Report export pipeline.
+
+Rows are read with server-side cursors (``.iterator(chunk_size=...)``) and
+written out one chunk at a time, so memory stays flat regardless of how many
+rows a report has.
+"""
+import csv
+import json
+import os
+import tempfile
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from itertools import islice
+from uuid import UUID
+
+from django.conf import settings
+from django.db.models import Avg, Count
+from django.utils import timezone
+
+from apps.projects.models import Project, ActivityLog
+from apps.tasks.models import Task, TaskAssignment
+
+
+EXPORT_FORMATS = ('csv', 'xlsx', 'parquet')
+
+# Excel caps a sheet at 1,048,576 rows (including the header)
+XLSX_MAX_ROWS = 1048575
+
+
+def _scoped(queryset, filters, lookup):
+    """
+    Restrict rows to the projects the requesting user can see, passed as
+    filters['projects'] (ids or a subquery) by the caller
+    """
+    if filters.get('projects') is not None:
+        queryset = queryset.filter(**{f'{lookup}__in': filters['projects']})
+    return queryset
+
+
+def _task_rows(filters):
+    queryset = Task.objects.order_by('project_id', 'start_date', 'id')
+    if filters.get('project'):
+        queryset = queryset.filter(project_id=filters['project'])
+    return _scoped(queryset, filters, 'project_id')
+
+
+def _portfolio_rows(filters):
+    queryset = Project.objects.annotate(
+        task_count=Count('tasks'),
+        average_progress=Avg('tasks__progress'),
+    ).order_by('name', 'id')
+    if filters.get('client'):
+        queryset = queryset.filter(client_id=filters['client'])
+    return _scoped(queryset, filters, 'id')
+
+
+def _assignment_rows(filters):
+    queryset = TaskAssignment.objects.order_by('task__project_id', 'task_id', 'id')
+    if filters.get('project'):
+        queryset = queryset.filter(task__project_id=filters['project'])
+    return _scoped(queryset, filters, 'task__project_id')
+
+
+def _activity_rows(filters):
+    queryset = ActivityLog.objects.order_by('-created_at', 'id')
+    if filters.get('project'):
+        queryset = queryset.filter(project_id=filters['project'])
+    return _scoped(queryset, filters, 'project_id')
+
+
+# dataset -> (queryset builder, [(column header, lookup, type)])
+EXPORT_DATASETS = {
+    'tasks': (_task_rows, [
+        ('id', 'id', 'str'),
+        ('project_id', 'project_id', 'str'),
+        ('project', 'project__name', 'str'),
+        ('title', 'title', 'str'),
+        ('status', 'status', 'str'),
+        ('priority', 'priority', 'str'),
+        ('start_date', 'start_date', 'date'),
+        ('end_date', 'end_date', 'date'),
+        ('duration', 'duration', 'int'),
+        ('progress', 'progress', 'int'),
+        ('estimated_hours', 'estimated_hours', 'float'),
+        ('actual_hours', 'actual_hours', 'float'),
+        ('estimated_cost', 'estimated_cost', 'float'),
+        ('actual_cost', 'actual_cost', 'float'),
+        ('is_critical', 'is_critical', 'bool'),
+        ('created_at', 'created_at', 'datetime'),
+    ]),
+    'portfolio': (_portfolio_rows, [
+        ('project_id', 'id', 'str'),
+        ('project', 'name', 'str'),
+        ('client', 'client__name', 'str'),
+        ('status', 'status', 'str'),
+        ('budget', 'budget', 'float'),
+        ('actual_cost', 'actual_cost', 'float'),
+        ('start_date', 'start_date', 'date'),
+        ('end_date', 'end_date', 'date'),
+        ('task_count', 'task_count', 'int'),
+        ('average_progress', 'average_progress', 'float'),
+    ]),
+    'assignments': (_assignment_rows, [
+        ('id', 'id', 'str'),
+        ('task_id', 'task_id', 'str'),
+        ('task', 'task__title', 'str'),
+        ('project_id', 'task__project_id', 'str'),
+        ('team_member_id', 'team_member_id', 'str'),
+        ('first_name', 'team_member__user__first_name', 'str'),
+        ('last_name', 'team_member__user__last_name', 'str'),
+        ('allocated_hours', 'allocated_hours', 'float'),
+        ('allocation_percentage', 'allocation_percentage', 'int'),
+        ('assigned_date', 'assigned_date', 'datetime'),
+    ]),
+    'activity': (_activity_rows, [
+        ('id', 'id', 'str'),
+        ('project_id', 'project_id', 'str'),
+        ('user', 'user__username', 'str'),
+        ('action', 'action', 'str'),
+        ('entity_type', 'entity_type', 'str'),
+        ('entity_id', 'entity_id', 'str'),
+        ('description', 'description', 'str'),
+        ('changes', 'changes', 'json'),
+        ('created_at', 'created_at', 'datetime'),
+    ]),
+}
+
+
+def _to_plain(value, kind):
+    """
+    Convert a database value into a type every writer understands
+    """
+    if value is None:
+        return None
+    if kind == 'json':
+        return json.dumps(value, default=str)
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    if kind == 'datetime' and isinstance(value, datetime) and timezone.is_aware(value):
+        # Excel and Parquet writers take naive UTC timestamps
+        return timezone.make_naive(value, dt_timezone.utc)
+    return value
+
+
+def get_columns(dataset):
+    return EXPORT_DATASETS[dataset][1]
+
+
+def iter_rows(dataset, filters, chunk_size=None):
+    """
+    Yield converted row tuples for a dataset using a server-side cursor
+    """
+    builder, columns = EXPORT_DATASETS[dataset]
+    lookups = [lookup for _, lookup, _ in columns]
+    kinds = [kind for _, _, kind in columns]
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+
+    rows = builder(filters).values_list(*lookups).iterator(chunk_size=chunk_size)
+    for row in rows:
+        yield tuple(_to_plain(value, kind) for value, kind in zip(row, kinds))
+
+
+def iter_chunks(dataset, filters, chunk_size=None):
+    """
+    Yield lists of at most chunk_size rows
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    rows = iter_rows(dataset, filters, chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class Echo:
+    """
+    File-like object that returns what is written, for streaming csv.writer output
+    """
+    def write(self, value):
+        return value
+
+
+def stream_csv(dataset, filters):
+    """
+    Generator of CSV lines for a StreamingHttpResponse
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow([header for header, _, _ in get_columns(dataset)])
+    for row in iter_rows(dataset, filters):
+        yield writer.writerow(row)
+
+
+def _arrow_schema(columns):
+    import pyarrow as pa
+
+    types = {
+        'str': pa.string(),
+        'json': pa.string(),
+        'int': pa.int64(),
+        'float': pa.float64(),
+        'bool': pa.bool_(),
+        'date': pa.date32(),
+        'datetime': pa.timestamp('us'),
+    }
+    return pa.schema([(header, types[kind]) for header, _, kind in columns])
+
+
+def write_parquet(dataset, filters, path, progress=None):
+    """
+    Write one Parquet row group per chunk
+    """
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    columns = get_columns(dataset)
+    headers = [header for header, _, _ in columns]
+    schema = _arrow_schema(columns)
+
+    total = 0
+    with pq.ParquetWriter(path, schema, compression='snappy') as writer:
+        for chunk in iter_chunks(dataset, filters):
+            frame = pd.DataFrame.from_records(chunk, columns=headers)
+            writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+            total += len(chunk)
+            if progress:
+                progress(total)
+    return total
+
+
+def write_xlsx(dataset, filters, path, progress=None):
+    """
+    Write rows with openpyxl's write-only workbook, which streams to disk
+    """
+    from openpyxl import Workbook
+
+    headers = [header for header, _, _ in get_columns(dataset)]
+    workbook = Workbook(write_only=True)
+    sheet = None
+    sheet_rows = XLSX_MAX_ROWS
+
+    total = 0
+    for chunk in iter_chunks(dataset, filters):
+        for row in chunk:
+            if sheet_rows >= XLSX_MAX_ROWS:
+                # Roll over to a new sheet once Excel's row limit is reached
+                sheet = workbook.create_sheet(f'{dataset}_{len(workbook.worksheets) + 1}')
+                sheet.append(headers)
+                sheet_rows = 0
+            sheet.append(row)
+            sheet_rows += 1
+        total += len(chunk)
+        if progress:
+            progress(total)
+
+    if sheet is None:
+        workbook.create_sheet(dataset).append(headers)
+    workbook.save(path)
+    return total
+
+
+def write_csv(dataset, filters, path, progress=None):
+    """
+    Write a CSV file chunk by chunk (used for background CSV exports)
+    """
+    total = 0
+    with open(path, 'w', newline='') as handle:
+        writer = csv.writer(handle)
+        writer.writerow([header for header, _, _ in get_columns(dataset)])
+        for chunk in iter_chunks(dataset, filters):
+            writer.writerows(chunk)
+            total += len(chunk)
+            if progress:
+                progress(total)
+    return total
+
+
+WRITERS = {
+    'csv': write_csv,
+    'xlsx': write_xlsx,
+    'parquet': write_parquet,
+}
+
+
+def build_export_file(dataset, file_format, filters, progress=None):
+    """
+    Write an export to a temporary file and return (path, row count)
+    """
+    handle, path = tempfile.mkstemp(suffix=f'.{file_format}')
+    os.close(handle)
+    try:
+        total = WRITERS[file_format](dataset, filters, path, progress=progress)
+    except Exception:
+        os.remove(path)
+        raise
+    return path, total
@@ -0,0 +1,17 @@
+"""
+Refit completion forecasts for all active projects
+"""
+from django.core.management.base import BaseCommand
+
+from apps.analytics.services import fit_project_forecasts
+
+
+class Command(BaseCommand):
+    help = 'Fit throughput-based completion forecasts for all active projects'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--weeks', type=int, default=None, help='Weeks of history to fit on')
+
+    def handle(self, *args, **options):
+        count = fit_project_forecasts(history_weeks=options['weeks'])
+        self.stdout.write(self.style.SUCCESS(f'Fitted forecasts for {count} projects'))
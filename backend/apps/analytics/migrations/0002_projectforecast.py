@@ -0,0 +1,35 @@
+# Generated by Django 5.0.1 on 2026-10-18 23:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+        ('projects', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectForecast',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='forecast', serialize=False, to='projects.project')),
+                ('total_tasks', models.IntegerField(default=0)),
+                ('remaining_tasks', models.IntegerField(default=0)),
+                ('weeks_observed', models.IntegerField(default=0)),
+                ('throughput_per_week', models.FloatField(default=0, help_text='Mean tasks completed per week')),
+                ('throughput_std', models.FloatField(default=0)),
+                ('progress_rate_per_week', models.FloatField(default=0, help_text='Fitted share of tasks completed per week (0-1)')),
+                ('forecast_completion', models.DateField(blank=True, null=True)),
+                ('forecast_completion_low', models.DateField(blank=True, help_text='Optimistic bound', null=True)),
+                ('forecast_completion_high', models.DateField(blank=True, help_text='Pessimistic bound', null=True)),
+                ('progress_forecast_completion', models.DateField(blank=True, null=True)),
+                ('fitted_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'project_forecasts',
+            },
+        ),
+    ]
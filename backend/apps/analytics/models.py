@@ -1,6 +1,99 @@
 """
-Analytics app - primarily uses services, no models needed yet
+Analytics models - most analytics are calculated from existing models;
+these store the results of longer-running background jobs
 """
+import uuid
 from django.db import models
+from django.conf import settings
 
-# Placeholder - analytics will be calculated from existing models
+
+class ReportExport(models.Model):
+    """
+    Background export of a report to a downloadable file
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    DATASET_CHOICES = [
+        ('tasks', 'Tasks'),
+        ('portfolio', 'Portfolio Financials'),
+        ('assignments', 'Assignments'),
+        ('activity', 'Activity Logs'),
+    ]
+
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('xlsx', 'Excel'),
+        ('parquet', 'Parquet'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    dataset = models.CharField(max_length=20, choices=DATASET_CHOICES)
+    file_format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    filters = models.JSONField(default=dict, blank=True)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    row_count = models.IntegerField(default=0)
+    file = models.FileField(upload_to='exports/', blank=True)
+    error = models.TextField(blank=True)
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='report_exports'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'report_exports'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_by', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.dataset}.{self.file_format} ({self.status})"
+
+
+class ProjectForecast(models.Model):
+    """
+    Stored completion forecast for a project, refitted by the nightly job
+    """
+    project = models.OneToOneField(
+        'projects.Project',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='forecast'
+    )
+
+    # Inputs
+    total_tasks = models.IntegerField(default=0)
+    remaining_tasks = models.IntegerField(default=0)
+    weeks_observed = models.IntegerField(default=0)
+
+    # Fitted rates
+    throughput_per_week = models.FloatField(default=0, help_text="Mean tasks completed per week")
+    throughput_std = models.FloatField(default=0)
+    progress_rate_per_week = models.FloatField(
+        default=0,
+        help_text="Fitted share of tasks completed per week (0-1)"
+    )
+
+    # Projections (null when there is no throughput to project from)
+    forecast_completion = models.DateField(null=True, blank=True)
+    forecast_completion_low = models.DateField(null=True, blank=True, help_text="Optimistic bound")
+    forecast_completion_high = models.DateField(null=True, blank=True, help_text="Pessimistic bound")
+    progress_forecast_completion = models.DateField(null=True, blank=True)
+
+    fitted_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'project_forecasts'
+
+    def __str__(self):
+        return f"{self.project_id} -> {self.forecast_completion}"
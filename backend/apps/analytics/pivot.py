@@ -0,0 +1,225 @@
+"""
+Pivot / cube queries over tasks and assignments.
+
+Dimensions and measures are whitelisted so a request can only ever produce a
+single GROUP BY over known columns.
+
+A task has one row per assignee once it is joined to its assignments, so the
+tasks source has no member or department dimension: summing task columns by
+assignee would count a task once per assignment. Those breakdowns come from
+the assignments source, whose measures belong to the assignment itself.
+"""
+import uuid
+
+from django.db.models import Avg, Count, DecimalField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils.dateparse import parse_date
+
+from apps.tasks.models import Task, TaskAssignment
+
+
+PIVOT_MAX_ROWS = 10000
+
+# Each dimension: (grouping lookups, tables it reads). The first lookup is the
+# group key; any further lookups are labels that depend on it.
+TASK_DIMENSIONS = {
+    'project': (('project_id', 'project__name'), {'projects'}),
+    'client': (('project__client_id', 'project__client__name'), {'projects', 'clients'}),
+    'status': (('status',), set()),
+    'priority': (('priority',), set()),
+    'month': (('month',), set()),
+}
+
+ASSIGNMENT_DIMENSIONS = {
+    'project': (('task__project_id', 'task__project__name'), {'tasks', 'projects'}),
+    'client': (('task__project__client_id', 'task__project__client__name'), {'tasks', 'projects', 'clients'}),
+    'status': (('task__status',), {'tasks'}),
+    'priority': (('task__priority',), {'tasks'}),
+    'member': (
+        ('team_member_id', 'team_member__user__first_name', 'team_member__user__last_name'),
+        {'team_members', 'users'}
+    ),
+    'department': (('team_member__department',), {'team_members'}),
+    'month': (('month',), {'tasks'}),
+}
+
+# Each measure: (aggregate factory, tables it reads)
+TASK_MEASURES = {
+    'count': (lambda: Count('id', distinct=True), set()),
+    'estimated_hours': (lambda: Sum('estimated_hours'), set()),
+    'actual_hours': (lambda: Sum('actual_hours'), set()),
+    'estimated_cost': (lambda: Sum('estimated_cost'), set()),
+    'actual_cost': (lambda: Sum('actual_cost'), set()),
+    'average_progress': (lambda: Avg('progress'), set()),
+    'average_duration': (lambda: Avg('duration'), set()),
+}
+
+ASSIGNMENT_MEASURES = {
+    'count': (lambda: Count('id'), set()),
+    'allocated_hours': (lambda: Sum('allocated_hours'), set()),
+    'allocated_cost': (
+        lambda: Sum(ExpressionWrapper(
+            F('allocated_hours') * F('team_member__hourly_rate'),
+            output_field=DecimalField(max_digits=16, decimal_places=4)
+        )),
+        {'team_members'}
+    ),
+    'average_allocation': (lambda: Avg('allocation_percentage'), set()),
+}
+
+# Each filter: (lookup, or a function of the value returning a Q, tables it reads)
+TASK_FILTERS = {
+    'project': ('project_id', set()),
+    'client': ('project__client_id', {'projects'}),
+    'status': ('status', set()),
+    'priority': ('priority', set()),
+    # A subquery rather than a join, so each task stays a single row
+    'member': (
+        lambda value: Q(id__in=TaskAssignment.objects.filter(team_member_id=value).values('task_id')),
+        {'task_assignments'}
+    ),
+    'start': ('start_date__gte', set()),
+    'end': ('end_date__lte', set()),
+}
+
+ASSIGNMENT_FILTERS = {
+    'project': ('task__project_id', {'tasks'}),
+    'client': ('task__project__client_id', {'tasks', 'projects'}),
+    'status': ('task__status', {'tasks'}),
+    'priority': ('task__priority', {'tasks'}),
+    'member': ('team_member_id', set()),
+    'start': ('task__start_date__gte', {'tasks'}),
+    'end': ('task__end_date__lte', {'tasks'}),
+}
+
+def _uuid(value):
+    return str(uuid.UUID(value))
+
+
+def _date(value):
+    # parse_date returns None for a malformed date and raises for an impossible one
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(value)
+    return parsed.isoformat()
+
+
+# Canonical form of each filter value; raises ValueError on malformed input
+FILTER_PARSERS = {
+    'project': _uuid,
+    'client': _uuid,
+    'status': str,
+    'priority': str,
+    'member': _uuid,
+    'start': _date,
+    'end': _date,
+}
+
+PIVOT_SOURCES = {
+    'tasks': {
+        'queryset': lambda: Task.objects.annotate(month=TruncMonth('start_date')),
+        'table': 'tasks',
+        'dimensions': TASK_DIMENSIONS,
+        'measures': TASK_MEASURES,
+        'filters': TASK_FILTERS,
+        # Lookup restricting rows to a user's projects, and the tables it reads
+        'scope': ('project_id', set()),
+    },
+    'assignments': {
+        'queryset': lambda: TaskAssignment.objects.annotate(month=TruncMonth('task__start_date')),
+        'table': 'task_assignments',
+        'dimensions': ASSIGNMENT_DIMENSIONS,
+        'measures': ASSIGNMENT_MEASURES,
+        'filters': ASSIGNMENT_FILTERS,
+        'scope': ('task__project_id', {'tasks'}),
+    },
+}
+
+
+class PivotError(ValueError):
+    pass
+
+
+def normalize_query(source, dimensions, measures, filters):
+    """
+    Validate a pivot request against the whitelists and put it in canonical form
+    """
+    if source not in PIVOT_SOURCES:
+        raise PivotError(f"source must be one of {list(PIVOT_SOURCES)}")
+    spec = PIVOT_SOURCES[source]
+
+    unknown = [d for d in dimensions if d not in spec['dimensions']]
+    if unknown:
+        raise PivotError(f"Unknown dimensions {unknown}; choose from {list(spec['dimensions'])}")
+    measures = measures or ['count']
+    unknown = [m for m in measures if m not in spec['measures']]
+    if unknown:
+        raise PivotError(f"Unknown measures {unknown}; choose from {list(spec['measures'])}")
+
+    parsed = {}
+    for key in sorted(filters):
+        if key not in spec['filters']:
+            continue
+        try:
+            parsed[key] = FILTER_PARSERS[key](filters[key])
+        except ValueError:
+            raise PivotError(f"Invalid {key}: {filters[key]!r}")
+
+    return {
+        'source': source,
+        'dimensions': sorted(set(dimensions)),
+        'measures': sorted(set(measures)),
+        'filters': parsed,
+    }
+
+
+def tables_for(query, scoped=False):
+    """
+    Tables whose writes can change the result of a normalized query
+    (restricted to a user's projects when scoped)
+    """
+    spec = PIVOT_SOURCES[query['source']]
+    tables = {spec['table']}
+    if scoped:
+        tables |= spec['scope'][1]
+    for dimension in query['dimensions']:
+        tables |= spec['dimensions'][dimension][1]
+    for measure in query['measures']:
+        tables |= spec['measures'][measure][1]
+    for key in query['filters']:
+        tables |= spec['filters'][key][1]
+    return tables
+
+
+def run_pivot(query, project_ids=None):
+    """
+    Run a normalized pivot query as a single GROUP BY, over the given
+    projects only when project_ids (ids or a subquery) is passed
+    """
+    spec = PIVOT_SOURCES[query['source']]
+    queryset = spec['queryset']()
+    if project_ids is not None:
+        queryset = queryset.filter(**{f"{spec['scope'][0]}__in": project_ids})
+
+    for key, value in query['filters'].items():
+        lookup = spec['filters'][key][0]
+        queryset = queryset.filter(lookup(value) if callable(lookup) else Q(**{lookup: value}))
+
+    group_lookups = []
+    for dimension in query['dimensions']:
+        group_lookups.extend(spec['dimensions'][dimension][0])
+
+    aggregates = {measure: spec['measures'][measure][0]() for measure in query['measures']}
+
+    if group_lookups:
+        rows = queryset.values(*group_lookups).annotate(**aggregates).order_by(*group_lookups)
+        rows = list(rows[:PIVOT_MAX_ROWS + 1])
+    else:
+        rows = [queryset.aggregate(**aggregates)]
+
+    truncated = len(rows) > PIVOT_MAX_ROWS
+    return {
+        **query,
+        'rows': rows[:PIVOT_MAX_ROWS],
+        'truncated': truncated,
+    }
@@ -0,0 +1,360 @@
+"""
+Analytics services - calculations shared by the analytics API views
+"""
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Max, Min, Q
+from django.db.models.functions import TruncWeek
+from django.utils import timezone
+
+from apps.analytics.cache import invalidate_tags, table_tag
+from apps.analytics.models import ProjectForecast
+from apps.projects.models import Project
+from apps.tasks.models import Task, TaskStatusTransition
+
+
+PERCENTILES = (50, 85, 95)
+
+WIP_STATUSES = ('in_progress', 'review')
+
+# Group-by options for flow metrics, as lookups from a transition row
+FLOW_GROUP_FIELDS = {
+    'project': 'project_id',
+    'priority': 'task__priority',
+    'member': 'task__taskassignment__team_member_id',
+}
+
+# Same groupings, as lookups from a task row (used for aging WIP)
+TASK_GROUP_FIELDS = {
+    'project': 'project_id',
+    'priority': 'priority',
+    'member': 'taskassignment__team_member_id',
+}
+
+SECONDS_PER_DAY = 86400.0
+
+
+def summarize(values):
+    """
+    Percentile summary of a 1-d array of day durations
+    """
+    if values.size == 0:
+        return {'count': 0, **{f'p{p}': None for p in PERCENTILES}, 'mean': None}
+
+    results = np.percentile(values, PERCENTILES)
+    summary = {'count': int(values.size)}
+    for p, value in zip(PERCENTILES, results):
+        summary[f'p{p}'] = round(float(value), 2)
+    summary['mean'] = round(float(values.mean()), 2)
+    return summary
+
+
+def _split_by_key(keys, values):
+    """
+    Split values into per-key arrays with one sort instead of a Python loop per row
+    """
+    if not keys:
+        return {}
+    keys = np.asarray(keys)
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    unique_keys, starts = np.unique(sorted_keys, return_index=True)
+    chunks = np.split(values[order], starts[1:])
+    return dict(zip(unique_keys.tolist(), chunks))
+
+
+def _seconds(datetimes):
+    """
+    Convert a list of aware datetimes into float epoch seconds
+    """
+    return np.fromiter((dt.timestamp() for dt in datetimes), dtype=np.float64, count=len(datetimes))
+
+
+def flow_metrics(group_by='project', project_id=None, since=None, until=None, project_ids=None):
+    """
+    Cycle time, lead time, weekly throughput and aging WIP percentiles,
+    grouped by project, member or priority.
+
+    Per-task start/finish times are reduced in the database with one GROUP BY
+    over the transition log; only the reduced rows are fetched and the
+    percentiles are computed with NumPy. project_ids (ids or a subquery)
+    restricts the metrics to those projects.
+    """
+    now = timezone.now()
+    until = until or now
+    since = since or (until - timedelta(days=90))
+    group_field = FLOW_GROUP_FIELDS[group_by]
+
+    transitions = TaskStatusTransition.objects.all()
+    if project_id:
+        transitions = transitions.filter(project_id=project_id)
+    if project_ids is not None:
+        transitions = transitions.filter(project_id__in=project_ids)
+
+    # Only tasks completed inside the window are grouped, so the transition
+    # history of everything else is never aggregated
+    done_in_window = transitions.filter(
+        to_status='done', transitioned_at__gte=since, transitioned_at__lte=until
+    ).values('task_id')
+
+    # One row per (group, task) with its first start and last completion;
+    # a task completed again after the window is still dropped by the HAVING
+    completed = (
+        transitions
+        .filter(task_id__in=done_in_window)
+        .values(group_field, 'task_id')
+        .annotate(
+            started=Min('transitioned_at', filter=Q(to_status='in_progress')),
+            finished=Max('transitioned_at', filter=Q(to_status='done')),
+            created=Min('task__created_at'),
+        )
+        .filter(finished__gte=since, finished__lte=until)
+        .values_list(group_field, 'started', 'finished', 'created')
+    )
+
+    keys, started, finished, created = [], [], [], []
+    cycle_keys, cycle_started, cycle_finished = [], [], []
+    for key, start, finish, create in completed.iterator(chunk_size=5000):
+        key = str(key)
+        keys.append(key)
+        finished.append(finish)
+        created.append(create)
+        if start is not None and start <= finish:
+            cycle_keys.append(key)
+            cycle_started.append(start)
+            cycle_finished.append(finish)
+
+    lead_times = (_seconds(finished) - _seconds(created)) / SECONDS_PER_DAY
+    cycle_times = (_seconds(cycle_finished) - _seconds(cycle_started)) / SECONDS_PER_DAY
+    lead_by_key = _split_by_key(keys, lead_times)
+    cycle_by_key = _split_by_key(cycle_keys, cycle_times)
+
+    # Weekly completions, counted in the database
+    weekly = (
+        transitions
+        .filter(to_status='done', transitioned_at__gte=since, transitioned_at__lte=until)
+        .annotate(week=TruncWeek('transitioned_at'))
+        .values(group_field, 'week')
+        .annotate(completed=Count('task_id', distinct=True))
+        .values_list(group_field, 'completed')
+    )
+    throughput_keys, throughput_counts = [], []
+    for key, count in weekly.iterator(chunk_size=5000):
+        throughput_keys.append(str(key))
+        throughput_counts.append(count)
+    throughput_by_key = _split_by_key(throughput_keys, np.asarray(throughput_counts, dtype=np.float64))
+    total_weeks = max(1, int(np.ceil((until - since).total_seconds() / (7 * SECONDS_PER_DAY))))
+
+    # Age of work that is still in progress
+    wip_tasks = Task.objects.filter(status__in=WIP_STATUSES)
+    if project_id:
+        wip_tasks = wip_tasks.filter(project_id=project_id)
+    if project_ids is not None:
+        wip_tasks = wip_tasks.filter(project_id__in=project_ids)
+    task_group_field = TASK_GROUP_FIELDS[group_by]
+    wip = (
+        wip_tasks
+        .values(task_group_field, 'id')
+        .annotate(
+            started=Min(
+                'status_transitions__transitioned_at',
+                filter=Q(status_transitions__to_status='in_progress')
+            )
+        )
+        .values_list(task_group_field, 'started', 'updated_at')
+    )
+    wip_keys, wip_started = [], []
+    for key, start, updated in wip.iterator(chunk_size=5000):
+        wip_keys.append(str(key))
+        wip_started.append(start or updated)
+    wip_ages = (now.timestamp() - _seconds(wip_started)) / SECONDS_PER_DAY
+    wip_by_key = _split_by_key(wip_keys, wip_ages)
+
+    empty = np.empty(0)
+    groups = []
+    for key in sorted(set(lead_by_key) | set(throughput_by_key) | set(wip_by_key)):
+        # Weeks without completions are not returned by the GROUP BY; count them as zero
+        counts = throughput_by_key.get(key, empty)
+        counts = np.concatenate([counts, np.zeros(max(0, total_weeks - counts.size))])
+        groups.append({
+            'key': None if key == 'None' else key,
+            'cycle_time_days': summarize(cycle_by_key.get(key, empty)),
+            'lead_time_days': summarize(lead_by_key.get(key, empty)),
+            'weekly_throughput': summarize(counts),
+            'aging_wip_days': summarize(wip_by_key.get(key, empty)),
+        })
+
+    return {
+        'group_by': group_by,
+        'since': since,
+        'until': until,
+        'percentiles': list(PERCENTILES),
+        'groups': groups,
+    }
+
+
+# z-score for the forecast band (10th-90th percentile)
+FORECAST_BAND_Z = 1.2816
+
+# Projections further out than this are reported as "no forecast"
+FORECAST_MAX_WEEKS = 520
+
+
+def _weeks_to_dates(today, weeks):
+    """
+    Turn an array of remaining weeks into dates; NaN/inf and absurd horizons become None
+    """
+    dates = []
+    for value in weeks:
+        if np.isfinite(value) and value <= FORECAST_MAX_WEEKS:
+            dates.append(today + timedelta(days=int(np.ceil(value * 7))))
+        else:
+            dates.append(None)
+    return dates
+
+
+def fit_project_forecasts(history_weeks=None):
+    """
+    Fit throughput and progress rates for every active project at once and
+    store a ProjectForecast per project.
+
+    Weekly completions for all projects are loaded into one (projects x weeks)
+    matrix so the rates, bands and regressions are computed column-wise with
+    NumPy rather than per project. A project is observed from the week of its
+    first task or transition, capped at history_weeks, so the weeks before it
+    existed do not dilute its rates.
+    """
+    history_weeks = history_weeks or settings.FORECAST_HISTORY_WEEKS
+    now = timezone.now()
+    today = now.date()
+    # Columns are the TruncWeek buckets: the window starts on the Monday
+    # history_weeks - 1 weeks before this week's, in the current time zone
+    local = timezone.localtime(now)
+    first_monday = local.date() - timedelta(days=local.weekday(), weeks=history_weeks - 1)
+    window_start = timezone.make_aware(datetime.combine(first_monday, time.min))
+
+    def column_of(moment):
+        return (timezone.localtime(moment).date() - first_monday).days // 7
+
+    project_ids = list(Project.objects.filter(status='active').values_list('id', flat=True))
+    if not project_ids:
+        return 0
+    row_of = {project_id: row for row, project_id in enumerate(project_ids)}
+    n_projects = len(project_ids)
+
+    # Task totals per project, and the week column of its first activity
+    totals = np.zeros(n_projects)
+    remaining = np.zeros(n_projects)
+    first_seen = {}
+    task_counts = (
+        Task.objects.filter(project_id__in=project_ids)
+        .values('project_id')
+        .annotate(total=Count('id'), open=Count('id', filter=~Q(status='done')), first=Min('created_at'))
+        .values_list('project_id', 'total', 'open', 'first')
+    )
+    for project_id, total, open_count, first in task_counts:
+        totals[row_of[project_id]] = total
+        remaining[row_of[project_id]] = open_count
+        first_seen[project_id] = first
+    first_transitions = (
+        TaskStatusTransition.objects.filter(project_id__in=project_ids)
+        .values('project_id')
+        .annotate(first=Min('transitioned_at'))
+        .values_list('project_id', 'first')
+    )
+    for project_id, first in first_transitions:
+        if project_id not in first_seen or first < first_seen[project_id]:
+            first_seen[project_id] = first
+    first_column = np.zeros(n_projects, dtype=int)
+    for project_id, first in first_seen.items():
+        first_column[row_of[project_id]] = min(history_weeks - 1, max(0, column_of(first)))
+    observed = history_weeks - first_column
+    x = np.arange(history_weeks, dtype=float)
+    in_window = x[None, :] >= first_column[:, None]
+
+    # Weekly completions matrix
+    weekly = np.zeros((n_projects, history_weeks))
+    completions = (
+        TaskStatusTransition.objects
+        .filter(project_id__in=project_ids, to_status='done', transitioned_at__gte=window_start)
+        .annotate(week=TruncWeek('transitioned_at'))
+        .values('project_id', 'week')
+        .annotate(completed=Count('task_id', distinct=True))
+        .values_list('project_id', 'week', 'completed')
+    )
+    rows, cols, counts = [], [], []
+    for project_id, week, completed in completions:
+        column = column_of(week)
+        rows.append(row_of[project_id])
+        cols.append(column)
+        counts.append(completed)
+    if rows:
+        np.add.at(weekly, (np.array(rows), np.array(cols)), np.array(counts, dtype=float))
+
+    # Throughput rate and a band on the mean rate, over each project's observed weeks
+    mean = weekly.sum(axis=1) / observed
+    squares = np.where(in_window, (weekly - mean[:, None]) ** 2, 0.0).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        std = np.where(observed > 1, np.sqrt(squares / (observed - 1)), 0.0)
+    margin = FORECAST_BAND_Z * std / np.sqrt(observed)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weeks_expected = np.where(mean > 0, remaining / mean, np.inf)
+        weeks_optimistic = np.where(mean > 0, remaining / (mean + margin), np.inf)
+        slow_rate = mean - margin
+        weeks_pessimistic = np.where(slow_rate > 0, remaining / slow_rate, np.inf)
+
+    # Progress rate: least-squares slope of the completed share over each
+    # project's observed weeks, fitted for all projects at once
+    completed_now = totals - remaining
+    cumulative = completed_now[:, None] - weekly[:, ::-1].cumsum(axis=1)[:, ::-1] + weekly
+    with np.errstate(divide='ignore', invalid='ignore'):
+        share = np.where(totals[:, None] > 0, cumulative / totals[:, None], 0.0)
+    x_mean = np.where(in_window, x, 0.0).sum(axis=1) / observed
+    share_mean = np.where(in_window, share, 0.0).sum(axis=1) / observed
+    x_centered = np.where(in_window, x - x_mean[:, None], 0.0)
+    spread = (x_centered ** 2).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.where(
+            spread > 0, (x_centered * (share - share_mean[:, None])).sum(axis=1) / spread, 0.0
+        )
+        share_left = np.where(totals > 0, remaining / totals, 0.0)
+        weeks_by_progress = np.where(slope > 0, share_left / slope, np.inf)
+
+    expected_dates = _weeks_to_dates(today, weeks_expected)
+    low_dates = _weeks_to_dates(today, weeks_optimistic)
+    high_dates = _weeks_to_dates(today, weeks_pessimistic)
+    progress_dates = _weeks_to_dates(today, weeks_by_progress)
+
+    forecasts = [
+        ProjectForecast(
+            project_id=project_id,
+            total_tasks=int(totals[row]),
+            remaining_tasks=int(remaining[row]),
+            weeks_observed=int(observed[row]),
+            throughput_per_week=round(float(mean[row]), 4),
+            throughput_std=round(float(std[row]), 4),
+            progress_rate_per_week=round(float(slope[row]), 6),
+            forecast_completion=today if remaining[row] == 0 else expected_dates[row],
+            forecast_completion_low=today if remaining[row] == 0 else low_dates[row],
+            forecast_completion_high=today if remaining[row] == 0 else high_dates[row],
+            progress_forecast_completion=today if remaining[row] == 0 else progress_dates[row],
+            fitted_at=now,
+        )
+        for row, project_id in enumerate(project_ids)
+    ]
+    ProjectForecast.objects.bulk_create(
+        forecasts,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['project'],
+        update_fields=[
+            'total_tasks', 'remaining_tasks', 'weeks_observed', 'throughput_per_week',
+            'throughput_std', 'progress_rate_per_week', 'forecast_completion',
+            'forecast_completion_low', 'forecast_completion_high',
+            'progress_forecast_completion', 'fitted_at',
+        ],
+    )
+    invalidate_tags(table_tag('project_forecasts'))
+    return len(forecasts)
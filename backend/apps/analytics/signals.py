@@ -0,0 +1,69 @@
+"""
+Signal handlers that invalidate cached analytics results on writes
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from apps.analytics.cache import invalidate_tags, table_tag, project_tag, member_tag, client_tag
+from apps.clients.models import Client
+from apps.projects.models import Project
+from apps.resources.models import TeamMember
+from apps.tasks.models import Task, TaskAssignment
+from apps.tasks.signals import tasks_bulk_updated
+
+
+@receiver([post_save, post_delete], sender=Project)
+def project_changed(sender, instance, **kwargs):
+    invalidate_tags(table_tag('projects'), project_tag(instance.pk), client_tag(instance.client_id))
+
+
+@receiver(m2m_changed, sender=Project.team_members.through)
+def project_team_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # instance is a TeamMember; pk_set holds project ids
+        project_ids = pk_set or instance.projects.values_list('id', flat=True)
+        invalidate_tags(member_tag(instance.pk), *[project_tag(pk) for pk in project_ids])
+    else:
+        invalidate_tags(project_tag(instance.pk), *[member_tag(pk) for pk in pk_set or ()])
+
+
+@receiver([post_save, post_delete], sender=Task)
+def task_changed(sender, instance, **kwargs):
+    invalidate_tags(table_tag('tasks'), project_tag(instance.project_id))
+
+
+@receiver(tasks_bulk_updated)
+def tasks_bulk_changed(sender, project_ids=(), **kwargs):
+    invalidate_tags(table_tag('tasks'), *[project_tag(pk) for pk in project_ids])
+
+
+@receiver([post_save, post_delete], sender=TaskAssignment)
+def assignment_changed(sender, instance, **kwargs):
+    project_id = Task.objects.filter(pk=instance.task_id).values_list('project_id', flat=True).first()
+    invalidate_tags(
+        table_tag('task_assignments'),
+        member_tag(instance.team_member_id),
+        project_tag(project_id) if project_id else None
+    )
+
+
+@receiver([post_save, post_delete], sender=TeamMember)
+def team_member_changed(sender, instance, **kwargs):
+    invalidate_tags(table_tag('team_members'), member_tag(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=Client)
+def client_changed(sender, instance, **kwargs):
+    invalidate_tags(table_tag('clients'), client_tag(instance.pk))
+
+
+@receiver(post_save, sender=get_user_model())
+def user_changed(sender, instance, created, update_fields=None, **kwargs):
+    # Members are shown by their user's name; a login stamp changes nothing shown
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    member_ids = TeamMember.objects.filter(user_id=instance.pk).values_list('id', flat=True)
+    invalidate_tags(table_tag('users'), *[member_tag(pk) for pk in member_ids])
@@ -0,0 +1,69 @@
+"""
+Background jobs for analytics
+"""
+import os
+
+from celery import shared_task
+from django.core.files import File
+from django.utils import timezone
+
+from apps.analytics.exports import build_export_file
+from apps.analytics.models import ReportExport
+from apps.analytics.services import fit_project_forecasts
+from apps.projects.access import get_access
+
+
+@shared_task
+def build_report_export(export_id):
+    """
+    Build an export file chunk by chunk and attach it to the ReportExport
+    """
+    export = ReportExport.objects.get(id=export_id)
+    if export.status == 'completed':
+        return
+
+    export.status = 'running'
+    export.save(update_fields=['status'])
+
+    def progress(rows):
+        ReportExport.objects.filter(id=export_id).update(row_count=rows)
+
+    # Only the projects the requester can see at build time
+    filters = export.filters
+    if export.created_by is not None:
+        access = get_access(export.created_by)
+        if not access.unrestricted:
+            filters = {**filters, 'projects': access.project_filter()}
+    else:
+        filters = {**filters, 'projects': []}
+
+    try:
+        path, total = build_export_file(
+            export.dataset, export.file_format, filters, progress=progress
+        )
+    except Exception as exc:
+        export.status = 'failed'
+        export.error = str(exc)
+        export.completed_at = timezone.now()
+        export.save(update_fields=['status', 'error', 'completed_at'])
+        raise
+
+    try:
+        with open(path, 'rb') as handle:
+            filename = f"{export.dataset}-{export.created_at:%Y%m%d%H%M%S}.{export.file_format}"
+            export.file.save(filename, File(handle), save=False)
+    finally:
+        os.remove(path)
+
+    export.status = 'completed'
+    export.row_count = total
+    export.completed_at = timezone.now()
+    export.save(update_fields=['status', 'row_count', 'file', 'completed_at'])
+
+
+@shared_task
+def refit_project_forecasts():
+    """
+    Nightly refit of completion forecasts for all active projects
+    """
+    return fit_project_forecasts()
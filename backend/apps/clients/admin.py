@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Client
+from .models import Client, ClientPortfolioRollup
 
 
 @admin.register(Client)
@@ -24,3 +24,12 @@ class ClientAdmin(admin.ModelAdmin):
             'fields': ('created_at', 'updated_at')
         }),
     )
+
+
+@admin.register(ClientPortfolioRollup)
+class ClientPortfolioRollupAdmin(admin.ModelAdmin):
+    list_display = ('client', 'active_projects', 'total_projects', 'total_budget', 'actual_cost', 'overdue_tasks', 'refreshed_at')
+    search_fields = ('client__name', 'client__company')
+    readonly_fields = ('client', 'active_projects', 'total_projects', 'total_budget', 'actual_cost', 'overdue_tasks', 'refreshed_at')
+    list_select_related = ('client',)
+    ordering = ('-total_budget',)
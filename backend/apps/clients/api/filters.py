@@ -0,0 +1,24 @@
+"""
+Filters for Client listings
+"""
+from django_filters import rest_framework as filters
+
+from apps.clients.models import Client
+
+
+class ClientFilter(filters.FilterSet):
+    """
+    Client filters, including ranges over the portfolio rollup
+    """
+    min_active_projects = filters.NumberFilter(field_name='portfolio__active_projects', lookup_expr='gte')
+    max_active_projects = filters.NumberFilter(field_name='portfolio__active_projects', lookup_expr='lte')
+    min_total_budget = filters.NumberFilter(field_name='portfolio__total_budget', lookup_expr='gte')
+    max_total_budget = filters.NumberFilter(field_name='portfolio__total_budget', lookup_expr='lte')
+    min_actual_cost = filters.NumberFilter(field_name='portfolio__actual_cost', lookup_expr='gte')
+    max_actual_cost = filters.NumberFilter(field_name='portfolio__actual_cost', lookup_expr='lte')
+    min_overdue_tasks = filters.NumberFilter(field_name='portfolio__overdue_tasks', lookup_expr='gte')
+    max_overdue_tasks = filters.NumberFilter(field_name='portfolio__overdue_tasks', lookup_expr='lte')
+
+    class Meta:
+        model = Client
+        fields = ('is_active',)
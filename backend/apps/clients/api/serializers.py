@@ -9,8 +9,14 @@ class ClientSerializer(serializers.ModelSerializer):
     """
     Serializer for Client model
     """
-    active_projects_count = serializers.ReadOnlyField()
-    total_projects_value = serializers.ReadOnlyField()
+    active_projects_count = serializers.IntegerField(source='portfolio_active_projects', read_only=True)
+    total_projects_value = serializers.DecimalField(
+        source='portfolio_total_budget', max_digits=14, decimal_places=2, coerce_to_string=False, read_only=True
+    )
+    total_actual_cost = serializers.DecimalField(
+        source='portfolio_actual_cost', max_digits=14, decimal_places=2, coerce_to_string=False, read_only=True
+    )
+    overdue_tasks_count = serializers.IntegerField(source='portfolio_overdue_tasks', read_only=True)
 
     class Meta:
         model = Client
@@ -18,6 +24,7 @@ class ClientSerializer(serializers.ModelSerializer):
             'id', 'name', 'email', 'phone', 'company', 'address', 'website',
             'contact_person', 'contact_position', 'notes', 'is_active',
             'active_projects_count', 'total_projects_value',
+            'total_actual_cost', 'overdue_tasks_count',
             'created_at', 'updated_at'
         )
         read_only_fields = ('id', 'created_at', 'updated_at')
@@ -39,11 +46,16 @@ class ClientListSerializer(serializers.ModelSerializer):
     """
     Simplified serializer for client lists
     """
-    active_projects_count = serializers.ReadOnlyField()
+    active_projects_count = serializers.IntegerField(source='portfolio_active_projects', read_only=True)
+    total_projects_value = serializers.DecimalField(
+        source='portfolio_total_budget', max_digits=14, decimal_places=2, coerce_to_string=False, read_only=True
+    )
+    overdue_tasks_count = serializers.IntegerField(source='portfolio_overdue_tasks', read_only=True)
 
     class Meta:
         model = Client
         fields = (
             'id', 'name', 'email', 'company', 'contact_person',
-            'is_active', 'active_projects_count', 'created_at'
+            'is_active', 'active_projects_count', 'total_projects_value',
+            'overdue_tasks_count', 'created_at'
         )
@@ -4,7 +4,9 @@ API views for Client management
 from rest_framework import viewsets, filters
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
+from apps.search.filters import FullTextSearchFilter
 from apps.clients.models import Client
+from .filters import ClientFilter
 from .serializers import ClientSerializer, ClientCreateSerializer, ClientListSerializer
 
 
@@ -14,12 +16,22 @@ class ClientViewSet(viewsets.ModelViewSet):
     """
     queryset = Client.objects.all()
     permission_classes = (IsAuthenticated,)
-    filter_backends = (DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter)
-    filterset_fields = ('is_active',)
+    # The search filter runs last so it can order matches by rank
+    filter_backends = (DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter)
+    filterset_class = ClientFilter
     search_fields = ('name', 'email', 'company', 'contact_person')
-    ordering_fields = ('name', 'created_at', 'company')
+    search_entity_type = 'client'
+    ordering_fields = (
+        'name', 'created_at', 'company',
+        'portfolio_active_projects', 'portfolio_total_budget',
+        'portfolio_actual_cost', 'portfolio_overdue_tasks'
+    )
     ordering = ('-created_at',)
 
+    def get_queryset(self):
+        # Portfolio totals come from the maintained rollup in the same query
+        return Client.objects.with_portfolio()
+
     def get_serializer_class(self):
         if self.action == 'create' or self.action == 'update':
             return ClientCreateSerializer
@@ -0,0 +1,74 @@
+# Generated by Django 5.0.1 on 2026-10-19 00:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+
+def backfill_rollups(apps, schema_editor):
+    Client = apps.get_model('clients', 'Client')
+    Project = apps.get_model('projects', 'Project')
+    Task = apps.get_model('tasks', 'Task')
+    ClientPortfolioRollup = apps.get_model('clients', 'ClientPortfolioRollup')
+
+    projects = {
+        row['client_id']: row
+        for row in Project.objects.filter(client__isnull=False).order_by().values('client_id').annotate(
+            active=Count('id', filter=Q(status='active')),
+            total=Count('id'),
+            budget=Sum('budget'),
+            cost=Sum('actual_cost'),
+        )
+    }
+    overdue = dict(
+        Task.objects.filter(
+            project__client__isnull=False,
+            end_date__lt=timezone.localdate()
+        ).exclude(status='done').order_by().values('project__client_id').annotate(
+            overdue=Count('id')
+        ).values_list('project__client_id', 'overdue')
+    )
+    ClientPortfolioRollup.objects.bulk_create(
+        [
+            ClientPortfolioRollup(
+                client_id=client_id,
+                active_projects=projects.get(client_id, {}).get('active', 0),
+                total_projects=projects.get(client_id, {}).get('total', 0),
+                total_budget=projects.get(client_id, {}).get('budget') or 0,
+                actual_cost=projects.get(client_id, {}).get('cost') or 0,
+                overdue_tasks=overdue.get(client_id, 0),
+            )
+            for client_id in Client.objects.values_list('id', flat=True).iterator()
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0001_initial'),
+        ('projects', '0001_initial'),
+        ('tasks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientPortfolioRollup',
+            fields=[
+                ('client', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='portfolio', serialize=False, to='clients.client')),
+                ('active_projects', models.IntegerField(default=0)),
+                ('total_projects', models.IntegerField(default=0)),
+                ('total_budget', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('actual_cost', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('overdue_tasks', models.IntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'client_portfolio_rollups',
+                'indexes': [models.Index(fields=['active_projects'], name='client_port_active__35a557_idx'), models.Index(fields=['total_budget'], name='client_port_total_b_8822e4_idx'), models.Index(fields=['overdue_tasks'], name='client_port_overdue_f6b156_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -3,6 +3,24 @@ Client management models
 """
 import uuid
 from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+
+
+class ClientQuerySet(models.QuerySet):
+    """
+    QuerySet helpers for clients
+    """
+    def with_portfolio(self):
+        """
+        Annotate the portfolio totals from the maintained rollup, in the same query
+        """
+        return self.annotate(
+            portfolio_active_projects=Coalesce(F('portfolio__active_projects'), Value(0)),
+            portfolio_total_budget=Coalesce(F('portfolio__total_budget'), Value(0), output_field=models.DecimalField()),
+            portfolio_actual_cost=Coalesce(F('portfolio__actual_cost'), Value(0), output_field=models.DecimalField()),
+            portfolio_overdue_tasks=Coalesce(F('portfolio__overdue_tasks'), Value(0)),
+        )
 
 
 class Client(models.Model):
@@ -28,6 +46,8 @@ class Client(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ClientQuerySet.as_manager()
+
     class Meta:
         db_table = 'clients'
         ordering = ['-created_at']
@@ -48,3 +68,36 @@ class Client(models.Model):
         return self.projects.aggregate(
             total=models.Sum('budget')
         )['total'] or 0
+
+
+class ClientPortfolioRollup(models.Model):
+    """
+    Per-client totals over the client's projects, maintained on project and
+    task writes (see apps.clients.rollups) so client lists can be sorted and
+    filtered by them without aggregating every project.
+    """
+    client = models.OneToOneField(
+        Client,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='portfolio'
+    )
+    active_projects = models.IntegerField(default=0)
+    total_projects = models.IntegerField(default=0)
+    total_budget = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    actual_cost = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # Open tasks past their end date
+    overdue_tasks = models.IntegerField(default=0)
+
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'client_portfolio_rollups'
+        indexes = [
+            models.Index(fields=['active_projects']),
+            models.Index(fields=['total_budget']),
+            models.Index(fields=['overdue_tasks']),
+        ]
+
+    def __str__(self):
+        return f"Portfolio of {self.client_id}"
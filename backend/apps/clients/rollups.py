@@ -0,0 +1,81 @@
+"""
+Client portfolio rollups.
+
+ClientPortfolioRollup rows hold per-client project totals so client lists
+can be annotated, sorted and filtered without aggregating projects and tasks
+for every row. They are refreshed for the affected clients after project and
+task writes (see apps.clients.signals), and in full nightly since overdue
+counts change with the date.
+"""
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from apps.clients.models import Client, ClientPortfolioRollup
+from apps.projects.models import Project
+from apps.tasks.models import Task
+
+
+REFRESH_BATCH_SIZE = 1000
+
+
+def _refresh_batch(client_ids, today):
+    projects = {
+        row['client_id']: row
+        for row in Project.objects.filter(client_id__in=client_ids).order_by().values('client_id').annotate(
+            active=Count('id', filter=Q(status='active')),
+            total=Count('id'),
+            budget=Sum('budget'),
+            cost=Sum('actual_cost'),
+        )
+    }
+    overdue = dict(
+        Task.objects.filter(
+            project__client_id__in=client_ids,
+            end_date__lt=today
+        ).exclude(status='done').order_by().values('project__client_id').annotate(
+            overdue=Count('id')
+        ).values_list('project__client_id', 'overdue')
+    )
+
+    rollups = []
+    for client_id in client_ids:
+        totals = projects.get(client_id, {})
+        rollups.append(ClientPortfolioRollup(
+            client_id=client_id,
+            active_projects=totals.get('active', 0),
+            total_projects=totals.get('total', 0),
+            total_budget=totals.get('budget') or 0,
+            actual_cost=totals.get('cost') or 0,
+            overdue_tasks=overdue.get(client_id, 0),
+            refreshed_at=timezone.now()
+        ))
+    ClientPortfolioRollup.objects.bulk_create(
+        rollups,
+        update_conflicts=True,
+        unique_fields=['client'],
+        update_fields=['active_projects', 'total_projects', 'total_budget', 'actual_cost', 'overdue_tasks', 'refreshed_at']
+    )
+    return len(rollups)
+
+
+def refresh_rollups(client_ids=None):
+    """
+    Recompute the rollups of the given clients, or of every client
+    """
+    if client_ids is None:
+        ids = Client.objects.order_by().values_list('id', flat=True).iterator(chunk_size=REFRESH_BATCH_SIZE)
+    else:
+        # Ids of deleted clients drop out here
+        ids = Client.objects.filter(id__in={pk for pk in client_ids if pk is not None}).values_list('id', flat=True)
+
+    today = timezone.localdate()
+    total = 0
+    batch = []
+    for client_id in ids:
+        batch.append(client_id)
+        if len(batch) >= REFRESH_BATCH_SIZE:
+            total += _refresh_batch(batch, today)
+            batch = []
+    if batch:
+        total += _refresh_batch(batch, today)
+    return total
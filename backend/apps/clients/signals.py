@@ -0,0 +1,134 @@
+"""
+Signal handlers that keep client portfolio rollups current.
+
+Rollups are refreshed after the transaction commits, and only when a write
+touched a field they are computed from. The clients and projects touched in
+one transaction are collected and refreshed together, so a cascaded delete of
+a project and its tasks refreshes once rather than once per task.
+"""
+from django.db import connection, transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from apps.clients.models import Client, ClientPortfolioRollup
+from apps.clients.rollups import refresh_rollups
+from apps.projects.models import Project
+from apps.tasks.models import Task
+from apps.tasks.signals import tasks_bulk_updated
+
+
+# Fields the rollups are computed from
+PROJECT_ROLLUP_FIELDS = {'client_id', 'status', 'budget', 'actual_cost'}
+TASK_ROLLUP_FIELDS = {'project_id', 'status', 'end_date'}
+
+
+def _previous(instance, fields, attname):
+    """
+    Whether a save changes any of fields, and the previous value of attname
+    """
+    if instance._state.adding or getattr(instance, '_activity_snapshot', None) is None:
+        return True, None
+    changes = instance.activity_changes()
+    if not fields & set(changes):
+        return False, None
+    return True, changes.get(attname, {}).get('old')
+
+
+class PendingRefresh:
+    """
+    Clients and projects whose rollups are refreshed when the transaction commits
+    """
+    def __init__(self):
+        self.client_ids = set()
+        self.project_ids = set()
+
+    def __call__(self):
+        client_ids = set(self.client_ids)
+        if self.project_ids:
+            client_ids.update(
+                Project.objects.filter(id__in=self.project_ids).values_list('client_id', flat=True).distinct()
+            )
+        refresh_rollups(list(client_ids))
+
+
+def _flush_refresh():
+    pending = getattr(connection, 'rollup_refresh', None)
+    connection.rollup_refresh = None
+    if pending is not None:
+        pending()
+
+
+def _pending_refresh(client_ids=(), project_ids=()):
+    """
+    Add ids to the connection's pending refresh and queue a flush of it. The
+    first flush to run refreshes every pending id, so a savepoint rollback that
+    drops one flush loses nothing.
+    """
+    # Ids left by a rolled back transaction go with the next one's refresh,
+    # which recomputes the same rollups
+    pending = getattr(connection, 'rollup_refresh', None)
+    if pending is None:
+        pending = connection.rollup_refresh = PendingRefresh()
+    pending.client_ids.update(client_ids)
+    pending.project_ids.update(project_ids)
+    transaction.on_commit(_flush_refresh)
+
+
+def _refresh_clients(client_ids):
+    _pending_refresh(client_ids=client_ids)
+
+
+def _refresh_projects(project_ids):
+    _pending_refresh(project_ids=project_ids)
+
+
+@receiver(pre_save, sender=Project)
+def project_pre_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    instance._rollup_dirty, instance._rollup_old_client = _previous(instance, PROJECT_ROLLUP_FIELDS, 'client_id')
+
+
+@receiver(post_save, sender=Project)
+def project_saved(sender, instance, raw=False, **kwargs):
+    if raw or not getattr(instance, '_rollup_dirty', True):
+        return
+    instance._rollup_dirty = False
+    _refresh_clients({instance.client_id, getattr(instance, '_rollup_old_client', None)})
+
+
+@receiver(post_delete, sender=Project)
+def project_deleted(sender, instance, **kwargs):
+    _refresh_clients({instance.client_id})
+
+
+@receiver(pre_save, sender=Task)
+def task_pre_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    instance._rollup_dirty, instance._rollup_old_project = _previous(instance, TASK_ROLLUP_FIELDS, 'project_id')
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, raw=False, **kwargs):
+    if raw or not getattr(instance, '_rollup_dirty', True):
+        return
+    instance._rollup_dirty = False
+    _refresh_projects({instance.project_id, getattr(instance, '_rollup_old_project', None)})
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, **kwargs):
+    _refresh_projects({instance.project_id})
+
+
+@receiver(tasks_bulk_updated)
+def tasks_bulk_changed(sender, project_ids=(), **kwargs):
+    if project_ids:
+        _refresh_projects(set(project_ids))
+
+
+@receiver(post_save, sender=Client)
+def client_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        ClientPortfolioRollup.objects.get_or_create(client=instance)
@@ -0,0 +1,14 @@
+"""
+Background jobs for clients
+"""
+from celery import shared_task
+
+from apps.clients.rollups import refresh_rollups
+
+
+@shared_task
+def refresh_client_rollups():
+    """
+    Recompute every client's portfolio rollup; overdue task counts move with the date
+    """
+    return refresh_rollups()
@@ -0,0 +1,58 @@
+from django.contrib import admin, messages
+from django.utils.html import format_html
+
+from .models import SlowQuery
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ('short_sql', 'count', 'p95_ms', 'max_ms', 'mean_ms', 'last_view', 'has_plan', 'last_seen')
+    list_filter = ('plan_analyzed', 'last_seen')
+    search_fields = ('sql', 'last_view')
+    ordering = ('-p95_ms',)
+    actions = ('recapture_plan',)
+    fieldsets = (
+        ('Statement', {
+            'fields': ('fingerprint', 'sql_display', 'sample_sql', 'sample_params')
+        }),
+        ('Timings', {
+            'fields': ('count', 'p95_ms', 'max_ms', 'mean_ms', 'total_ms', 'views', 'last_view', 'first_seen', 'last_seen')
+        }),
+        ('Plan', {
+            'fields': ('plan_display', 'plan_analyzed', 'plan_captured_at', 'plan_error')
+        }),
+    )
+    readonly_fields = (
+        'fingerprint', 'sql_display', 'sample_sql', 'sample_params', 'count', 'p95_ms', 'max_ms', 'mean_ms',
+        'total_ms', 'views', 'last_view', 'first_seen', 'last_seen', 'plan_display', 'plan_analyzed',
+        'plan_captured_at', 'plan_error',
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.display(description='SQL')
+    def short_sql(self, obj):
+        return obj.sql[:120]
+
+    @admin.display(description='SQL')
+    def sql_display(self, obj):
+        return format_html('<pre style="white-space: pre-wrap">{}</pre>', obj.sql)
+
+    @admin.display(description='Plan')
+    def plan_display(self, obj):
+        return format_html('<pre>{}</pre>', obj.plan) if obj.plan else '-'
+
+    @admin.display(description='Mean (ms)')
+    def mean_ms(self, obj):
+        return round(obj.mean_ms, 1)
+
+    @admin.display(boolean=True, description='Plan')
+    def has_plan(self, obj):
+        return bool(obj.plan)
+
+    @admin.action(description='Recapture EXPLAIN plan on the next slow run')
+    def recapture_plan(self, request, queryset):
+        # Only the next run's parameters can be explained; stored samples are redacted
+        updated = queryset.update(plan_captured_at=None)
+        self.message_user(request, f'Plans of {updated} queries will be captured on their next slow run.', messages.SUCCESS)
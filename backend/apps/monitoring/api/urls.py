@@ -0,0 +1,10 @@
+"""
+URL patterns for Monitoring API
+"""
+from django.urls import path
+from .views import ProfileListView, ProfileDownloadView
+
+urlpatterns = [
+    path('profiles/', ProfileListView.as_view(), name='profile-list'),
+    path('profiles/<str:name>/', ProfileDownloadView.as_view(), name='profile-download'),
+]
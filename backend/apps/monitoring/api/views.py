@@ -0,0 +1,49 @@
+"""
+API views for request profiles
+"""
+from django.conf import settings
+from django.http import FileResponse, Http404
+from django.urls import reverse
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.monitoring.profiling import PROFILE_HEADER, issue_token, list_profiles, profile_path
+
+
+class ProfileListView(APIView):
+    """
+    Stored request profiles (GET), and tokens that get requests profiled (POST)
+    """
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        profiles = list_profiles()
+        for profile in profiles:
+            profile['download_url'] = request.build_absolute_uri(
+                reverse('profile-download', kwargs={'name': profile['name']})
+            )
+        return Response({'results': profiles})
+
+    def post(self, request):
+        try:
+            max_age = int(request.data.get('max_age') or settings.PROFILE_TOKEN_MAX_AGE)
+        except (TypeError, ValueError):
+            return Response({"error": "max_age must be a number of seconds"}, status=400)
+        if max_age < 1:
+            return Response({"error": "max_age must be positive"}, status=400)
+        max_age = min(max_age, settings.PROFILE_TOKEN_MAX_AGE)
+        return Response({'header': PROFILE_HEADER, 'token': issue_token(max_age), 'expires_in': max_age}, status=201)
+
+
+class ProfileDownloadView(APIView):
+    """
+    Download a profile in folded-stack format
+    """
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, name):
+        path = profile_path(name)
+        if path is None:
+            raise Http404
+        return FileResponse(path.open('rb'), as_attachment=True, filename=path.name, content_type='text/plain')
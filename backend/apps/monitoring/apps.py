@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.monitoring'
+    verbose_name = 'Monitoring'
+
+    def ready(self):
+        from .metrics import install_query_wrapper, instrument_serializers, instrument_views
+        connection_created.connect(install_query_wrapper, dispatch_uid='monitoring-query-wrapper')
+        instrument_serializers()
+        instrument_views()
+        from . import signals  # noqa: F401
@@ -0,0 +1,260 @@
+"""
+Endpoint benchmarks over seeded datasets.
+
+Each scale is the dataset apps.projects.seeding creates with the scale's task
+count as both the number of tasks and the seed. Every scale therefore has its
+own users and projects, and several scales can live in one database. The
+scenarios run as the seeded user with the most projects, against that user's
+largest project, through the full middleware and JWT authentication stack.
+
+A scenario runs WARMUP times unmeasured and then REPEAT times, each run in a
+transaction that is rolled back, so writes leave the dataset as it was.
+Cached analytics are invalidated before every run, so the timings are those
+of a cache miss. A run records its latency and query count. One extra run
+under tracemalloc records peak Python memory; it is kept apart so tracing
+does not slow the timed runs.
+
+Results are compared with a committed baseline. Any query over the baseline
+count is a regression. So is a p95 latency or peak memory above the baseline
+by more than the tolerance and the floor; those two are only compared when
+the baseline was taken on the same database vendor.
+"""
+import json
+import platform
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Count
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.analytics.cache import invalidate_tags, project_tag, table_tag
+from apps.projects.models import Project
+from apps.projects.seeding import seed_prefix
+
+
+SCALES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+TASKS_PER_PROJECT = 200
+# Tasks whose status the bulk write scenario changes
+BULK_TASKS = 500
+
+REPEAT = 20
+WARMUP = 2
+LATENCY_TOLERANCE = 0.5
+LATENCY_FLOOR_MS = 5.0
+MEMORY_TOLERANCE = 0.25
+MEMORY_FLOOR_KIB = 1024
+
+CACHED_TABLES = ('projects', 'tasks', 'team_members', 'task_assignments', 'clients')
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+class Dataset:
+    """
+    The user, project and tasks of a seeded dataset that requests run against
+    """
+    def __init__(self, seed):
+        from apps.tasks.models import Task, TaskDependency
+
+        self.seed = seed
+        self.user = (
+            get_user_model().objects.filter(username__startswith=seed_prefix(seed))
+            .annotate(projects=Count('project_access')).order_by('-projects', 'username').first()
+        )
+        if self.user is None:
+            raise BenchmarkError(f'No dataset for seed {seed}; seed it with --seed-missing')
+        self.project_id = (
+            Project.objects.filter(access__user=self.user).annotate(task_count=Count('tasks'))
+            .order_by('-task_count', 'id').values_list('id', flat=True).first()
+        )
+
+        subtasks = list(
+            Task.objects.filter(project_id=self.project_id, parent_task__isnull=False)
+            .order_by('start_date', 'id').values_list('id', flat=True)
+        )
+        if not subtasks:
+            raise BenchmarkError(f'The dataset for seed {seed} has no project with subtasks to run against')
+        self.bulk_ids = [str(task_id) for task_id in subtasks[:BULK_TASKS]]
+
+        # A new link from the first subtask to one that nothing depends on cannot close a cycle
+        links = TaskDependency.objects.filter(predecessor__project_id=self.project_id)
+        sources = set(links.values_list('predecessor_id', flat=True))
+        linked = set(links.filter(predecessor_id=subtasks[0]).values_list('successor_id', flat=True))
+        successor = next((
+            task_id for task_id in reversed(subtasks)
+            if task_id != subtasks[0] and task_id not in sources and task_id not in linked
+        ), None)
+        self.dependency = successor and {
+            'predecessor': str(subtasks[0]),
+            'successor': str(successor),
+            'dependency_type': 'FS',
+            'lag': 2,
+        }
+
+    @staticmethod
+    def exists(seed):
+        return get_user_model().objects.filter(username__startswith=seed_prefix(seed)).exists()
+
+    def client(self):
+        client = APIClient(SERVER_NAME='localhost')
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        return client
+
+    def invalidate(self):
+        invalidate_tags(*[table_tag(table) for table in CACHED_TABLES], project_tag(self.project_id), defer=False)
+
+
+class QueryCounter:
+    """
+    Execute wrapper counting statements; unlike the debug cursor log it is not capped
+    """
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Scenario:
+    """
+    One request; path and data are functions of the dataset
+    """
+    def __init__(self, name, method, path, data=None, cached=False):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.data = data
+        self.cached = cached
+
+    def request(self, client, dataset):
+        method = getattr(client, self.method)
+        if self.data is None:
+            return method(self.path(dataset))
+        return method(self.path(dataset), self.data(dataset), format='json')
+
+
+SCENARIOS = (
+    Scenario('kanban', 'get', lambda d: f"{reverse('task-kanban')}?project={d.project_id}"),
+    Scenario('gantt', 'get', lambda d: f"{reverse('task-gantt')}?project={d.project_id}"),
+    Scenario(
+        'project_statistics', 'get', lambda d: reverse('project-statistics', args=[d.project_id]), cached=True
+    ),
+    Scenario('dashboard', 'get', lambda d: reverse('dashboard'), cached=True),
+    Scenario('portfolio_overview', 'get', lambda d: reverse('portfolio-overview'), cached=True),
+    Scenario('project_analytics', 'get', lambda d: reverse('project-analytics', args=[d.project_id]), cached=True),
+    Scenario(
+        'bulk_update_status', 'post', lambda d: reverse('task-bulk-update-status'),
+        data=lambda d: {'ids': d.bulk_ids, 'status': 'review'}
+    ),
+    Scenario(
+        'create_dependency', 'post', lambda d: reverse('task-dependency-list'),
+        data=lambda d: d.dependency
+    ),
+)
+SCENARIO_NAMES = tuple(scenario.name for scenario in SCENARIOS)
+
+
+def run_scenario(scenario, dataset, client, repeat=REPEAT, warmup=WARMUP):
+    """
+    Latency percentiles (ms), queries per run and peak memory (KiB) of a scenario
+    """
+    latencies, queries, peak = [], [], 0
+    for run in range(warmup + repeat + 1):
+        traced = run == warmup + repeat
+        if scenario.cached:
+            dataset.invalidate()
+        if traced:
+            tracemalloc.start()
+        counter = QueryCounter()
+        with transaction.atomic(), connection.execute_wrapper(counter):
+            started = perf_counter()
+            response = scenario.request(client, dataset)
+            elapsed = perf_counter() - started
+            transaction.set_rollback(True)
+        if traced:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        if response.status_code >= 400:
+            raise BenchmarkError(f'{scenario.name} returned {response.status_code}: {response.content[:200]!r}')
+        if warmup <= run < warmup + repeat:
+            latencies.append(elapsed * 1000)
+            queries.append(counter.count)
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        'p50_ms': round(float(p50), 2),
+        'p95_ms': round(float(p95), 2),
+        'p99_ms': round(float(p99), 2),
+        'queries': max(queries),
+        'peak_kib': round(peak / 1024),
+    }
+
+
+def run_scale(scale, names=SCENARIO_NAMES, repeat=REPEAT, warmup=WARMUP, progress=None):
+    dataset = Dataset(SCALES[scale])
+    client = dataset.client()
+    scenarios = {}
+    for scenario in SCENARIOS:
+        if scenario.name in names:
+            scenarios[scenario.name] = run_scenario(scenario, dataset, client, repeat, warmup)
+            if progress:
+                progress(scale, scenario.name, scenarios[scenario.name])
+    return {'database': connection.vendor, 'repeat': repeat, 'scenarios': scenarios}
+
+
+def environment():
+    return {
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+    }
+
+
+def compare(results, baseline, latency_tolerance=LATENCY_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE):
+    """
+    Regressions of results against a baseline, as messages
+    """
+    regressions = []
+    for scale, current in results['scales'].items():
+        previous = baseline.get('scales', {}).get(scale)
+        if previous is None:
+            continue
+        same_database = previous['database'] == current['database']
+        for name, measured in current['scenarios'].items():
+            expected = previous['scenarios'].get(name)
+            if expected is None:
+                continue
+            if measured['queries'] > expected['queries']:
+                regressions.append(f"{scale} {name}: {measured['queries']} queries, baseline {expected['queries']}")
+            if not same_database:
+                continue
+            if (measured['p95_ms'] > expected['p95_ms'] * (1 + latency_tolerance)
+                    and measured['p95_ms'] - expected['p95_ms'] > LATENCY_FLOOR_MS):
+                regressions.append(f"{scale} {name}: p95 {measured['p95_ms']} ms, baseline {expected['p95_ms']} ms")
+            if (measured['peak_kib'] > expected['peak_kib'] * (1 + memory_tolerance)
+                    and measured['peak_kib'] - expected['peak_kib'] > MEMORY_FLOOR_KIB):
+                regressions.append(f"{scale} {name}: peak {measured['peak_kib']} KiB, baseline {expected['peak_kib']} KiB")
+    return regressions
+
+
+def load(path):
+    path = Path(path)
+    if not path.exists():
+        return {'scales': {}}
+    return json.loads(path.read_text())
+
+
+def save(path, data):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2, sort_keys=True) + '\n')
@@ -0,0 +1,93 @@
+"""
+Benchmark API endpoints on seeded datasets and check for regressions
+"""
+import os
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.monitoring import benchmarks
+from apps.projects.seeding import generate, rebuild_derived
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure latency percentiles, query counts and peak memory of the main endpoints on seeded '
+        'datasets, and fail when they regress against the committed baseline'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', action='append', dest='scales', choices=list(benchmarks.SCALES), default=None,
+            help='Dataset scale to run (default: 1k); may be repeated'
+        )
+        parser.add_argument(
+            '--scenario', action='append', dest='scenarios', choices=benchmarks.SCENARIO_NAMES, default=None,
+            help='Only run this scenario; may be repeated'
+        )
+        parser.add_argument('--repeat', type=int, default=benchmarks.REPEAT, help='Measured runs per scenario')
+        parser.add_argument('--warmup', type=int, default=benchmarks.WARMUP, help='Unmeasured runs per scenario')
+        parser.add_argument('--seed-missing', action='store_true', help='Seed scales that have no dataset yet')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Workers for --seed-missing')
+        parser.add_argument('--baseline', default=settings.BENCHMARK_BASELINE)
+        parser.add_argument('--output', default=None, help='Results file (default: a new file under BENCHMARK_RESULTS_ROOT)')
+        parser.add_argument(
+            '--update-baseline', action='store_true', help='Write the measured scales into the baseline instead of comparing'
+        )
+        parser.add_argument('--latency-tolerance', type=float, default=benchmarks.LATENCY_TOLERANCE)
+        parser.add_argument('--memory-tolerance', type=float, default=benchmarks.MEMORY_TOLERANCE)
+
+    def handle(self, *args, **options):
+        scales = options['scales'] or ['1k']
+        names = options['scenarios'] or benchmarks.SCENARIO_NAMES
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be positive')
+
+        for scale in scales:
+            if benchmarks.Dataset.exists(benchmarks.SCALES[scale]):
+                continue
+            if not options['seed_missing']:
+                raise CommandError(f'No dataset for scale {scale}; run with --seed-missing')
+            tasks = benchmarks.SCALES[scale]
+            self.stdout.write(f'Seeding {scale} ({tasks} tasks)')
+            generate(seed=tasks, tasks=tasks, tasks_per_project=benchmarks.TASKS_PER_PROJECT, workers=options['workers'])
+            rebuild_derived(tasks)
+
+        def progress(scale, name, measured):
+            self.stdout.write(
+                f"{scale:>5} {name:<20} p50 {measured['p50_ms']:>9.2f} ms  p95 {measured['p95_ms']:>9.2f} ms  "
+                f"p99 {measured['p99_ms']:>9.2f} ms  {measured['queries']:>4} queries  {measured['peak_kib']:>7} KiB"
+            )
+
+        results = dict(benchmarks.environment(), scales={})
+        try:
+            for scale in scales:
+                results['scales'][scale] = benchmarks.run_scale(
+                    scale, names, options['repeat'], options['warmup'], progress=progress
+                )
+        except benchmarks.BenchmarkError as error:
+            raise CommandError(str(error))
+
+        output = options['output'] or Path(settings.BENCHMARK_RESULTS_ROOT) / f'{datetime.now():%Y%m%dT%H%M%S}.json'
+        benchmarks.save(output, results)
+        self.stdout.write(f'Results written to {output}')
+
+        baseline = benchmarks.load(options['baseline'])
+        if options['update_baseline']:
+            for scale, measured in results['scales'].items():
+                baseline['scales'][scale] = measured
+            benchmarks.save(options['baseline'], baseline)
+            self.stdout.write(self.style.SUCCESS(f'Baseline updated for {", ".join(scales)}'))
+            return
+
+        missing = [scale for scale in scales if scale not in baseline['scales']]
+        if missing:
+            self.stdout.write(self.style.WARNING(f'No baseline for {", ".join(missing)}; not compared'))
+        regressions = benchmarks.compare(
+            results, baseline, options['latency_tolerance'], options['memory_tolerance']
+        )
+        if regressions:
+            raise CommandError('Regressions against the baseline:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
@@ -0,0 +1,351 @@
+"""
+Per-endpoint request metrics.
+
+MetricsMiddleware times each request and files it under its resolved view and
+action (e.g. ``TaskViewSet.gantt``): a latency histogram, a histogram of
+database queries per request, and totals of database time, serialization time
+(serializer ``.data``, including any queries it triggers), rendering time and
+response bytes. Queries are counted by an execute wrapper that every database
+connection gets when it is opened; DRF authentication and serializers are
+timed by instrument_views() and instrument_serializers(). With
+SERVER_TIMING_ENABLED the same split is sent back in a Server-Timing header.
+The wrapper also hands statements slower than SLOW_QUERY_THRESHOLD_MS, in or
+out of requests, to apps.monitoring.slow_queries.
+
+Counters are plain attributes and preallocated bucket lists, updated in place;
+a request allocates nothing but the numbers themselves. Each process keeps its
+own counters and copies them into the shared cache every
+METRICS_PUBLISH_INTERVAL seconds, so the metrics endpoint can add up every
+worker. A worker that stops publishing drops out after METRICS_WORKER_TIMEOUT
+seconds.
+"""
+import os
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from time import monotonic, perf_counter
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.serializers import BaseSerializer
+from rest_framework.views import APIView
+
+from apps.monitoring import slow_queries
+
+
+WORKERS_KEY = 'monitoring:metrics:workers'
+WORKER_KEY = 'monitoring:metrics:worker:{}'
+
+# Upper bounds of the histogram buckets (the last bucket is +Inf)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+UNRESOLVED = 'unresolved'
+
+
+class EndpointStats:
+    """
+    Counters of one view and action
+    """
+    __slots__ = (
+        'requests', 'errors', 'duration_sum', 'duration_buckets', 'queries', 'query_buckets',
+        'db_seconds', 'serialize_seconds', 'render_seconds', 'response_bytes',
+    )
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.duration_sum = 0.0
+        self.duration_buckets = [0] * (len(DURATION_BUCKETS) + 1)
+        self.queries = 0
+        self.query_buckets = [0] * (len(QUERY_BUCKETS) + 1)
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.render_seconds = 0.0
+        self.response_bytes = 0
+
+    def observe(self, duration, queries, db_seconds, serialize_seconds, render_seconds, size, error):
+        self.requests += 1
+        self.errors += error
+        self.duration_sum += duration
+        self.duration_buckets[bisect_left(DURATION_BUCKETS, duration)] += 1
+        self.queries += queries
+        self.query_buckets[bisect_left(QUERY_BUCKETS, queries)] += 1
+        self.db_seconds += db_seconds
+        self.serialize_seconds += serialize_seconds
+        self.render_seconds += render_seconds
+        self.response_bytes += size
+
+    def values(self):
+        return [getattr(self, name) if 'buckets' not in name else list(getattr(self, name)) for name in self.__slots__]
+
+    @classmethod
+    def from_values(cls, values):
+        stats = cls()
+        for name, value in zip(cls.__slots__, values):
+            setattr(stats, name, value)
+        return stats
+
+    def add(self, other):
+        for name in self.__slots__:
+            if 'buckets' in name:
+                mine = getattr(self, name)
+                for index, count in enumerate(getattr(other, name)):
+                    mine[index] += count
+            else:
+                setattr(self, name, getattr(self, name) + getattr(other, name))
+
+
+class RequestState(threading.local):
+    """
+    Measurements of the request the current thread is serving
+    """
+    def __init__(self):
+        self.active = False
+        self.request = None
+        # Set while recording or explaining slow queries, which must not capture themselves
+        self.suppressed = False
+        self.auth_seconds = 0.0
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.serializing = False
+        self.render_seconds = 0.0
+        self.render_started = 0.0
+        # Bound once so registering the callback allocates nothing per request
+        self.on_rendered = self.rendered
+
+    def begin(self, request):
+        self.request = request
+        self.auth_seconds = 0.0
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.serializing = False
+        self.render_seconds = 0.0
+        self.active = True
+
+    def rendered(self, response):
+        self.render_seconds += perf_counter() - self.render_started
+
+    def server_timing(self, total):
+        """
+        Server-Timing header value (milliseconds). Database time overlaps the
+        phases that ran the queries.
+        """
+        return (
+            f'auth;dur={self.auth_seconds * 1000:.1f}, '
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.queries} queries", '
+            f'serialize;dur={self.serialize_seconds * 1000:.1f}, '
+            f'render;dur={self.render_seconds * 1000:.1f}, '
+            f'total;dur={total * 1000:.1f}'
+        )
+
+
+_state = RequestState()
+_endpoints = {}
+_names = {}
+_lock = threading.Lock()
+_next_publish = 0.0
+
+
+def endpoint_name(request):
+    """
+    View and action a request was routed to, e.g. ``TaskViewSet.gantt`` or ``DashboardView.get``
+    """
+    match = request.resolver_match
+    if match is None:
+        return UNRESOLVED
+    by_method = _names.get(match.func)
+    if by_method is None:
+        by_method = _names.setdefault(match.func, {})
+    name = by_method.get(request.method)
+    if name is None:
+        view_class = getattr(match.func, 'cls', None)
+        if view_class is None:
+            name = match.view_name or match.func.__name__
+        else:
+            method = request.method.lower()
+            action = (getattr(match.func, 'actions', None) or {}).get(method, method)
+            name = f'{view_class.__name__}.{action}'
+        by_method[request.method] = name
+    return name
+
+
+def endpoint_stats(name):
+    stats = _endpoints.get(name)
+    if stats is None:
+        with _lock:
+            stats = _endpoints.setdefault(name, EndpointStats())
+    return stats
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper counting the queries of the current request and
+    capturing slow ones
+    """
+    state = _state
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = perf_counter() - started
+        if state.active:
+            state.queries += 1
+            state.db_seconds += elapsed
+        threshold = settings.SLOW_QUERY_THRESHOLD_MS
+        if threshold and elapsed * 1000 >= threshold and not state.suppressed:
+            view = endpoint_name(state.request) if state.active else None
+            slow_queries.capture(sql, params, many, elapsed, view)
+
+
+@contextmanager
+def suppress_capture():
+    """
+    Do not capture slow queries run inside the block by this thread
+    """
+    state = _state
+    previous, state.suppressed = state.suppressed, True
+    try:
+        yield
+    finally:
+        state.suppressed = previous
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    # connection_created fires again after a reconnect; the wrapper list outlives it
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def instrument_serializers():
+    """
+    Time serializer ``.data`` (the outermost one when serializers nest)
+    """
+    to_data = BaseSerializer.data.fget
+
+    def data(self):
+        state = _state
+        if not state.active or state.serializing:
+            return to_data(self)
+        state.serializing = True
+        started = perf_counter()
+        try:
+            return to_data(self)
+        finally:
+            state.serializing = False
+            state.serialize_seconds += perf_counter() - started
+
+    BaseSerializer.data = property(data)
+
+
+def instrument_views():
+    """
+    Time DRF authentication
+    """
+    authenticate = APIView.perform_authentication
+
+    def perform_authentication(self, request):
+        started = perf_counter()
+        try:
+            authenticate(self, request)
+        finally:
+            _state.auth_seconds += perf_counter() - started
+
+    APIView.perform_authentication = perform_authentication
+
+
+def snapshot():
+    """
+    {endpoint: counter values} of this process
+    """
+    with _lock:
+        items = list(_endpoints.items())
+    return {name: stats.values() for name, stats in items}
+
+
+def publish():
+    """
+    Copy this process's counters into the shared cache
+    """
+    global _next_publish
+    _next_publish = monotonic() + settings.METRICS_PUBLISH_INTERVAL
+    pid = os.getpid()
+    cache.set(WORKER_KEY.format(pid), snapshot(), settings.METRICS_WORKER_TIMEOUT)
+    workers = cache.get(WORKERS_KEY) or set()
+    if pid not in workers:
+        # Unsynchronised, but every worker re-adds itself on its next publish
+        cache.set(WORKERS_KEY, workers | {pid}, None)
+
+
+def publish_due():
+    return monotonic() >= _next_publish
+
+
+def collect():
+    """
+    Counters of every live worker, added up per endpoint
+    """
+    publish()
+    workers = cache.get(WORKERS_KEY) or set()
+    snapshots = cache.get_many([WORKER_KEY.format(pid) for pid in workers])
+    live = {int(key.rsplit(':', 1)[1]) for key in snapshots}
+    if live != workers:
+        cache.set(WORKERS_KEY, live, None)
+
+    totals = {}
+    for endpoints in snapshots.values():
+        for name, values in endpoints.items():
+            stats = EndpointStats.from_values(values)
+            if name in totals:
+                totals[name].add(stats)
+            else:
+                totals[name] = stats
+    return totals
+
+
+def _label(value):
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _histogram(lines, metric, help_text, bounds, totals, attr, sum_attr):
+    lines.append(f'# HELP {metric} {help_text}')
+    lines.append(f'# TYPE {metric} histogram')
+    for name, stats in totals:
+        view = _label(name)
+        cumulative = 0
+        for bound, count in zip(bounds + ('+Inf',), getattr(stats, attr)):
+            cumulative += count
+            lines.append(f'{metric}_bucket{{view="{view}",le="{bound}"}} {cumulative}')
+        lines.append(f'{metric}_sum{{view="{view}"}} {getattr(stats, sum_attr)}')
+        lines.append(f'{metric}_count{{view="{view}"}} {stats.requests}')
+
+
+def _counter(lines, metric, help_text, totals, attr):
+    lines.append(f'# HELP {metric} {help_text}')
+    lines.append(f'# TYPE {metric} counter')
+    for name, stats in totals:
+        lines.append(f'{metric}{{view="{_label(name)}"}} {getattr(stats, attr)}')
+
+
+def render(totals):
+    """
+    Prometheus text exposition of the collected counters
+    """
+    totals = sorted(totals.items())
+    lines = []
+    _histogram(
+        lines, 'api_request_duration_seconds', 'Request latency by view and action.',
+        DURATION_BUCKETS, totals, 'duration_buckets', 'duration_sum'
+    )
+    _histogram(
+        lines, 'api_request_db_queries', 'Database queries per request by view and action.',
+        QUERY_BUCKETS, totals, 'query_buckets', 'queries'
+    )
+    _counter(lines, 'api_request_errors_total', 'Requests answered with a 5xx status.', totals, 'errors')
+    _counter(lines, 'api_request_db_seconds_total', 'Time spent executing database queries.', totals, 'db_seconds')
+    _counter(lines, 'api_request_serialization_seconds_total', 'Time spent in serializers.', totals, 'serialize_seconds')
+    _counter(lines, 'api_request_render_seconds_total', 'Time spent rendering responses.', totals, 'render_seconds')
+    _counter(lines, 'api_response_bytes_total', 'Response body bytes sent.', totals, 'response_bytes')
+    return '\n'.join(lines) + '\n'
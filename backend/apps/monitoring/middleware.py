@@ -0,0 +1,57 @@
+from time import perf_counter
+
+from django.conf import settings
+
+from apps.monitoring import slow_queries
+from apps.monitoring.metrics import _state, endpoint_name, endpoint_stats, publish, publish_due
+from apps.monitoring.profiling import save_profile, should_profile, start_profile
+
+
+class MetricsMiddleware:
+    """
+    Records latency, queries, serialization time and response size per view,
+    adds the Server-Timing header and profiles sampled requests
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = _state
+        profiler = start_profile() if should_profile(request) else None
+        state.begin(request)
+        started = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            state.active = False
+            state.request = None
+        duration = perf_counter() - started
+
+        endpoint = endpoint_name(request)
+        if profiler is not None:
+            name = save_profile(profiler.stop(), endpoint, duration)
+            response['X-Profile'] = name
+        if settings.SERVER_TIMING_ENABLED or profiler is not None:
+            response['Server-Timing'] = state.server_timing(duration)
+
+        if response.streaming:
+            size = 0
+        elif response.has_header('Content-Length'):
+            size = int(response['Content-Length'])
+        else:
+            size = len(response.content)
+        endpoint_stats(endpoint).observe(
+            duration, state.queries, state.db_seconds, state.serialize_seconds, state.render_seconds, size,
+            response.status_code >= 500
+        )
+        if publish_due():
+            publish()
+        if slow_queries.has_pending():
+            slow_queries.flush()
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after the view returns
+        _state.render_started = perf_counter()
+        response.add_post_render_callback(_state.on_rendered)
+        return response
@@ -0,0 +1,43 @@
+# Generated by Django 5.0.1 on 2026-10-19 00:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=32, unique=True)),
+                ('sql', models.TextField(help_text='Statement with literals and IN lists normalized')),
+                ('sample_sql', models.TextField(blank=True)),
+                ('sample_params', models.JSONField(blank=True, null=True)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total_ms', models.FloatField(default=0)),
+                ('max_ms', models.FloatField(default=0)),
+                ('p95_ms', models.FloatField(default=0)),
+                ('recent_ms', models.JSONField(blank=True, default=list)),
+                ('views', models.JSONField(blank=True, default=dict)),
+                ('last_view', models.CharField(blank=True, max_length=200)),
+                ('plan', models.TextField(blank=True)),
+                ('plan_analyzed', models.BooleanField(default=False)),
+                ('plan_captured_at', models.DateTimeField(blank=True, null=True)),
+                ('plan_error', models.TextField(blank=True)),
+                ('first_seen', models.DateTimeField(auto_now_add=True)),
+                ('last_seen', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name_plural': 'slow queries',
+                'db_table': 'slow_queries',
+                'ordering': ['-p95_ms'],
+                'indexes': [models.Index(fields=['-p95_ms'], name='slow_querie_p95_ms_3c490a_idx'), models.Index(fields=['-count'], name='slow_querie_count_e08e40_idx'), models.Index(fields=['-last_seen'], name='slow_querie_last_se_e82ce0_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+"""
+Monitoring models - slow queries aggregated by fingerprint
+"""
+from django.db import models
+
+
+class SlowQuery(models.Model):
+    """
+    Every captured run of one normalized statement, with a sample and its plan
+    """
+    fingerprint = models.CharField(max_length=32, unique=True)
+    sql = models.TextField(help_text='Statement with literals and IN lists normalized')
+    sample_sql = models.TextField(blank=True)
+    sample_params = models.JSONField(null=True, blank=True)
+
+    count = models.PositiveIntegerField(default=0)
+    total_ms = models.FloatField(default=0)
+    max_ms = models.FloatField(default=0)
+    p95_ms = models.FloatField(default=0)
+    # Most recent durations, for the p95
+    recent_ms = models.JSONField(default=list, blank=True)
+    # {view: runs} of the views (or 'background') that issued it
+    views = models.JSONField(default=dict, blank=True)
+    last_view = models.CharField(max_length=200, blank=True)
+
+    plan = models.TextField(blank=True)
+    plan_analyzed = models.BooleanField(default=False)
+    plan_captured_at = models.DateTimeField(null=True, blank=True)
+    plan_error = models.TextField(blank=True)
+
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField()
+
+    class Meta:
+        db_table = 'slow_queries'
+        verbose_name_plural = 'slow queries'
+        ordering = ['-p95_ms']
+        indexes = [
+            models.Index(fields=['-p95_ms']),
+            models.Index(fields=['-count']),
+            models.Index(fields=['-last_seen']),
+        ]
+
+    def __str__(self):
+        return self.sql[:80]
+
+    @property
+    def mean_ms(self):
+        return self.total_ms / self.count if self.count else 0
@@ -0,0 +1,156 @@
+"""
+Sampled request profiling.
+
+A request is profiled when it carries a valid PROFILE_HEADER token (see
+issue_token()) or is picked at random at PROFILE_SAMPLE_RATE. A background
+thread then samples the serving thread's stack every PROFILE_INTERVAL seconds
+and the counts are written to PROFILE_ROOT in the folded format read by
+flamegraph.pl, speedscope and most other flame graph tools (one
+``frame;frame;frame count`` line per distinct stack). Only the newest
+PROFILE_KEEP profiles are kept.
+
+Samples are taken when the sampler thread holds the GIL, so time spent in
+pure-Python loops that rarely release it is somewhat under-sampled.
+"""
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+
+
+PROFILE_HEADER = 'X-Profile-Token'
+TOKEN_SALT = 'apps.monitoring.profile'
+SUFFIX = '.folded'
+STAMP_FORMAT = '%Y%m%dT%H%M%S'
+
+
+class StackSampler:
+    """
+    Counts the stacks a thread is seen in until stopped
+    """
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[_stack(frame)] += 1
+
+
+def _frame_label(code):
+    filename = code.co_filename
+    for marker in ('site-packages/', str(settings.BASE_DIR) + '/'):
+        if marker in filename:
+            filename = filename.split(marker, 1)[1]
+            break
+    return f'{code.co_qualname} ({filename}:{code.co_firstlineno})'
+
+
+def _stack(frame):
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.reverse()
+    return ';'.join(labels)
+
+
+def issue_token(max_age=None):
+    """
+    Header value that gets requests profiled for max_age seconds
+    (at most PROFILE_TOKEN_MAX_AGE)
+    """
+    max_age = min(max_age or settings.PROFILE_TOKEN_MAX_AGE, settings.PROFILE_TOKEN_MAX_AGE)
+    return signing.dumps({'expires': int(time.time()) + max_age}, salt=TOKEN_SALT)
+
+
+def _valid_token(token):
+    try:
+        payload = signing.loads(token, salt=TOKEN_SALT)
+    except signing.BadSignature:
+        return False
+    return payload.get('expires', 0) > time.time()
+
+
+def should_profile(request):
+    token = request.headers.get(PROFILE_HEADER)
+    if token:
+        return _valid_token(token)
+    rate = settings.PROFILE_SAMPLE_RATE
+    return rate > 0 and random.random() < rate
+
+
+def start_profile():
+    return StackSampler(threading.get_ident(), settings.PROFILE_INTERVAL).start()
+
+
+def save_profile(stacks, endpoint, duration):
+    """
+    Write a folded-stack profile and drop the oldest beyond PROFILE_KEEP.
+    Returns the profile's name.
+    """
+    root = Path(settings.PROFILE_ROOT)
+    root.mkdir(parents=True, exist_ok=True)
+    name = f'{datetime.now(timezone.utc):{STAMP_FORMAT}}_{round(duration * 1000)}ms_{uuid.uuid4().hex[:8]}_{endpoint}'
+    (root / f'{name}{SUFFIX}').write_text(
+        ''.join(f'{stack} {count}\n' for stack, count in stacks.most_common())
+    )
+    for stale in sorted(root.glob(f'*{SUFFIX}'), reverse=True)[settings.PROFILE_KEEP:]:
+        stale.unlink(missing_ok=True)
+    return name
+
+
+def list_profiles():
+    """
+    Stored profiles, newest first
+    """
+    root = Path(settings.PROFILE_ROOT)
+    if not root.is_dir():
+        return []
+    profiles = []
+    for path in sorted(root.glob(f'*{SUFFIX}'), reverse=True):
+        name = path.name[:-len(SUFFIX)]
+        try:
+            stamp, duration, _, endpoint = name.split('_', 3)
+            captured_at = datetime.strptime(stamp, STAMP_FORMAT).replace(tzinfo=timezone.utc)
+        except ValueError:
+            continue
+        profiles.append({
+            'name': name,
+            'endpoint': endpoint,
+            'duration_ms': int(duration[:-2]),
+            'captured_at': captured_at,
+            'size': path.stat().st_size,
+        })
+    return profiles
+
+
+def profile_path(name):
+    """
+    Path of a stored profile, or None for unknown (or unsafe) names
+    """
+    path = Path(settings.PROFILE_ROOT) / f'{name}{SUFFIX}'
+    if path.parent != Path(settings.PROFILE_ROOT) or not path.is_file():
+        return None
+    return path
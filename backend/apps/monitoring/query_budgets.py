@@ -0,0 +1,226 @@
+"""
+Query budgets for the router-registered API endpoints.
+
+Every GET route a DRF router generated (list, retrieve and GET actions of each
+viewset) must have an entry in BUDGETS: the most queries one request may run,
+and any query parameters it needs. Each endpoint is requested on two seeded
+datasets, SIZES, one with ten times the rows of the other. A request fails its
+budget when it runs more queries than allowed on either dataset, or more on
+the large dataset than on the small one, which is how an N+1 shows up.
+
+The seeder writes no activity, capture jobs or availability periods, so
+add_records creates them for the dataset's largest project, one per task or
+member so they grow with the dataset too.
+
+Detail routes of ProjectViewSet use that project; other detail routes use the
+first row their list route returns. A detail route whose list is empty cannot
+be measured and fails its budget. Each endpoint is requested once to warm the
+per-user caches, then measured with cached analytics invalidated, inside a
+transaction that is rolled back.
+
+apps/monitoring/tests.py seeds both datasets and checks every budget, so the
+test suite enforces them.
+"""
+from collections import namedtuple
+
+from django.db import connection, transaction
+from django.urls import URLResolver, get_resolver, reverse
+
+from apps.monitoring.benchmarks import BenchmarkError, Dataset, QueryCounter
+
+
+Size = namedtuple('Size', 'seed tasks tasks_per_project')
+SIZES = {
+    'small': Size(seed=20, tasks=20, tasks_per_project=5),
+    'large': Size(seed=2000, tasks=2000, tasks_per_project=250),
+}
+
+
+class Budget:
+    """
+    Most queries an endpoint may run, and the query parameters it is called with.
+    Parameter values are formatted with the dataset's project, start, end and month.
+    """
+    def __init__(self, queries, params=None):
+        self.queries = queries
+        self.params = params or {}
+
+
+RANGE = {'start': '{start}', 'end': '{end}'}
+
+BUDGETS = {
+    'ClientViewSet.list': Budget(2),
+    'ClientViewSet.retrieve': Budget(1),
+    'ProjectViewSet.list': Budget(3),
+    'ProjectViewSet.retrieve': Budget(3),
+    'ProjectViewSet.access': Budget(3),
+    'ProjectViewSet.activity_logs': Budget(3),
+    'ProjectViewSet.baselines': Budget(3),
+    'ProjectViewSet.baseline_variance': Budget(4),
+    'ProjectViewSet.baseline_diff': Budget(4, {'from': '1'}),
+    'ProjectViewSet.statistics': Budget(7),
+    'ProjectBaselineViewSet.list': Budget(2),
+    'ProjectBaselineViewSet.retrieve': Budget(1),
+    'BaselineCaptureJobViewSet.list': Budget(2),
+    'BaselineCaptureJobViewSet.retrieve': Budget(1),
+    'ActivityLogViewSet.list': Budget(1),
+    'ActivityLogViewSet.retrieve': Budget(1),
+    'ActivityLogViewSet.feed': Budget(1),
+    'ActivityLogViewSet.archived': Budget(1, {'month': '{month}'}),
+    'TaskViewSet.list': Budget(4),
+    'TaskViewSet.retrieve': Budget(4),
+    'TaskViewSet.kanban': Budget(3, {'project': '{project}'}),
+    'TaskViewSet.gantt': Budget(4, {'project': '{project}'}),
+    'TaskDependencyViewSet.list': Budget(2),
+    'TaskDependencyViewSet.retrieve': Budget(1),
+    'TaskAssignmentViewSet.list': Budget(2),
+    'TaskAssignmentViewSet.retrieve': Budget(1),
+    'CommentViewSet.list': Budget(3),
+    'CommentViewSet.retrieve': Budget(2),
+    'TeamMemberViewSet.list': Budget(2),
+    'TeamMemberViewSet.retrieve': Budget(1),
+    'TeamMemberViewSet.availability': Budget(5, RANGE),
+    'TeamMemberViewSet.staffing': Budget(4, dict(RANGE, skills='Python')),
+    'MemberAvailabilityViewSet.list': Budget(2),
+    'MemberAvailabilityViewSet.retrieve': Budget(1),
+}
+
+
+class Endpoint:
+    """
+    One GET route of a router-registered viewset
+    """
+    def __init__(self, name, url_name, detail):
+        self.name = name
+        self.url_name = url_name
+        self.detail = detail
+
+
+def _walk(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _walk(pattern.url_patterns)
+        else:
+            yield pattern
+
+
+def router_endpoints():
+    """
+    GET routes generated by the routers, one per viewset action
+    """
+    endpoints = {}
+    for pattern in _walk(get_resolver().url_patterns):
+        actions = getattr(pattern.callback, 'actions', None)
+        if not actions or 'get' not in actions or not pattern.name:
+            continue
+        name = f"{pattern.callback.cls.__name__}.{actions['get']}"
+        if name not in endpoints:
+            endpoints[name] = Endpoint(name, pattern.name, 'pk' in pattern.pattern.regex.groupindex)
+    return list(endpoints.values())
+
+
+def add_records(dataset):
+    """
+    Activity, capture jobs and availability periods for the dataset's project:
+    one log entry and one capture job per task, one leave period per member
+    """
+    from apps.projects.activity import write_entries
+    from apps.projects.models import ActivityLog, BaselineCaptureJob, Project
+    from apps.resources.models import MemberAvailability
+
+    project = Project.objects.get(id=dataset.project_id)
+    tasks = list(project.tasks.order_by('start_date', 'id').values_list('id', 'title'))
+    write_entries([
+        ActivityLog(
+            project=project, user=dataset.user, action='updated', entity_type='task',
+            entity_id=task_id, description=f'Updated task {title}'
+        )
+        for task_id, title in tasks
+    ])
+    BaselineCaptureJob.objects.bulk_create([
+        BaselineCaptureJob(
+            project=project, name=f'Baseline {number}', status='completed',
+            tasks_total=len(tasks), created_by=dataset.user
+        )
+        for number in range(1, len(tasks) + 1)
+    ])
+    MemberAvailability.objects.bulk_create([
+        MemberAvailability(member=member, start_date=project.start_date, end_date=project.start_date)
+        for member in project.team_members.all()
+    ])
+
+
+def _context(dataset):
+    from apps.projects.models import Project
+
+    project = Project.objects.get(id=dataset.project_id)
+    return {
+        'project': project.id,
+        'start': project.start_date,
+        'end': project.end_date,
+        'month': f'{project.start_date:%Y-%m}',
+    }
+
+
+def _detail_pk(endpoint, endpoints, client, dataset):
+    if endpoint.name.startswith('ProjectViewSet.'):
+        return dataset.project_id
+    url_name = next(
+        (other.url_name for other in endpoints if other.name == endpoint.name.replace('.retrieve', '.list')),
+        None
+    )
+    if url_name is None:
+        return None
+    data = client.get(reverse(url_name)).data
+    rows = data.get('results', []) if isinstance(data, dict) else data
+    return rows[0]['id'] if rows else None
+
+
+def _path(endpoint, pk, budget, context):
+    path = reverse(endpoint.url_name, args=[pk] if endpoint.detail else [])
+    params = '&'.join(f'{key}={value.format(**context)}' for key, value in budget.params.items())
+    return f'{path}?{params}' if params else path
+
+
+def measure(dataset, endpoints):
+    """
+    Queries each endpoint ran on the dataset; None where there was nothing to request
+    """
+    client = dataset.client()
+    context = _context(dataset)
+    counts = {}
+    for endpoint in endpoints:
+        pk = _detail_pk(endpoint, endpoints, client, dataset) if endpoint.detail else None
+        if endpoint.detail and pk is None:
+            counts[endpoint.name] = None
+            continue
+        path = _path(endpoint, pk, BUDGETS[endpoint.name], context)
+        client.get(path)
+        dataset.invalidate()
+        counter = QueryCounter()
+        with transaction.atomic(), connection.execute_wrapper(counter):
+            response = client.get(path)
+            transaction.set_rollback(True)
+        if response.status_code >= 400:
+            raise BenchmarkError(f'{endpoint.name} returned {response.status_code}: {response.content[:200]!r}')
+        counts[endpoint.name] = counter.count
+    return counts
+
+
+def check(counts):
+    """
+    Budget failures of {size: {endpoint: queries}}, as messages
+    """
+    failures = []
+    small, large = counts['small'], counts['large']
+    for name, budget in BUDGETS.items():
+        if name not in small:
+            continue
+        for size, measured in ((size, counts[size][name]) for size in SIZES):
+            if measured is None:
+                failures.append(f'{name}: nothing to request on the {size} dataset')
+            elif measured > budget.queries:
+                failures.append(f'{name}: {measured} queries on the {size} dataset, budget {budget.queries}')
+        if small[name] is not None and large[name] is not None and large[name] > small[name]:
+            failures.append(f'{name}: {small[name]} queries on the small dataset but {large[name]} on the large one')
+    return failures
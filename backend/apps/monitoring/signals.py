@@ -0,0 +1,13 @@
+"""
+Signal handlers that hand slow queries captured in Celery tasks over for recording
+"""
+from celery.signals import task_postrun
+from django.dispatch import receiver
+
+from apps.monitoring import slow_queries
+
+
+@receiver(task_postrun)
+def task_finished(sender=None, **kwargs):
+    if slow_queries.has_pending():
+        slow_queries.flush()
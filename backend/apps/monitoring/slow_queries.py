@@ -0,0 +1,211 @@
+"""
+Slow query capture.
+
+The execute wrapper of apps.monitoring.metrics hands every statement slower
+than SLOW_QUERY_THRESHOLD_MS to capture(), which only appends it to an
+in-process buffer. At the end of the request (or Celery task) the buffer is
+passed to the record_slow_queries task, which folds the runs into SlowQuery
+rows keyed by a fingerprint of the normalized SQL. A fingerprint's EXPLAIN
+plan is taken by another task, from its slowest sampled run, when it is first
+seen and again once older than SLOW_QUERY_PLAN_MAX_AGE. Nothing is written on
+the connection or in the transaction that ran the slow query.
+
+Parameters are kept only for SELECT statements, which are the only ones
+explained (with ANALYZE when SLOW_QUERY_EXPLAIN_ANALYZE is on, inside a
+transaction that is rolled back). They can hold token ids, emails or search
+terms, so they only travel in the task messages that record and explain a
+run; the stored sample keeps numbers and booleans and redacts every string.
+"""
+import hashlib
+import json
+import logging
+import math
+import re
+from collections import deque
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.monitoring.models import SlowQuery
+
+
+logger = logging.getLogger(__name__)
+
+# Runs waiting to be recorded; the oldest are dropped if recording falls behind
+MAX_PENDING = 1000
+# Longer statements are recorded truncated and never explained
+MAX_SQL_LENGTH = 20000
+
+BACKGROUND = 'background'
+REDACTED = '<redacted>'
+
+_pending = deque(maxlen=MAX_PENDING)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w."])-?\d+(?:\.\d+)?(?![\w"])')
+_PLACEHOLDER = re.compile(r'%s|\?|\$\d+')
+_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_ROWS = re.compile(r'\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+')
+_SPACE = re.compile(r'\s+')
+
+
+def normalize(sql):
+    """
+    SQL with literals and placeholders replaced by ?, and parenthesised
+    lists of them (IN lists, VALUES rows) collapsed, so runs that differ only
+    in their values or list lengths share a fingerprint
+    """
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _LIST.sub('(...)', sql)
+    sql = _ROWS.sub('(...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def fingerprint(normalized):
+    return hashlib.md5(normalized.encode()).hexdigest()
+
+
+def _is_select(sql):
+    head = sql.lstrip()[:6].upper()
+    return head in ('SELECT', 'WITH')
+
+
+def _json_params(params):
+    try:
+        return json.loads(json.dumps(list(params) if isinstance(params, (list, tuple)) else params, cls=DjangoJSONEncoder))
+    except (TypeError, ValueError):
+        return None
+
+
+def redact(params):
+    """
+    Params with every string replaced, so they can be stored and shown
+    """
+    if isinstance(params, str):
+        return REDACTED
+    if isinstance(params, list):
+        return [redact(value) for value in params]
+    if isinstance(params, dict):
+        return {key: redact(value) for key, value in params.items()}
+    return params
+
+
+def capture(sql, params, many, seconds, view):
+    """
+    Remember a slow run; called from the execute wrapper, so it does no I/O
+    """
+    explainable = not many and len(sql) <= MAX_SQL_LENGTH and _is_select(sql)
+    _pending.append({
+        'sql': sql[:MAX_SQL_LENGTH],
+        'params': _json_params(params) if explainable and params is not None else None,
+        'ms': seconds * 1000,
+        'view': view or BACKGROUND,
+    })
+
+
+def has_pending():
+    return bool(_pending)
+
+
+def flush():
+    """
+    Queue the captured runs for recording
+    """
+    from apps.monitoring.tasks import record_slow_queries
+
+    entries = []
+    while _pending:
+        try:
+            entries.append(_pending.popleft())
+        except IndexError:
+            break
+    if not entries:
+        return
+    try:
+        record_slow_queries.delay(entries)
+    except Exception:
+        logger.warning('Could not queue %d slow queries', len(entries), exc_info=True)
+
+
+def _percentile(values, share):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(share * len(ordered)) - 1)]
+
+
+def record(entries):
+    """
+    Fold captured runs into their SlowQuery rows. Returns (fingerprint, sql,
+    params) of the slowest explainable run of each fingerprint whose plan
+    should be (re)captured.
+    """
+    groups = {}
+    for entry in entries:
+        normalized = normalize(entry['sql'])
+        groups.setdefault(fingerprint(normalized), (normalized, []))[1].append(entry)
+
+    now = timezone.now()
+    stale_before = now - timedelta(seconds=settings.SLOW_QUERY_PLAN_MAX_AGE)
+    to_explain = []
+    for key, (normalized, runs) in groups.items():
+        with transaction.atomic():
+            query, _ = SlowQuery.objects.select_for_update().get_or_create(
+                fingerprint=key, defaults={'sql': normalized, 'last_seen': now}
+            )
+            for run in runs:
+                query.count += 1
+                query.total_ms += run['ms']
+                query.views[run['view']] = query.views.get(run['view'], 0) + 1
+                if run['ms'] >= query.max_ms or not query.sample_sql:
+                    query.sample_sql = run['sql']
+                    query.sample_params = redact(run['params'])
+                query.max_ms = max(query.max_ms, run['ms'])
+            query.recent_ms = (query.recent_ms + [run['ms'] for run in runs])[-settings.SLOW_QUERY_SAMPLES:]
+            query.p95_ms = _percentile(query.recent_ms, 0.95)
+            query.last_view = runs[-1]['view']
+            query.last_seen = now
+            query.save()
+        sample = max((run for run in runs if run['params'] is not None), key=lambda run: run['ms'], default=None)
+        if sample is not None and (query.plan_captured_at is None or query.plan_captured_at < stale_before):
+            to_explain.append((key, sample['sql'], sample['params']))
+    return to_explain
+
+
+def explain(query, sql, params, analyze=None):
+    """
+    Capture the EXPLAIN plan of a SlowQuery from one of its runs
+    """
+    if analyze is None:
+        analyze = settings.SLOW_QUERY_EXPLAIN_ANALYZE
+    if params is None or not _is_select(sql):
+        raise ValueError('Only SELECT statements with sampled parameters can be explained')
+
+    if connection.vendor == 'postgresql':
+        prefix = 'EXPLAIN (ANALYZE, BUFFERS) ' if analyze else 'EXPLAIN '
+    elif connection.vendor == 'sqlite':
+        # SQLite cannot run ANALYZE plans
+        prefix, analyze = 'EXPLAIN QUERY PLAN ', False
+    else:
+        prefix = 'EXPLAIN ANALYZE ' if analyze else 'EXPLAIN '
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            rows = cursor.fetchall()
+        # ANALYZE runs the statement; never keep anything it did
+        transaction.set_rollback(True)
+
+    if connection.vendor == 'sqlite':
+        plan = '\n'.join(str(row[-1]) for row in rows)
+    else:
+        plan = '\n'.join('\t'.join(str(column) for column in row) for row in rows)
+    query.plan = plan
+    query.plan_analyzed = analyze
+    query.plan_captured_at = timezone.now()
+    query.plan_error = ''
+    query.save(update_fields=['plan', 'plan_analyzed', 'plan_captured_at', 'plan_error'])
+    return plan
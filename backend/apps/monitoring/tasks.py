@@ -0,0 +1,37 @@
+"""
+Background jobs for monitoring
+"""
+from celery import shared_task
+from django.db import DatabaseError
+from django.utils import timezone
+
+from apps.monitoring.metrics import suppress_capture
+from apps.monitoring.models import SlowQuery
+from apps.monitoring.slow_queries import explain, record
+
+
+@shared_task
+def record_slow_queries(entries):
+    """
+    Aggregate captured slow runs and queue plans for new or stale fingerprints
+    """
+    with suppress_capture():
+        for fingerprint, sql, params in record(entries):
+            explain_slow_query.delay(fingerprint, sql, params)
+
+
+@shared_task
+def explain_slow_query(fingerprint, sql, params, analyze=None):
+    """
+    Capture the EXPLAIN plan of a slow query fingerprint from one of its runs
+    """
+    query = SlowQuery.objects.filter(fingerprint=fingerprint).first()
+    if query is None:
+        return
+    with suppress_capture():
+        try:
+            explain(query, sql, params, analyze)
+        except (DatabaseError, ValueError) as error:
+            query.plan_error = str(error)
+            query.plan_captured_at = timezone.now()
+            query.save(update_fields=['plan_error', 'plan_captured_at'])
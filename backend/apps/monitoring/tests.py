@@ -0,0 +1,36 @@
+from django.test import TestCase
+
+from apps.monitoring import query_budgets
+from apps.monitoring.benchmarks import Dataset
+from apps.projects.seeding import generate, rebuild_derived
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Every router-registered GET endpoint stays within its query budget on a
+    small and a large dataset (see apps.monitoring.query_budgets)
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        for spec in query_budgets.SIZES.values():
+            generate(seed=spec.seed, tasks=spec.tasks, tasks_per_project=spec.tasks_per_project, workers=1)
+            rebuild_derived(spec.seed)
+            query_budgets.add_records(Dataset(spec.seed))
+
+    def test_every_endpoint_has_a_budget(self):
+        unbudgeted = sorted(
+            endpoint.name for endpoint in query_budgets.router_endpoints()
+            if endpoint.name not in query_budgets.BUDGETS
+        )
+        self.assertEqual(unbudgeted, [])
+
+    def test_endpoints_within_query_budgets(self):
+        endpoints = [
+            endpoint for endpoint in query_budgets.router_endpoints() if endpoint.name in query_budgets.BUDGETS
+        ]
+        counts = {
+            size: query_budgets.measure(Dataset(spec.seed), endpoints)
+            for size, spec in query_budgets.SIZES.items()
+        }
+        self.assertEqual(query_budgets.check(counts), [])
@@ -0,0 +1,181 @@
+"""
+Project-level access control.
+
+A user sees the projects they have a ProjectAccess row for: owner (the
+project's creator), member (on its team) or viewer (granted explicitly).
+Staff users see everything. Each user's {project id: role} map is cached
+under a per-user version that is bumped whenever their rows change, and
+querysets are scoped with a plain IN on the indexed project foreign key, so
+scoped queries need no extra joins. Users with very many projects are scoped
+through a subquery on ProjectAccess's (user, project) index instead.
+"""
+import hashlib
+import secrets
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from apps.projects.models import Project, ProjectAccess
+
+
+VERSION_KEY = 'access:user:{}:version'
+ROLES_KEY = 'access:user:{}'
+
+# Roles allowed to change a project's data; only owners delete the project
+EDIT_ROLES = ('owner', 'member')
+
+ROLE_RANK = {'viewer': 0, 'member': 1, 'owner': 2}
+
+
+class ProjectAccessSet:
+    """
+    The projects a user can see and their role on each
+    """
+    def __init__(self, user_id, roles=None, unrestricted=False):
+        self.user_id = user_id
+        self.roles = roles or {}
+        self.unrestricted = unrestricted
+
+    def role(self, project_id):
+        if self.unrestricted:
+            return 'owner'
+        return self.roles.get(str(project_id))
+
+    def can_view(self, project_id):
+        return self.unrestricted or str(project_id) in self.roles
+
+    def can_edit(self, project_id):
+        return self.role(project_id) in EDIT_ROLES
+
+    def project_ids(self, roles=None):
+        return [
+            project_id for project_id, role in self.roles.items()
+            if roles is None or role in roles
+        ]
+
+    def project_filter(self, roles=None):
+        """
+        Value for a ``<project lookup>__in`` filter: the ids themselves, or a
+        subquery when there are too many to inline
+        """
+        if len(self.roles) <= settings.PROJECT_ACCESS_INLINE_MAX:
+            return self.project_ids(roles)
+        rows = ProjectAccess.objects.filter(user_id=self.user_id)
+        if roles is not None:
+            rows = rows.filter(role__in=roles)
+        return rows.values('project_id')
+
+    @property
+    def digest(self):
+        """
+        Short fingerprint of the visible projects, for cache keys
+        """
+        if self.unrestricted:
+            return 'all'
+        return hashlib.sha1(','.join(sorted(self.roles)).encode()).hexdigest()
+
+
+def _load_roles(user_id):
+    return {
+        str(project_id): role
+        for project_id, role in ProjectAccess.objects.filter(user_id=user_id).values_list('project_id', 'role')
+    }
+
+
+def get_access(user):
+    """
+    ProjectAccessSet of a user, kept on the user instance for the rest of the request
+    """
+    access = getattr(user, '_project_access', None)
+    if access is not None:
+        return access
+    if user.is_staff or user.is_superuser:
+        access = ProjectAccessSet(user.pk, unrestricted=True)
+    else:
+        access = ProjectAccessSet(user.pk, _cached_roles(user.pk))
+    user._project_access = access
+    return access
+
+
+def _cached_roles(user_id):
+    version_key, roles_key = VERSION_KEY.format(user_id), ROLES_KEY.format(user_id)
+    cached = cache.get_many([version_key, roles_key])
+    version = cached.get(version_key)
+    if version is None:
+        # Counters start at a random value so a flushed cache cannot reproduce an old version
+        cache.add(version_key, secrets.randbits(48), timeout=None)
+        version = cache.get(version_key)
+    entry = cached.get(roles_key)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    roles = _load_roles(user_id)
+    cache.set(roles_key, (version, roles), settings.PROJECT_ACCESS_CACHE_TIMEOUT)
+    return roles
+
+
+def _bump(user_ids):
+    for user_id in user_ids:
+        key = VERSION_KEY.format(user_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, secrets.randbits(48), timeout=None)
+
+
+def invalidate(user_ids):
+    """
+    Drop the cached access lists of users once the transaction commits
+    """
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if user_ids:
+        transaction.on_commit(partial(_bump, user_ids))
+
+
+def scope_queryset(queryset, user, lookup='project_id', roles=None):
+    """
+    Restrict a queryset to rows of projects the user can see (or holds one of roles on)
+    """
+    access = get_access(user)
+    if access.unrestricted:
+        return queryset
+    return queryset.filter(**{f'{lookup}__in': access.project_filter(roles)})
+
+
+# Maintenance of owner and member rows
+
+def grant(project_id, user_ids, role):
+    """
+    Give users a role on a project, keeping any higher role they already hold
+    """
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return
+    current = dict(
+        ProjectAccess.objects.filter(project_id=project_id, user_id__in=user_ids).values_list('user_id', 'role')
+    )
+    raise_to = [user_id for user_id, held in current.items() if ROLE_RANK[held] < ROLE_RANK[role]]
+    if raise_to:
+        ProjectAccess.objects.filter(project_id=project_id, user_id__in=raise_to).update(role=role)
+    ProjectAccess.objects.bulk_create(
+        [ProjectAccess(project_id=project_id, user_id=user_id, role=role) for user_id in user_ids - set(current)],
+        ignore_conflicts=True
+    )
+    invalidate(user_ids)
+
+
+def revoke(project_id, user_ids, role):
+    """
+    Remove a role that no longer applies (e.g. a member left the team).
+    A former owner who is still on the team stays a member.
+    """
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return
+    ProjectAccess.objects.filter(project_id=project_id, user_id__in=user_ids, role=role).delete()
+    if role == 'owner':
+        grant(project_id, Project.team_members.through.objects.filter(
+            project_id=project_id, teammember__user_id__in=user_ids
+        ).values_list('teammember__user_id', flat=True), 'member')
+    invalidate(user_ids)
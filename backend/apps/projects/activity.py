@@ -0,0 +1,175 @@
+"""
+Automatic ActivityLog capture.
+
+Model writes are turned into unsaved ActivityLog rows and handed over on
+transaction commit, so rolled-back work is never logged. Inside a request (see
+ActivityLogMiddleware) or an explicit ``activity_scope()`` the rows are
+buffered and written with a single ``bulk_create`` when the scope ends;
+outside a scope they are written as soon as their transaction commits.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+
+ACTIVITY_BATCH_SIZE = 1000
+
+# Fields never reported as changes
+UNTRACKED_FIELDS = ('created_at', 'updated_at')
+
+_scope = ContextVar('activity_scope', default=None)
+
+_encoder = DjangoJSONEncoder()
+
+
+class ActivityScope:
+    """
+    Buffer of committed log entries, plus the request whose user made them
+    """
+    def __init__(self, request=None):
+        self.request = request
+        self.entries = []
+        self.closed = False
+
+    @property
+    def user(self):
+        # DRF authenticates inside the view and copies the user onto the Django request
+        user = getattr(self.request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return user
+        return None
+
+
+@contextmanager
+def activity_scope(request=None):
+    """
+    Buffer every entry committed inside the block and write them with one bulk_create
+    """
+    scope = ActivityScope(request)
+    token = _scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _scope.reset(token)
+        scope.closed = True
+        write_entries(scope.entries)
+
+
+class ActivityLogMiddleware:
+    """
+    Opens an activity scope for the duration of each request
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with activity_scope(request):
+            return self.get_response(request)
+
+
+def current_user():
+    scope = _scope.get()
+    return scope.user if scope else None
+
+
+def write_entries(entries):
+    """
+    Insert log entries in batches, skipping any whose project was deleted
+    meanwhile, and add them to the members' feeds
+    """
+    from apps.projects.feed import fan_out
+    from apps.projects.models import ActivityLog, Project
+
+    if not entries:
+        return
+    project_ids = {entry.project_id for entry in entries}
+    existing = set(Project.objects.filter(id__in=project_ids).values_list('id', flat=True))
+    entries = [entry for entry in entries if entry.project_id in existing]
+    ActivityLog.objects.bulk_create(entries, batch_size=ACTIVITY_BATCH_SIZE)
+    fan_out(entries)
+
+
+def record_many(entries):
+    """
+    Queue unsaved ActivityLog rows to be written once the current transaction commits
+    """
+    if not entries:
+        return
+    user = current_user()
+    for entry in entries:
+        if entry.user_id is None and user is not None:
+            entry.user = user
+    # Bind the scope now; if it has already been flushed by the time the
+    # transaction commits, write directly
+    scope = _scope.get()
+
+    def enqueue():
+        if scope is not None and not scope.closed:
+            scope.entries.extend(entries)
+        else:
+            write_entries(entries)
+
+    transaction.on_commit(enqueue)
+
+
+def record(project_id, action, entity_type, entity_id, description, changes=None):
+    """
+    Queue one activity log entry
+    """
+    from apps.projects.models import ActivityLog
+
+    record_many([ActivityLog(
+        project_id=project_id,
+        action=action,
+        entity_type=entity_type,
+        entity_id=entity_id,
+        description=description,
+        changes=changes or {}
+    )])
+
+
+def plain(value):
+    """
+    JSON-safe form of a field value
+    """
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return _encoder.default(value)
+
+
+class ActivityTrackedMixin:
+    """
+    Keeps a snapshot of the values loaded from the database so a save can
+    report which fields changed without re-reading the row
+    """
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._activity_snapshot = dict(zip(field_names, values))
+        return instance
+
+    def tracked_values(self):
+        return {
+            field.attname: self.__dict__[field.attname]
+            for field in self._meta.concrete_fields
+            if not field.primary_key and field.name not in UNTRACKED_FIELDS
+            and field.attname in self.__dict__
+        }
+
+    def activity_changes(self):
+        """
+        {field: {'old': ..., 'new': ...}} since the instance was loaded or last saved
+        """
+        snapshot = getattr(self, '_activity_snapshot', None)
+        if snapshot is None:
+            return {}
+        changes = {}
+        for attname, value in self.tracked_values().items():
+            if attname in snapshot and snapshot[attname] != value:
+                changes[attname] = {'old': plain(snapshot[attname]), 'new': plain(value)}
+        return changes
+
+    def reset_activity_snapshot(self):
+        self._activity_snapshot = self.tracked_values()
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Project, ProjectBaseline, ActivityLog
+from .models import Project, ProjectAccess, ProjectBaseline, BaselineCaptureJob, ActivityLog, ActivityLogArchive
 
 
 @admin.register(Project)
@@ -34,6 +34,14 @@ class ProjectAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(ProjectAccess)
+class ProjectAccessAdmin(admin.ModelAdmin):
+    list_display = ('project', 'user', 'role', 'created_at')
+    list_filter = ('role',)
+    search_fields = ('project__name', 'user__email')
+    raw_id_fields = ('project', 'user')
+
+
 @admin.register(ProjectBaseline)
 class ProjectBaselineAdmin(admin.ModelAdmin):
     list_display = ('project', 'name', 'baseline_number', 'created_by', 'created_at')
@@ -43,6 +51,15 @@ class ProjectBaselineAdmin(admin.ModelAdmin):
     ordering = ('-created_at',)
 
 
+@admin.register(BaselineCaptureJob)
+class BaselineCaptureJobAdmin(admin.ModelAdmin):
+    list_display = ('project', 'status', 'tasks_processed', 'tasks_total', 'baseline', 'created_by', 'created_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('project__name', 'idempotency_key')
+    readonly_fields = ('id', 'created_at', 'started_at', 'completed_at')
+    ordering = ('-created_at',)
+
+
 @admin.register(ActivityLog)
 class ActivityLogAdmin(admin.ModelAdmin):
     list_display = ('project', 'action', 'entity_type', 'user', 'created_at')
@@ -50,3 +67,12 @@ class ActivityLogAdmin(admin.ModelAdmin):
     search_fields = ('project__name', 'description', 'user__username')
     readonly_fields = ('id', 'created_at')
     ordering = ('-created_at',)
+
+
+@admin.register(ActivityLogArchive)
+class ActivityLogArchiveAdmin(admin.ModelAdmin):
+    list_display = ('month', 'row_count', 'size_bytes', 'path', 'archived_at')
+    list_filter = ('month',)
+    search_fields = ('path',)
+    readonly_fields = ('id', 'archived_at')
+    ordering = ('-month',)
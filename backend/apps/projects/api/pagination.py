@@ -0,0 +1,97 @@
+"""
+Keyset (seek) pagination for append-mostly tables
+"""
+import base64
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Newest-first pagination over (created_at, id). The cursor carries the
+    last row's key, so every page is one index range scan however deep it is.
+    """
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    # (timestamp field, unique tie-breaker field)
+    keyset_fields = ('created_at', 'id')
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, row):
+        time_field, id_field = self.keyset_fields
+        value = f'{getattr(row, time_field).isoformat()}|{getattr(row, id_field)}'
+        return base64.urlsafe_b64encode(value.encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            timestamp, key = base64.urlsafe_b64decode(encoded.encode()).decode().split('|', 1)
+            timestamp = parse_datetime(timestamp)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if timestamp is None or not key:
+            raise NotFound(self.invalid_cursor_message)
+        return timestamp, key
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        time_field, id_field = self.keyset_fields
+        size = self.get_page_size(request)
+
+        queryset = queryset.order_by(f'-{time_field}', f'-{id_field}')
+        cursor = self.decode_cursor(request)
+        if cursor:
+            timestamp, key = cursor
+            # The redundant <= bound lets the planner use it as an index range
+            queryset = queryset.filter(**{f'{time_field}__lte': timestamp}).filter(
+                Q(**{f'{time_field}__lt': timestamp}) | Q(**{time_field: timestamp, f'{id_field}__lt': key})
+            )
+
+        rows = list(queryset[:size + 1])
+        self.next_cursor = self.encode_cursor(rows[size - 1]) if len(rows) > size else None
+        return rows[:size]
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class FeedPagination(KeysetPagination):
+    """
+    Keyset pagination over a user's ActivityFeedEntry rows
+    """
+    keyset_fields = ('created_at', 'activity_id')
@@ -2,7 +2,7 @@
 Serializers for Project management
 """
 from rest_framework import serializers
-from apps.projects.models import Project, ProjectBaseline, ActivityLog
+from apps.projects.models import Project, ProjectAccess, ProjectBaseline, BaselineCaptureJob, ActivityLog
 from apps.clients.api.serializers import ClientListSerializer
 from apps.resources.api.serializers import TeamMemberListSerializer
 
@@ -89,6 +89,19 @@ class ProjectListSerializer(serializers.ModelSerializer):
         )
 
 
+class ProjectAccessSerializer(serializers.ModelSerializer):
+    """
+    Serializer for a user's access to a project
+    """
+    user_email = serializers.EmailField(source='user.email', read_only=True)
+    user_name = serializers.CharField(source='user.get_full_name', read_only=True)
+
+    class Meta:
+        model = ProjectAccess
+        fields = ('user', 'user_email', 'user_name', 'role', 'created_at')
+        read_only_fields = ('role', 'created_at')
+
+
 class ProjectBaselineSerializer(serializers.ModelSerializer):
     """
     Serializer for ProjectBaseline model
@@ -97,11 +110,28 @@ class ProjectBaselineSerializer(serializers.ModelSerializer):
         model = ProjectBaseline
         fields = (
             'id', 'project', 'name', 'baseline_number', 'baseline_data',
-            'created_at', 'created_by'
+            'task_count', 'created_at', 'created_by'
         )
         read_only_fields = ('id', 'created_at')
 
 
+class BaselineCaptureJobSerializer(serializers.ModelSerializer):
+    """
+    Serializer for background baseline captures
+    """
+    progress_percentage = serializers.ReadOnlyField()
+    baseline_number = serializers.IntegerField(source='baseline.baseline_number', read_only=True, default=None)
+
+    class Meta:
+        model = BaselineCaptureJob
+        fields = (
+            'id', 'project', 'name', 'idempotency_key', 'status', 'tasks_total',
+            'tasks_processed', 'progress_percentage', 'baseline', 'baseline_number',
+            'error', 'created_by', 'created_at', 'started_at', 'completed_at'
+        )
+        read_only_fields = fields
+
+
 class ActivityLogSerializer(serializers.ModelSerializer):
     """
     Serializer for ActivityLog model
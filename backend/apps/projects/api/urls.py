@@ -3,11 +3,12 @@ URL patterns for Projects API
 """
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ProjectViewSet, ProjectBaselineViewSet, ActivityLogViewSet
+from .views import ProjectViewSet, ProjectBaselineViewSet, BaselineCaptureJobViewSet, ActivityLogViewSet
 
 router = DefaultRouter()
 router.register(r'', ProjectViewSet, basename='project')
 router.register(r'baselines', ProjectBaselineViewSet, basename='project-baseline')
+router.register(r'baseline-jobs', BaselineCaptureJobViewSet, basename='baseline-job')
 router.register(r'activity-logs', ActivityLogViewSet, basename='activity-log')
 
 urlpatterns = [
@@ -1,33 +1,79 @@
 """
 API views for Project management
 """
+from datetime import datetime
+from uuid import UUID
+
+import numpy as np
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.pagination import PageNumberPagination
+from django.db import transaction
+from django.db.models import F, Prefetch
 from django_filters.rest_framework import DjangoFilterBackend
-from apps.projects.models import Project, ProjectBaseline, ActivityLog
+from apps.analytics.cache import cached_result, project_tag
+from apps.clients.models import Client
+from apps.search.filters import FullTextSearchFilter
+from apps.tasks.models import Task
+from apps.projects.access import get_access, invalidate
+from apps.projects.archive import search_archives
+from apps.projects.baselines import (
+    capture_task_columns,
+    baseline_columns,
+    compute_variance,
+    days_to_dates,
+    format_id,
+    diff_columns,
+    diff_entry,
+    CHANGED,
+    CHANGE_NAMES
+)
+from apps.projects.models import Project, ProjectAccess, ProjectBaseline, BaselineCaptureJob, ActivityLog
+from apps.projects.permissions import ProjectScopedMixin
+from apps.projects.tasks import capture_project_baseline
+from apps.resources.models import TeamMember
+from .pagination import KeysetPagination, FeedPagination
 from .serializers import (
     ProjectSerializer,
     ProjectCreateSerializer,
     ProjectListSerializer,
+    ProjectAccessSerializer,
     ProjectBaselineSerializer,
+    BaselineCaptureJobSerializer,
     ActivityLogSerializer
 )
 
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(ProjectScopedMixin, viewsets.ModelViewSet):
     """
     ViewSet for Project CRUD operations
     """
     queryset = Project.objects.select_related('client', 'created_by').prefetch_related('team_members').all()
-    permission_classes = (IsAuthenticated,)
-    filter_backends = (DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter)
+    project_scope = 'id'
+    project_attr = 'pk'
+    # Only match UUIDs so the baselines/ and activity-logs/ routes are not shadowed
+    lookup_value_regex = '[0-9a-f-]{36}'
+    # The search filter runs last so it can order matches by rank
+    filter_backends = (DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter)
     filterset_fields = ('status', 'client')
     search_fields = ('name', 'description', 'client__name')
+    search_entity_type = 'project'
     ordering_fields = ('name', 'created_at', 'start_date', 'end_date')
     ordering = ('-created_at',)
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            return queryset.with_progress()
+        if self.action == 'retrieve':
+            # The nested client reads its portfolio totals and each member their user
+            return queryset.with_progress().select_related(None).prefetch_related(None).prefetch_related(
+                Prefetch('client', queryset=Client.objects.with_portfolio()),
+                Prefetch('team_members', queryset=TeamMember.objects.select_related('user')),
+            )
+        return queryset
+
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
             return ProjectCreateSerializer
@@ -35,48 +81,84 @@ class ProjectViewSet(viewsets.ModelViewSet):
             return ProjectListSerializer
         return ProjectSerializer
 
-    @action(detail=True, methods=['post'])
-    def set_baseline(self, request, pk=None):
+    def perform_create(self, serializer):
+        # The creator becomes the owner (see apps.projects.signals)
+        serializer.save()
+
+    @action(detail=True, methods=['get', 'post', 'delete'])
+    def access(self, request, pk=None):
         """
-        Create a baseline snapshot for the project
+        List who can access the project; owners grant viewer access with
+        POST {user} and revoke it with DELETE {user}
         """
         project = self.get_object()
+        if request.method == 'GET':
+            rows = project.access.select_related('user').order_by('user__email')
+            return Response(ProjectAccessSerializer(rows, many=True).data)
 
-        # Get the latest baseline number
-        latest_baseline = project.baselines.order_by('-baseline_number').first()
-        baseline_number = (latest_baseline.baseline_number + 1) if latest_baseline else 1
+        if get_access(request.user).role(project.pk) != 'owner':
+            return Response({"error": "Only the project owner can change access"}, status=status.HTTP_403_FORBIDDEN)
 
-        # Create baseline data snapshot
-        baseline_data = {
-            'name': project.name,
-            'budget': float(project.budget),
-            'start_date': str(project.start_date),
-            'end_date': str(project.end_date),
-            'tasks': []
-        }
+        if request.method == 'DELETE':
+            try:
+                user_id = int(request.data.get('user'))
+            except (TypeError, ValueError):
+                return Response({"error": "user must be a user id"}, status=status.HTTP_400_BAD_REQUEST)
+            deleted, _ = project.access.filter(user_id=user_id, role='viewer').delete()
+            if not deleted:
+                return Response({"error": "No viewer grant for this user"}, status=status.HTTP_404_NOT_FOUND)
+            invalidate([user_id])
+            return Response(status=status.HTTP_204_NO_CONTENT)
 
-        # Add task snapshots
-        for task in project.tasks.all():
-            baseline_data['tasks'].append({
-                'id': str(task.id),
-                'title': task.title,
-                'start_date': str(task.start_date),
-                'end_date': str(task.end_date),
-                'duration': task.duration,
-                'estimated_cost': float(task.estimated_cost)
-            })
-
-        # Create baseline
-        baseline = ProjectBaseline.objects.create(
-            project=project,
-            name=request.data.get('name', f'Baseline {baseline_number}'),
-            baseline_number=baseline_number,
-            baseline_data=baseline_data,
-            created_by=request.user
+        serializer = ProjectAccessSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = serializer.validated_data['user']
+        # Owner and member roles follow the project's creator and team
+        grant, created = ProjectAccess.objects.get_or_create(project=project, user=user, defaults={'role': 'viewer'})
+        invalidate([user.pk])
+        return Response(
+            ProjectAccessSerializer(grant).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
         )
 
-        serializer = ProjectBaselineSerializer(baseline)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    @action(detail=True, methods=['post'])
+    def set_baseline(self, request, pk=None):
+        """
+        Start a background capture of a baseline snapshot for the project.
+        Retrying with the same Idempotency-Key returns the original job, or
+        restarts it if it failed.
+        """
+        project = self.get_object()
+        name = request.data.get('name', '')
+        idempotency_key = request.headers.get('Idempotency-Key') or request.data.get('idempotency_key')
+
+        if idempotency_key:
+            job, created = BaselineCaptureJob.objects.get_or_create(
+                project=project,
+                idempotency_key=idempotency_key,
+                defaults={'name': name, 'created_by': request.user}
+            )
+            # A failed capture is run again under the same key rather than returned forever
+            if not created and job.status == 'failed':
+                created = bool(
+                    BaselineCaptureJob.objects.filter(id=job.id, status='failed')
+                    .update(status='pending', error='', completed_at=None)
+                )
+                job.refresh_from_db()
+        else:
+            # Without a key, an identical capture that is still in flight is reused
+            job = project.baseline_jobs.filter(
+                name=name, idempotency_key__isnull=True, status__in=('pending', 'running')
+            ).first()
+            created = job is None
+            if created:
+                job = BaselineCaptureJob.objects.create(project=project, name=name, created_by=request.user)
+
+        if created:
+            transaction.on_commit(lambda: capture_project_baseline.delay(str(job.id)))
+
+        serializer = BaselineCaptureJobSerializer(job)
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK)
 
     @action(detail=True, methods=['get'])
     def baselines(self, request, pk=None):
@@ -88,15 +170,155 @@ class ProjectViewSet(viewsets.ModelViewSet):
         serializer = ProjectBaselineSerializer(baselines, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'])
+    def baseline_variance(self, request, pk=None):
+        """
+        Per-task slips and cost deltas between a baseline (latest by default)
+        and the current schedule
+        """
+        project = self.get_object()
+        baselines = project.baselines.all()
+        number = request.query_params.get('baseline')
+        if number and not number.isdigit():
+            return Response({"error": "baseline must be a baseline number"}, status=status.HTTP_400_BAD_REQUEST)
+        baseline = baselines.filter(baseline_number=number).first() if number else baselines.last()
+        if baseline is None:
+            return Response({"error": "Baseline not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        current, titles = capture_task_columns(project.tasks.all(), with_titles=True)
+        variance = compute_variance(baseline_columns(baseline), current)
+
+        # Only tasks that moved or changed cost, unless all=true
+        changed = (
+            (variance['start_slip'] != 0) | (variance['finish_slip'] != 0)
+            | (variance['duration_delta'] != 0) | (variance['cost_delta'] != 0)
+        )
+        rows = slice(None) if request.query_params.get('all') == 'true' else changed
+
+        finish_slip = variance['finish_slip']
+        cost_delta = variance['cost_delta']
+        summary = {
+            'tasks_compared': int(finish_slip.size),
+            'tasks_changed': int(changed.sum()),
+            'tasks_slipped': int((finish_slip > 0).sum()),
+            'max_finish_slip_days': int(finish_slip.max()) if finish_slip.size else 0,
+            'total_cost_delta': float(cost_delta.sum()) / 100,
+            'tasks_added': int(variance['added'].size),
+            'tasks_removed': int(variance['removed'].size),
+        }
+
+        current_ends = days_to_dates(current['end'][variance['new_index']][rows])
+        tasks = [
+            {
+                'id': format_id(task_id),
+                'title': titles[index],
+                'end_date': end_date,
+                'start_slip_days': int(start_slip),
+                'finish_slip_days': int(finish),
+                'duration_delta_days': int(duration_delta),
+                'cost_delta': int(cost) / 100,
+            }
+            for task_id, index, end_date, start_slip, finish, duration_delta, cost in zip(
+                variance['id'][rows],
+                variance['new_index'][rows].tolist(),
+                current_ends,
+                variance['start_slip'][rows].tolist(),
+                finish_slip[rows].tolist(),
+                variance['duration_delta'][rows].tolist(),
+                cost_delta[rows].tolist(),
+            )
+        ]
+
+        return Response({
+            'baseline': {
+                'id': str(baseline.id),
+                'baseline_number': baseline.baseline_number,
+                'name': baseline.name,
+                'created_at': baseline.created_at,
+            },
+            'summary': summary,
+            'tasks': tasks,
+        })
+
+    @action(detail=True, methods=['get'])
+    def baseline_diff(self, request, pk=None):
+        """
+        Diff two baselines, or a baseline and the live schedule:
+        ?from=1&to=2 (to defaults to "live"), filterable with
+        change=added|removed|changed and min_slip=<days>, paginated
+        """
+        project = self.get_object()
+        params = request.query_params
+        from_number = params.get('from')
+        to_number = params.get('to', 'live')
+
+        baselines = {b.baseline_number: b for b in project.baselines.filter(
+            baseline_number__in=[n for n in (from_number, to_number) if n and n.isdigit()]
+        )}
+        old = baselines.get(int(from_number)) if from_number and from_number.isdigit() else None
+        new = baselines.get(int(to_number)) if to_number.isdigit() else None
+        if old is None or (to_number != 'live' and new is None):
+            return Response({"error": "Baseline not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        if new is None:
+            # Live side changes with every task write
+            diff, _ = cached_result(
+                'baseline-diff',
+                {'from': old.id, 'to': 'live'},
+                [project_tag(project.id)],
+                lambda: diff_columns(baseline_columns(old), capture_task_columns(project.tasks.all())[0])
+            )
+        else:
+            # Baselines are immutable, so a diff between two never goes stale
+            diff, _ = cached_result(
+                'baseline-diff',
+                {'from': old.id, 'to': new.id},
+                [],
+                lambda: diff_columns(baseline_columns(old), baseline_columns(new))
+            )
+
+        positions = np.arange(diff['change'].size)
+        change = params.get('change')
+        if change:
+            codes = [code for code, name in CHANGE_NAMES.items() if name == change]
+            if not codes:
+                return Response(
+                    {"error": f"change must be one of {list(CHANGE_NAMES.values())}"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            positions = positions[diff['change'][positions] == codes[0]]
+        min_slip = params.get('min_slip')
+        if min_slip:
+            try:
+                min_slip = int(min_slip)
+            except ValueError:
+                return Response({"error": "min_slip must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+            slip = np.abs(diff['new']['end'][positions] - diff['old']['end'][positions])
+            positions = positions[(diff['change'][positions] == CHANGED) & (slip >= min_slip)]
+
+        page = self.paginate_queryset(positions)
+        entries = [diff_entry(diff, position) for position in page]
+        titles = dict(Task.objects.filter(id__in=[e['id'] for e in entries]).values_list('id', 'title'))
+        for entry in entries:
+            entry['title'] = titles.get(UUID(entry['id']))
+
+        response = self.get_paginated_response(entries)
+        response.data['summary'] = {
+            name: int((diff['change'] == code).sum()) for code, name in CHANGE_NAMES.items()
+        }
+        return response
+
     @action(detail=True, methods=['get'])
     def activity_logs(self, request, pk=None):
         """
-        Get activity logs for the project
+        Get activity logs for the project, newest first, cursor-paginated
         """
         project = self.get_object()
-        logs = project.activity_logs.select_related('user').all()
-        serializer = ActivityLogSerializer(logs, many=True)
-        return Response(serializer.data)
+        logs = project.activity_logs.select_related('user')
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(logs, request, view=self)
+        serializer = ActivityLogSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     @action(detail=True, methods=['get'])
     def statistics(self, request, pk=None):
@@ -104,6 +326,18 @@ class ProjectViewSet(viewsets.ModelViewSet):
         Get project statistics
         """
         project = self.get_object()
+        statistics, _ = cached_result(
+            'project-statistics',
+            {'project': project.id},
+            [project_tag(project.id)],
+            lambda: self.build_statistics(project)
+        )
+        return Response(statistics)
+
+    def build_statistics(self, project):
+        """
+        Compute the figures returned by the statistics action
+        """
         tasks = project.tasks.all()
 
         statistics = {
@@ -117,27 +351,94 @@ class ProjectViewSet(viewsets.ModelViewSet):
             'progress_percentage': project.progress_percentage,
         }
 
-        return Response(statistics)
+        return statistics
 
 
-class ProjectBaselineViewSet(viewsets.ReadOnlyModelViewSet):
+class ProjectBaselineViewSet(ProjectScopedMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for viewing project baselines
     """
     queryset = ProjectBaseline.objects.select_related('project', 'created_by').all()
     serializer_class = ProjectBaselineSerializer
-    permission_classes = (IsAuthenticated,)
     filter_backends = (DjangoFilterBackend,)
     filterset_fields = ('project',)
 
 
-class ActivityLogViewSet(viewsets.ReadOnlyModelViewSet):
+class BaselineCaptureJobViewSet(ProjectScopedMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet for polling background baseline captures
+    """
+    queryset = BaselineCaptureJob.objects.select_related('baseline').all()
+    serializer_class = BaselineCaptureJobSerializer
+    filter_backends = (DjangoFilterBackend,)
+    filterset_fields = ('project', 'status')
+
+
+class ActivityLogViewSet(ProjectScopedMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for viewing activity logs
     """
     queryset = ActivityLog.objects.select_related('project', 'user').all()
     serializer_class = ActivityLogSerializer
-    permission_classes = (IsAuthenticated,)
-    filter_backends = (DjangoFilterBackend, filters.OrderingFilter)
+    # Newest first by (created_at, id); deep pages cost the same as the first
+    pagination_class = KeysetPagination
+    filter_backends = (DjangoFilterBackend,)
     filterset_fields = ('project', 'action', 'entity_type')
-    ordering = ('-created_at',)
+
+    @action(detail=False, methods=['get'])
+    def feed(self, request):
+        """
+        Activity from every project the current user belongs to, newest first,
+        cursor-paginated; ?project=<id> narrows it to one project
+        """
+        entries = request.user.activity_feed.select_related('activity__user').filter(
+            # Always true; lets PostgreSQL prune activity_logs partitions in the join
+            activity__created_at=F('created_at')
+        )
+        if request.query_params.get('project'):
+            entries = entries.filter(project_id=request.query_params['project'])
+
+        paginator = FeedPagination()
+        page = paginator.paginate_queryset(entries, request, view=self)
+        serializer = ActivityLogSerializer([entry.activity for entry in page], many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def archived(self, request):
+        """
+        Search one archived month: ?month=YYYY-MM, optionally filtered by
+        project, action, entity_type, entity_id and search (description text)
+        """
+        try:
+            month = datetime.strptime(request.query_params.get('month', ''), '%Y-%m')
+        except ValueError:
+            return Response({"error": "month must look like YYYY-MM"}, status=status.HTTP_400_BAD_REQUEST)
+
+        params = request.query_params
+        rows = search_archives(
+            month,
+            project=params.get('project'),
+            action=params.get('action'),
+            entity_type=params.get('entity_type'),
+            entity_id=params.get('entity_id'),
+            search=params.get('search')
+        )
+        access = get_access(request.user)
+        rows = [row for row in rows if access.can_view(row['project_id'])]
+        paginator = PageNumberPagination()
+        page = paginator.paginate_queryset(rows, request, view=self)
+        return paginator.get_paginated_response([
+            {
+                'id': row['id'],
+                'project': row['project_id'],
+                'user': row['user_id'],
+                'user_name': f"{row['user__first_name'] or ''} {row['user__last_name'] or ''}".strip(),
+                'action': row['action'],
+                'entity_type': row['entity_type'],
+                'entity_id': row['entity_id'],
+                'description': row['description'],
+                'changes': row['changes'],
+                'created_at': row['created_at'],
+            }
+            for row in page
+        ])
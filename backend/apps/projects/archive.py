@@ -0,0 +1,334 @@
+"""
+Activity log partitions, retention and archives.
+
+On PostgreSQL ``activity_logs`` is partitioned by month (see migration
+0004_activity_log_partitions). Months older than the retention window are
+written to gzipped JSON-lines files under ACTIVITY_ARCHIVE_ROOT, indexed by
+ActivityLogArchive, and then removed from the hot table: by detaching and
+dropping the month's partition where there is one, otherwise with batched
+deletes. Archived months can still be searched on demand.
+"""
+import gzip
+import heapq
+import json
+import os
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.projects.models import ActivityLog, ActivityLogArchive, ActivityFeedEntry
+
+
+ARCHIVE_CHUNK_SIZE = 5000
+
+# Columns written to archive files, in order
+ARCHIVE_FIELDS = (
+    'id', 'project_id', 'user_id', 'user__first_name', 'user__last_name',
+    'action', 'entity_type', 'entity_id', 'description', 'changes', 'created_at',
+)
+
+# Fixed-width UTC timestamps keep full precision and sort correctly as strings
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%S.%f+00:00'
+
+
+def month_start(value):
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month):
+    return f'activity_logs_y{month:%Y}m{month:%m}'
+
+
+def is_partitioned():
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = 'activity_logs'"
+        )
+        return cursor.fetchone() is not None
+
+
+def _partition_exists(cursor, name):
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [name])
+    return cursor.fetchone()[0]
+
+
+def ensure_partitions(months_ahead=None):
+    """
+    Create monthly partitions from the current month up to months_ahead
+    months out. Rows that already landed in the default partition for a
+    month are moved into the new partition. Returns the partitions created.
+    """
+    if not is_partitioned():
+        return []
+    months_ahead = settings.ACTIVITY_PARTITIONS_AHEAD if months_ahead is None else months_ahead
+
+    created = []
+    current = month_start(timezone.now())
+    with connection.cursor() as cursor:
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            name = partition_name(month)
+            if _partition_exists(cursor, name):
+                continue
+            lower, upper = month.isoformat(), add_months(month, 1).isoformat()
+            with transaction.atomic():
+                cursor.execute(
+                    "SELECT EXISTS (SELECT 1 FROM activity_logs_default WHERE created_at >= %s AND created_at < %s)",
+                    [lower, upper]
+                )
+                if cursor.fetchone()[0]:
+                    # A default partition holding rows of the range blocks CREATE ... PARTITION OF
+                    cursor.execute(f'CREATE TABLE {name} (LIKE activity_logs INCLUDING DEFAULTS)')
+                    cursor.execute(
+                        f'WITH moved AS (DELETE FROM activity_logs_default WHERE created_at >= %s AND created_at < %s '
+                        f'RETURNING *) INSERT INTO {name} SELECT * FROM moved',
+                        [lower, upper]
+                    )
+                    cursor.execute(
+                        f"ALTER TABLE activity_logs ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)",
+                        [lower, upper]
+                    )
+                else:
+                    cursor.execute(
+                        f"CREATE TABLE {name} PARTITION OF activity_logs FOR VALUES FROM (%s) TO (%s)",
+                        [lower, upper]
+                    )
+            created.append(name)
+    return created
+
+
+def _archive_path(month):
+    stamp = timezone.now().strftime('%Y%m%d%H%M%S%f')
+    return os.path.join(f'{month:%Y}', f'activity-{month:%Y-%m}-{stamp}.jsonl.gz')
+
+
+def _full_path(relative_path):
+    return os.path.join(settings.ACTIVITY_ARCHIVE_ROOT, relative_path)
+
+
+def _archive_row(row):
+    row = dict(row)
+    if not isinstance(row['created_at'], str):
+        row['created_at'] = row['created_at'].astimezone(dt_timezone.utc).strftime(TIMESTAMP_FORMAT)
+    return row
+
+
+def _write_archive(month, rows):
+    """
+    Write rows (dicts) to a new archive file and return its index entry, unsaved
+    """
+    relative_path = _archive_path(month)
+    path = _full_path(relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    archive = ActivityLogArchive(month=month.date(), path=relative_path)
+    project_ids = set()
+    first = last = None
+    temporary_path = f'{path}.partial'
+    with gzip.open(temporary_path, 'wt', encoding='utf-8') as handle:
+        for row in rows:
+            row = _archive_row(row)
+            handle.write(json.dumps(row, default=str))
+            handle.write('\n')
+            archive.row_count += 1
+            project_ids.add(str(row['project_id']))
+            first = row['created_at'] if first is None else min(first, row['created_at'])
+            last = row['created_at'] if last is None else max(last, row['created_at'])
+    os.replace(temporary_path, path)
+
+    archive.size_bytes = os.path.getsize(path)
+    archive.project_ids = sorted(project_ids)
+    archive.first_created_at = parse_datetime(first) if first else None
+    archive.last_created_at = parse_datetime(last) if last else None
+    return archive
+
+
+def _hot_rows(month):
+    return ActivityLog.objects.filter(
+        created_at__gte=month, created_at__lt=add_months(month, 1)
+    )
+
+
+def _remove_hot_month(month):
+    """
+    Drop a month from the hot table and the feed index once it is archived
+    """
+    feed_entries = ActivityFeedEntry.objects.filter(created_at__gte=month, created_at__lt=add_months(month, 1))
+    while True:
+        ids = list(feed_entries.values_list('id', flat=True)[:ARCHIVE_CHUNK_SIZE])
+        if not ids:
+            break
+        ActivityFeedEntry.objects.filter(id__in=ids).delete()
+
+    name = partition_name(month)
+    if is_partitioned():
+        with connection.cursor() as cursor:
+            if _partition_exists(cursor, name):
+                cursor.execute(f'ALTER TABLE activity_logs DETACH PARTITION {name}')
+                cursor.execute(f'DROP TABLE {name}')
+                return
+    rows = _hot_rows(month)
+    while True:
+        ids = list(rows.values_list('id', flat=True)[:ARCHIVE_CHUNK_SIZE])
+        if not ids:
+            return
+        ActivityLog.objects.filter(id__in=ids).delete()
+
+
+def archive_month(month):
+    """
+    Archive one month of activity logs and remove it from the hot table.
+    Returns the ActivityLogArchive, or None when the month had no rows.
+    """
+    month = month_start(month)
+    rows = _hot_rows(month).order_by('created_at', 'id').values(*ARCHIVE_FIELDS)
+    if not rows.exists():
+        _remove_hot_month(month)
+        return None
+
+    archive = _write_archive(month, rows.iterator(chunk_size=ARCHIVE_CHUNK_SIZE))
+    try:
+        with transaction.atomic():
+            archive.save()
+            _remove_hot_month(month)
+    except Exception:
+        os.remove(_full_path(archive.path))
+        raise
+    return archive
+
+
+def retention_cutoff(retention_months=None):
+    retention_months = settings.ACTIVITY_LOG_RETENTION_MONTHS if retention_months is None else retention_months
+    return add_months(month_start(timezone.now()), -retention_months)
+
+
+def expired_months(retention_months=None):
+    """
+    Months with hot rows older than the retention window, oldest first
+    """
+    cutoff = retention_cutoff(retention_months)
+    rows = ActivityLog.objects.filter(created_at__lt=cutoff).order_by('created_at')
+    months = []
+    while True:
+        # Jump straight to the next month that has rows instead of probing each one
+        oldest = rows.values_list('created_at', flat=True).first()
+        if oldest is None:
+            return months
+        month = month_start(oldest)
+        months.append(month)
+        rows = rows.filter(created_at__gte=add_months(month, 1))
+
+
+def drop_expired_partitions(retention_months=None):
+    """
+    Drop empty monthly partitions that fall entirely before the retention window
+    """
+    if not is_partitioned():
+        return []
+    cutoff = partition_name(retention_cutoff(retention_months))
+    dropped = []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'activity_logs'::regclass AND c.relname ~ '^activity_logs_y[0-9]{4}m[0-9]{2}$' "
+            "AND c.relname < %s ORDER BY c.relname",
+            [cutoff]
+        )
+        for (name,) in cursor.fetchall():
+            cursor.execute(f'SELECT EXISTS (SELECT 1 FROM {name})')
+            if cursor.fetchone()[0]:
+                continue
+            with transaction.atomic():
+                cursor.execute(f'ALTER TABLE activity_logs DETACH PARTITION {name}')
+                cursor.execute(f'DROP TABLE {name}')
+            dropped.append(name)
+    return dropped
+
+
+def archive_expired(retention_months=None):
+    """
+    Archive every month older than the retention window and drop its partitions
+    """
+    archives = [
+        archive for archive in (archive_month(month) for month in expired_months(retention_months))
+        if archive is not None
+    ]
+    drop_expired_partitions(retention_months)
+    return archives
+
+
+def read_archive(archive):
+    """
+    Yield the rows (dicts) stored in an archive file
+    """
+    with gzip.open(_full_path(archive.path), 'rt', encoding='utf-8') as handle:
+        for line in handle:
+            yield json.loads(line)
+
+
+def compact_archives(month=None):
+    """
+    Merge months archived in several files (e.g. late rows archived by a
+    later run) into one file per month. Returns the new index entries.
+    """
+    archives = ActivityLogArchive.objects.order_by('month', 'archived_at')
+    if month is not None:
+        archives = archives.filter(month=month_start(month).date())
+
+    by_month = {}
+    for archive in archives:
+        by_month.setdefault(archive.month, []).append(archive)
+
+    compacted = []
+    for archive_month_date, parts in by_month.items():
+        if len(parts) < 2:
+            continue
+        # Each part is already sorted, so the merge streams instead of loading the month
+        rows = heapq.merge(
+            *(read_archive(part) for part in parts),
+            key=lambda row: (row['created_at'], row['id'])
+        )
+        merged = _write_archive(month_start(archive_month_date), rows)
+        with transaction.atomic():
+            merged.save()
+            ActivityLogArchive.objects.filter(id__in=[part.id for part in parts]).delete()
+        for part in parts:
+            os.remove(_full_path(part.path))
+        compacted.append(merged)
+    return compacted
+
+
+def search_archives(month, project=None, action=None, entity_type=None, entity_id=None, search=None):
+    """
+    Rows of one archived month matching the given filters, newest first
+    """
+    archives = ActivityLogArchive.objects.filter(month=month_start(month).date())
+    matches = []
+    for archive in archives:
+        if project and str(project) not in archive.project_ids:
+            continue
+        for row in read_archive(archive):
+            if project and row['project_id'] != str(project):
+                continue
+            if action and row['action'] != action:
+                continue
+            if entity_type and row['entity_type'] != entity_type:
+                continue
+            if entity_id and row['entity_id'] != str(entity_id):
+                continue
+            if search and search.lower() not in row['description'].lower():
+                continue
+            matches.append(row)
+    matches.sort(key=lambda row: row['created_at'], reverse=True)
+    return matches
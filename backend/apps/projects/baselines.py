@@ -0,0 +1,273 @@
+"""
+Columnar baseline snapshots.
+
+A baseline stores its task schedule as parallel arrays (id, start, end,
+duration, cost) compressed into a single blob, instead of one JSON object per
+task. Comparing against the live schedule is a sort-merge join over the id
+arrays, done with NumPy.
+"""
+import io
+from datetime import date
+from itertools import islice
+
+import numpy as np
+from django.db.models import CharField, FloatField
+from django.db.models.functions import Cast
+
+
+BASELINE_COLUMNS = ('id', 'start', 'end', 'duration', 'cost')
+
+# Ids are stored as 32-char hex, dates as int32 days since the Unix epoch,
+# costs as int64 cents
+ID_DTYPE = 'S32'
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def _dates_to_days(dates):
+    return np.fromiter((d.toordinal() for d in dates), dtype=np.int32, count=len(dates)) - EPOCH_ORDINAL
+
+
+def days_to_dates(days):
+    """
+    Convert an array of epoch days back into datetime.date objects
+    """
+    return days.astype('datetime64[D]').astype(object)
+
+
+def _money_to_cents(values):
+    return np.rint(np.array(values, dtype=np.float64) * 100).astype(np.int64)
+
+
+def empty_columns():
+    return {
+        'id': np.empty(0, dtype=ID_DTYPE),
+        'start': np.empty(0, dtype=np.int32),
+        'end': np.empty(0, dtype=np.int32),
+        'duration': np.empty(0, dtype=np.int32),
+        'cost': np.empty(0, dtype=np.int64),
+    }
+
+
+def columns_from_rows(ids, starts, ends, durations, costs):
+    """
+    Build the column arrays from parallel Python lists; ids are hex strings
+    """
+    if not ids:
+        return empty_columns()
+    return {
+        'id': np.array(ids, dtype=ID_DTYPE),
+        'start': _dates_to_days(starts),
+        'end': _dates_to_days(ends),
+        'duration': np.array(durations, dtype=np.int32),
+        'cost': _money_to_cents(costs),
+    }
+
+
+def concat_columns(parts):
+    """
+    Join column sets built chunk by chunk
+    """
+    if not parts:
+        return empty_columns()
+    return {name: np.concatenate([part[name] for part in parts]) for name in BASELINE_COLUMNS}
+
+
+def capture_task_columns(tasks, with_titles=False, chunk_size=5000, progress=None):
+    """
+    Read a task queryset into column arrays, plus titles in the same order when asked.
+
+    Rows come from a server-side cursor and each chunk is converted to arrays
+    before the next one is read, so only one chunk of Python tuples is alive at
+    a time. Ids and costs are cast in SQL so no UUID or Decimal objects are
+    built per row. ``progress`` is called with the number of rows read so far.
+    """
+    fields = ['id_text', 'start_date', 'end_date', 'duration', 'cost']
+    if with_titles:
+        fields.append('title')
+    rows = tasks.order_by().annotate(
+        id_text=Cast('id', output_field=CharField()),
+        cost=Cast('estimated_cost', output_field=FloatField()),
+    ).values_list(*fields).iterator(chunk_size=chunk_size)
+
+    parts, titles, total = [], [], 0
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        ids, starts, ends, durations, costs = [], [], [], [], []
+        for row in chunk:
+            ids.append(row[0].replace('-', ''))
+            starts.append(row[1])
+            ends.append(row[2])
+            durations.append(row[3])
+            costs.append(row[4])
+            if with_titles:
+                titles.append(row[5])
+        parts.append(columns_from_rows(ids, starts, ends, durations, costs))
+        total += len(chunk)
+        if progress:
+            progress(total)
+    return concat_columns(parts), titles
+
+
+def format_id(hex_id):
+    """
+    Canonical UUID string for a stored hex id
+    """
+    hex_id = hex_id.decode()
+    return f'{hex_id[:8]}-{hex_id[8:12]}-{hex_id[12:16]}-{hex_id[16:20]}-{hex_id[20:]}'
+
+
+def pack_columns(columns):
+    """
+    Serialize column arrays into one compressed blob
+    """
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **{name: columns[name] for name in BASELINE_COLUMNS})
+    return buffer.getvalue()
+
+
+def unpack_columns(blob):
+    with np.load(io.BytesIO(bytes(blob)), allow_pickle=False) as data:
+        return {name: data[name] for name in BASELINE_COLUMNS}
+
+
+def columns_from_legacy(baseline_data):
+    """
+    Columns for baselines saved before columnar storage (tasks inside the JSON blob)
+    """
+    tasks = baseline_data.get('tasks') or []
+    return columns_from_rows(
+        [task['id'].replace('-', '') for task in tasks],
+        [date.fromisoformat(task['start_date']) for task in tasks],
+        [date.fromisoformat(task['end_date']) for task in tasks],
+        [task['duration'] for task in tasks],
+        [task['estimated_cost'] for task in tasks],
+    )
+
+
+def baseline_columns(baseline):
+    """
+    Column arrays for a ProjectBaseline, whichever format it was stored in
+    """
+    if baseline.task_columns:
+        return unpack_columns(baseline.task_columns)
+    return columns_from_legacy(baseline.baseline_data or {})
+
+
+def align(old, new):
+    """
+    Sort-merge join two column sets on task id.
+
+    Returns (old_index, new_index) for tasks present in both, plus masks of
+    tasks only present in old (removed) and only in new (added).
+    """
+    _, old_index, new_index = np.intersect1d(old['id'], new['id'], assume_unique=True, return_indices=True)
+    removed = np.ones(old['id'].size, dtype=bool)
+    removed[old_index] = False
+    added = np.ones(new['id'].size, dtype=bool)
+    added[new_index] = False
+    return old_index, new_index, removed, added
+
+
+def compute_variance(old, new):
+    """
+    Per-task slips and cost deltas between two column sets, as arrays
+    """
+    old_index, new_index, removed, added = align(old, new)
+    return {
+        'id': new['id'][new_index],
+        'new_index': new_index,
+        'start_slip': new['start'][new_index] - old['start'][old_index],
+        'finish_slip': new['end'][new_index] - old['end'][old_index],
+        'duration_delta': new['duration'][new_index] - old['duration'][old_index],
+        'cost_delta': new['cost'][new_index] - old['cost'][old_index],
+        'removed': old['id'][removed],
+        'added': new['id'][added],
+    }
+
+
+# Change codes used in diffs
+CHANGED, ADDED, REMOVED = 0, 1, 2
+CHANGE_NAMES = {CHANGED: 'changed', ADDED: 'added', REMOVED: 'removed'}
+
+
+def diff_columns(old, new):
+    """
+    Full diff between two column sets as flat arrays, one entry per added,
+    removed or changed task. Changed tasks come first, largest finish slip first.
+    """
+    old_index, new_index, removed, added = align(old, new)
+    finish_slip = new['end'][new_index] - old['end'][old_index]
+    changed = (
+        (new['start'][new_index] != old['start'][old_index]) | (finish_slip != 0)
+        | (new['duration'][new_index] != old['duration'][old_index])
+        | (new['cost'][new_index] != old['cost'][old_index])
+    )
+    old_index, new_index, finish_slip = old_index[changed], new_index[changed], finish_slip[changed]
+    order = np.argsort(-np.abs(finish_slip), kind='stable')
+    old_index, new_index = old_index[order], new_index[order]
+
+    removed_index = np.flatnonzero(removed)
+    added_index = np.flatnonzero(added)
+    n_changed, n_added, n_removed = old_index.size, added_index.size, removed_index.size
+
+    def side(columns, index, present):
+        # Values for one side of the diff; entries absent on that side are zero-filled
+        values = {}
+        for name in BASELINE_COLUMNS[1:]:
+            column = np.zeros(n_changed + n_added + n_removed, dtype=columns[name].dtype)
+            column[present] = columns[name][index]
+            values[name] = column
+        return values
+
+    total = n_changed + n_added + n_removed
+    old_present = np.r_[np.arange(n_changed), np.arange(n_changed + n_added, total)]
+    new_present = np.arange(n_changed + n_added)
+
+    return {
+        'id': np.concatenate([new['id'][new_index], new['id'][added_index], old['id'][removed_index]]),
+        'change': np.concatenate([
+            np.full(n_changed, CHANGED, dtype=np.int8),
+            np.full(n_added, ADDED, dtype=np.int8),
+            np.full(n_removed, REMOVED, dtype=np.int8),
+        ]),
+        'old': side(old, np.r_[old_index, removed_index], old_present),
+        'new': side(new, np.r_[new_index, added_index], new_present),
+    }
+
+
+def diff_entry(diff, position):
+    """
+    One diff entry with field-level deltas, ready to serialize
+    """
+    change = int(diff['change'][position])
+    old = {name: int(values[position]) for name, values in diff['old'].items()}
+    new = {name: int(values[position]) for name, values in diff['new'].items()}
+
+    def as_date(days):
+        return date.fromordinal(days + EPOCH_ORDINAL)
+
+    def field(name, convert, delta_key):
+        before = convert(old[name]) if change != ADDED else None
+        after = convert(new[name]) if change != REMOVED else None
+        value = {'from': before, 'to': after}
+        if change == CHANGED:
+            delta = new[name] - old[name]
+            value[delta_key] = delta / 100 if name == 'cost' else delta
+        return value
+
+    fields = {
+        'start_date': field('start', as_date, 'delta_days'),
+        'end_date': field('end', as_date, 'delta_days'),
+        'duration': field('duration', int, 'delta'),
+        'cost': field('cost', lambda cents: cents / 100, 'delta'),
+    }
+    if change == CHANGED:
+        fields = {name: value for name, value in fields.items() if value.get('delta_days', value.get('delta'))}
+
+    return {
+        'id': format_id(diff['id'][position]),
+        'change': CHANGE_NAMES[change],
+        'fields': fields,
+    }
@@ -0,0 +1,82 @@
+"""
+Per-user activity feed.
+
+Each ActivityLog entry is copied into ActivityFeedEntry once per member of
+its project when the entry is written, so reading a user's feed is a single
+range scan on (user, created_at, activity) no matter how many projects the
+user belongs to.
+"""
+from django.conf import settings
+
+from apps.projects.models import Project, ActivityLog, ActivityFeedEntry
+
+
+FEED_BATCH_SIZE = 2000
+
+
+def project_user_ids(project_ids):
+    """
+    {project id: set of user ids} for the team members and creator of each project
+    """
+    members = {project_id: set() for project_id in project_ids}
+    through = Project.team_members.through.objects.filter(project_id__in=project_ids)
+    for project_id, user_id in through.values_list('project_id', 'teammember__user_id'):
+        members[project_id].add(user_id)
+    creators = Project.objects.filter(id__in=project_ids, created_by__isnull=False)
+    for project_id, user_id in creators.values_list('id', 'created_by_id'):
+        members[project_id].add(user_id)
+    return members
+
+
+def fan_out(entries):
+    """
+    Add saved ActivityLog entries to the feeds of their projects' members
+    """
+    if not entries:
+        return
+    members = project_user_ids({entry.project_id for entry in entries})
+    ActivityFeedEntry.objects.bulk_create(
+        [
+            ActivityFeedEntry(
+                user_id=user_id,
+                activity_id=entry.id,
+                project_id=entry.project_id,
+                created_at=entry.created_at
+            )
+            for entry in entries
+            for user_id in members.get(entry.project_id, ())
+        ],
+        batch_size=FEED_BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def backfill(project_id, user_ids, limit=None):
+    """
+    Give users who joined a project its most recent activity
+    """
+    limit = settings.ACTIVITY_FEED_BACKFILL if limit is None else limit
+    if not user_ids or not limit:
+        return
+    recent = ActivityLog.objects.filter(project_id=project_id).order_by('-created_at', '-id').values_list(
+        'id', 'created_at'
+    )[:limit]
+    ActivityFeedEntry.objects.bulk_create(
+        [
+            ActivityFeedEntry(user_id=user_id, activity_id=activity_id, project_id=project_id, created_at=created_at)
+            for activity_id, created_at in recent
+            for user_id in user_ids
+        ],
+        batch_size=FEED_BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def remove(project_id, user_ids):
+    """
+    Drop a project's activity from the feeds of users who left it
+    """
+    creator_id = Project.objects.filter(id=project_id).values_list('created_by_id', flat=True).first()
+    user_ids = [user_id for user_id in user_ids if user_id != creator_id]
+    if user_ids:
+        ActivityFeedEntry.objects.filter(project_id=project_id, user_id__in=user_ids).delete()
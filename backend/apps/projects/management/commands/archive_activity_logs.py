@@ -0,0 +1,46 @@
+"""
+Archive activity logs older than the retention window and maintain partitions
+"""
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.projects.archive import (
+    archive_expired,
+    archive_month,
+    compact_archives,
+    ensure_partitions
+)
+
+
+class Command(BaseCommand):
+    help = 'Move expired activity log months into compressed archive files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-months', type=int, default=None, help='Months to keep in the hot table')
+        parser.add_argument('--month', default=None, help='Archive a single month (YYYY-MM) regardless of retention')
+        parser.add_argument('--compact', action='store_true', help='Merge months archived in several files')
+
+    def handle(self, *args, **options):
+        created = ensure_partitions()
+        if created:
+            self.stdout.write(f'Created partitions: {", ".join(created)}')
+
+        if options['month']:
+            try:
+                month = datetime.strptime(options['month'], '%Y-%m')
+            except ValueError:
+                raise CommandError('--month must look like YYYY-MM')
+            archive = archive_month(month)
+            archives = [archive] if archive else []
+        else:
+            archives = archive_expired(retention_months=options['retention_months'])
+
+        for archive in archives:
+            self.stdout.write(f'Archived {archive.row_count} rows for {archive.month:%Y-%m} to {archive.path}')
+
+        if options['compact']:
+            for archive in compact_archives():
+                self.stdout.write(f'Compacted {archive.month:%Y-%m} into {archive.path}')
+
+        self.stdout.write(self.style.SUCCESS(f'Archived {len(archives)} months'))
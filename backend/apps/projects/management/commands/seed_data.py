@@ -0,0 +1,75 @@
+"""
+Generate a reproducible synthetic dataset for benchmarks and load tests
+"""
+import os
+import time
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.projects.seeding import SEED_PASSWORD, SEED_TODAY, generate, rebuild_derived, seed_prefix
+
+
+class Command(BaseCommand):
+    help = (
+        'Create users, team members, clients, projects, hierarchical tasks, dependencies, '
+        'assignments, comments and baselines from a seed'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42, help='Same seed and scale give the same data')
+        parser.add_argument('--tasks', type=int, default=10000, help='Total number of tasks')
+        parser.add_argument('--tasks-per-project', type=int, default=200)
+        parser.add_argument('--members', type=int, default=None, help='Users with a team member (default: tasks / 250)')
+        parser.add_argument('--clients', type=int, default=None, help='Default: projects / 4')
+        parser.add_argument('--comments-per-task', type=float, default=0.5, help='Mean comments per subtask')
+        parser.add_argument('--baselines', type=int, default=1, help='Baselines per project')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk insert')
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Worker processes writing projects (always 1 on SQLite)'
+        )
+        parser.add_argument(
+            '--today', type=date.fromisoformat, default=SEED_TODAY,
+            help=f'Date the data is generated as of, YYYY-MM-DD (default: {SEED_TODAY})'
+        )
+        parser.add_argument('--skip-derived', action='store_true', help='Do not rebuild search and other derived data')
+
+    def handle(self, *args, **options):
+        seed = options['seed']
+        if options['tasks'] < 1 or options['tasks_per_project'] < 2:
+            raise CommandError('--tasks must be positive and --tasks-per-project at least 2')
+        if get_user_model().objects.filter(username__startswith=seed_prefix(seed)).exists():
+            raise CommandError(f'Data for seed {seed} already exists; use another --seed')
+        if options['workers'] > 1 and connection.vendor == 'sqlite':
+            self.stdout.write('SQLite allows one writer; seeding with a single worker')
+
+        started = time.monotonic()
+
+        def progress(counts):
+            done = ', '.join(f'{count} {table}' for table, count in counts.items())
+            self.stdout.write(f'[{time.monotonic() - started:.0f}s] {done}')
+
+        counts = generate(
+            seed=seed,
+            tasks=options['tasks'],
+            tasks_per_project=options['tasks_per_project'],
+            members=options['members'],
+            clients=options['clients'],
+            comments_per_task=options['comments_per_task'],
+            baselines=options['baselines'],
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            progress=progress,
+            today=options['today'],
+        )
+        if not options['skip_derived']:
+            documents = rebuild_derived(seed)
+            self.stdout.write(f'Rebuilt derived data ({documents} search documents)')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {counts.get("tasks", 0)} tasks in {time.monotonic() - started:.0f}s; '
+            f'users are {seed_prefix(seed)}NNNNNNN with password "{SEED_PASSWORD}"'
+        ))
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.1 on 2026-10-18 23:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projectbaseline',
+            name='task_columns',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='projectbaseline',
+            name='task_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='projectbaseline',
+            name='baseline_data',
+            field=models.JSONField(help_text='Snapshot of project-level state'),
+        ),
+    ]
@@ -0,0 +1,139 @@
+# Generated by Django 5.0.1 on 2026-10-19 00:02
+
+import re
+import uuid
+from datetime import datetime, timezone
+
+from django.db import migrations, models
+
+
+# activity_logs becomes a table partitioned by month on created_at (PostgreSQL
+# only). A partitioned table's unique keys must contain the partition column,
+# so the database primary key is (id, created_at); Django keeps using id.
+# Other databases keep the plain table.
+
+PARTITIONS_AHEAD = 3
+
+
+def _month(value):
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def _next_month(month):
+    return month.replace(year=month.year + month.month // 12, month=month.month % 12 + 1)
+
+
+def _definitions(cursor, table):
+    """
+    Secondary indexes and foreign keys of a table, to recreate on its replacement
+    """
+    cursor.execute(
+        """
+        SELECT indexdef FROM pg_indexes
+        WHERE tablename = %s AND indexname NOT IN (
+            SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype IN ('p', 'u')
+        )
+        """,
+        [table, table]
+    )
+    indexes = [
+        re.sub(r' ON (ONLY )?(\S+\.)?' + table + ' ', ' ON activity_logs ', row[0])
+        for row in cursor.fetchall()
+    ]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+        [table]
+    )
+    foreign_keys = cursor.fetchall()
+    return indexes, foreign_keys
+
+
+def _replace_table(cursor, old_name, create_sql, primary_key, after_create=None):
+    cursor.execute(f'ALTER TABLE activity_logs RENAME TO {old_name}')
+    cursor.execute(f'ALTER TABLE {old_name} RENAME CONSTRAINT activity_logs_pkey TO {old_name}_pkey')
+    indexes, foreign_keys = _definitions(cursor, old_name)
+
+    cursor.execute(create_sql.format(old=old_name))
+    cursor.execute(f'ALTER TABLE activity_logs ADD CONSTRAINT activity_logs_pkey PRIMARY KEY ({primary_key})')
+    if after_create:
+        after_create()
+    cursor.execute(f'INSERT INTO activity_logs SELECT * FROM {old_name}')
+    cursor.execute(f'DROP TABLE {old_name} CASCADE')
+
+    for definition in indexes:
+        cursor.execute(definition)
+    for name, definition in foreign_keys:
+        cursor.execute(f'ALTER TABLE activity_logs ADD CONSTRAINT {name} {definition}')
+
+
+def partition_activity_logs(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        def create_partitions():
+            cursor.execute('CREATE TABLE activity_logs_default PARTITION OF activity_logs DEFAULT')
+            cursor.execute('SELECT min(created_at) FROM activity_logs_unpartitioned')
+            oldest = cursor.fetchone()[0]
+            now = datetime.now(timezone.utc)
+            month = _month(oldest or now)
+            last = _month(now)
+            for _ in range(PARTITIONS_AHEAD):
+                last = _next_month(last)
+            while month <= last:
+                upper = _next_month(month)
+                cursor.execute(
+                    f"CREATE TABLE activity_logs_y{month:%Y}m{month:%m} PARTITION OF activity_logs "
+                    f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+                )
+                month = upper
+
+        _replace_table(
+            cursor,
+            'activity_logs_unpartitioned',
+            'CREATE TABLE activity_logs (LIKE {old} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)',
+            'id, created_at',
+            after_create=create_partitions
+        )
+
+
+def unpartition_activity_logs(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        _replace_table(
+            cursor,
+            'activity_logs_partitioned',
+            'CREATE TABLE activity_logs (LIKE {old} INCLUDING DEFAULTS)',
+            'id'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0003_baselinecapturejob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityLogArchive',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('month', models.DateField(db_index=True, help_text='First day of the archived month')),
+                ('path', models.CharField(max_length=255, unique=True)),
+                ('row_count', models.IntegerField(default=0)),
+                ('size_bytes', models.BigIntegerField(default=0)),
+                ('project_ids', models.JSONField(blank=True, default=list)),
+                ('first_created_at', models.DateTimeField(blank=True, null=True)),
+                ('last_created_at', models.DateTimeField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'activity_log_archives',
+                'ordering': ['-month', 'archived_at'],
+            },
+        ),
+        migrations.RunPython(partition_activity_logs, unpartition_activity_logs),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.0.1 on 2026-10-19 00:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0004_activity_log_partitions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityFeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'activity_feed_entries',
+            },
+        ),
+        migrations.AlterModelOptions(
+            name='activitylog',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+        migrations.RemoveIndex(
+            model_name='activitylog',
+            name='activity_lo_project_d86fcc_idx',
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['project', '-created_at', '-id'], name='activity_project_keyset_idx'),
+        ),
+        migrations.AddField(
+            model_name='activityfeedentry',
+            name='activity',
+            field=models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='projects.activitylog'),
+        ),
+        migrations.AddField(
+            model_name='activityfeedentry',
+            name='project',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='projects.project'),
+        ),
+        migrations.AddField(
+            model_name='activityfeedentry',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_feed', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='activityfeedentry',
+            index=models.Index(fields=['user', '-created_at', '-activity'], name='activity_feed_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activityfeedentry',
+            index=models.Index(fields=['project', 'user'], name='activity_fe_project_c6bcfe_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activityfeedentry',
+            index=models.Index(fields=['created_at'], name='activity_fe_created_d3c00a_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='activityfeedentry',
+            unique_together={('user', 'activity')},
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.0.1 on 2026-10-19 00:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_access(apps, schema_editor):
+    Project = apps.get_model('projects', 'Project')
+    ProjectAccess = apps.get_model('projects', 'ProjectAccess')
+    now = timezone.now()
+
+    roles = {}
+    through = Project.team_members.through.objects.values_list('project_id', 'teammember__user_id')
+    for project_id, user_id in through.iterator():
+        roles[(project_id, user_id)] = 'member'
+    creators = Project.objects.filter(created_by__isnull=False).values_list('id', 'created_by_id')
+    for project_id, user_id in creators.iterator():
+        roles[(project_id, user_id)] = 'owner'
+
+    ProjectAccess.objects.bulk_create(
+        [
+            ProjectAccess(project_id=project_id, user_id=user_id, role=role, created_at=now)
+            for (project_id, user_id), role in roles.items()
+        ],
+        batch_size=2000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0005_activity_feed'),
+        ('resources', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectAccess',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('owner', 'Owner'), ('member', 'Member'), ('viewer', 'Viewer')], max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='access', to='projects.project')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='project_access', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'project_access',
+                'indexes': [models.Index(fields=['project', 'role'], name='project_acc_project_556be3_idx')],
+                'unique_together': {('user', 'project')},
+            },
+        ),
+        migrations.RunPython(backfill_access, migrations.RunPython.noop),
+    ]
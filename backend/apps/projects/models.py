@@ -6,8 +6,27 @@ from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator
 
+from apps.projects.activity import ActivityTrackedMixin
 
-class Project(models.Model):
+
+class ProjectQuerySet(models.QuerySet):
+    """
+    QuerySet helpers for projects
+    """
+    def with_progress(self):
+        """
+        Annotate the average task progress, which progress_percentage then
+        reads instead of loading the project's tasks
+        """
+        from apps.tasks.models import Task
+
+        average = Task.objects.filter(project_id=models.OuterRef('pk')).order_by().values('project_id').annotate(
+            average=models.Avg('progress')
+        ).values('average')
+        return self.annotate(average_task_progress=models.Subquery(average, output_field=models.FloatField()))
+
+
+class Project(ActivityTrackedMixin, models.Model):
     """
     Project Information
     """
@@ -81,6 +100,8 @@ class Project(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProjectQuerySet.as_manager()
+
     class Meta:
         db_table = 'projects'
         ordering = ['-created_at']
@@ -108,6 +129,9 @@ class Project(models.Model):
     @property
     def progress_percentage(self):
         """Calculate overall project progress based on tasks"""
+        if 'average_task_progress' in self.__dict__:
+            average = self.average_task_progress
+            return round(average) if average is not None else 0
         tasks = self.tasks.all()
         if not tasks:
             return 0
@@ -115,6 +139,39 @@ class Project(models.Model):
         return round(total_progress / len(tasks))
 
 
+class ProjectAccess(models.Model):
+    """
+    A user's role on a project. Owner rows follow created_by and member rows
+    follow team_members (see apps.projects.access); viewer rows are granted
+    explicitly.
+    """
+    ROLE_CHOICES = [
+        ('owner', 'Owner'),
+        ('member', 'Member'),
+        ('viewer', 'Viewer'),
+    ]
+
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='access')
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='project_access'
+    )
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'project_access'
+        # (user, project) serves the per-user access lists and their subqueries
+        unique_together = ('user', 'project')
+        indexes = [
+            models.Index(fields=['project', 'role']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.project_id} ({self.role})"
+
+
 class ProjectBaseline(models.Model):
     """
     Multiple baselines per project
@@ -131,9 +188,13 @@ class ProjectBaseline(models.Model):
 
     # Snapshot data (JSONField for flexibility)
     baseline_data = models.JSONField(
-        help_text="Complete snapshot of project state"
+        help_text="Snapshot of project-level state"
     )
 
+    # Task schedule as compressed column arrays (see apps.projects.baselines)
+    task_columns = models.BinaryField(null=True, blank=True, editable=False)
+    task_count = models.IntegerField(default=0)
+
     created_at = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -150,6 +211,70 @@ class ProjectBaseline(models.Model):
         return f"{self.project.name} - {self.name}"
 
 
+class BaselineCaptureJob(models.Model):
+    """
+    Background capture of a project baseline
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        related_name='baseline_jobs'
+    )
+    name = models.CharField(max_length=100, blank=True)
+    idempotency_key = models.CharField(max_length=100, null=True, blank=True)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    tasks_total = models.IntegerField(default=0)
+    tasks_processed = models.IntegerField(default=0)
+    baseline = models.OneToOneField(
+        ProjectBaseline,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='capture_job'
+    )
+    error = models.TextField(blank=True)
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'baseline_capture_jobs'
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['project', 'idempotency_key'],
+                condition=models.Q(idempotency_key__isnull=False),
+                name='unique_baseline_job_idempotency_key'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.project.name} - baseline capture ({self.status})"
+
+    @property
+    def progress_percentage(self):
+        if self.status == 'completed':
+            return 100
+        if not self.tasks_total:
+            return 0
+        return int(self.tasks_processed * 100 / self.tasks_total)
+
+
 class ActivityLog(models.Model):
     """
     Audit trail for project activities
@@ -178,11 +303,81 @@ class ActivityLog(models.Model):
 
     class Meta:
         db_table = 'activity_logs'
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
         indexes = [
-            models.Index(fields=['project', '-created_at']),
+            # Matches the (created_at, id) keyset order used by the paginated feeds
+            models.Index(fields=['project', '-created_at', '-id'], name='activity_project_keyset_idx'),
             models.Index(fields=['entity_type', 'entity_id']),
         ]
 
     def __str__(self):
         return f"{self.action} - {self.entity_type} - {self.created_at}"
+
+
+class ActivityFeedEntry(models.Model):
+    """
+    Per-user index of activity from the projects the user belongs to, written
+    when the log entry is, so a user's feed is one index range scan
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='activity_feed'
+    )
+    # No database constraint: activity_logs is partitioned on PostgreSQL and
+    # archived months are removed from it (their feed entries go with them)
+    activity = models.ForeignKey(
+        ActivityLog,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        related_name='+'
+    )
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        related_name='+',
+        db_index=False
+    )
+    # Copied from the activity so the feed can be ordered without a join
+    created_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'activity_feed_entries'
+        unique_together = ('user', 'activity')
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-activity'], name='activity_feed_keyset_idx'),
+            models.Index(fields=['project', 'user']),
+            # Retention removes archived months by date
+            models.Index(fields=['created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} <- {self.activity_id}"
+
+
+class ActivityLogArchive(models.Model):
+    """
+    Index of a compressed file holding one month of archived activity logs
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    month = models.DateField(db_index=True, help_text="First day of the archived month")
+
+    # Path relative to ACTIVITY_ARCHIVE_ROOT of a gzipped JSON-lines file
+    path = models.CharField(max_length=255, unique=True)
+    row_count = models.IntegerField(default=0)
+    size_bytes = models.BigIntegerField(default=0)
+
+    # Lets a search skip files that hold nothing for the project it asks about
+    project_ids = models.JSONField(default=list, blank=True)
+    first_created_at = models.DateTimeField(null=True, blank=True)
+    last_created_at = models.DateTimeField(null=True, blank=True)
+
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'activity_log_archives'
+        ordering = ['-month', 'archived_at']
+
+    def __str__(self):
+        return f"Activity logs {self.month:%Y-%m} ({self.row_count} rows)"
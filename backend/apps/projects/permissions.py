@@ -0,0 +1,71 @@
+"""
+Project access enforcement for API views
+"""
+from operator import attrgetter
+
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
+
+from apps.projects.access import EDIT_ROLES, get_access, scope_queryset
+
+
+class ProjectAccessPermission(IsAuthenticated):
+    """
+    Reads are limited by the scoped queryset; writes need an owner or member
+    role on the object's project, and deleting a project needs its owner
+    """
+    def has_object_permission(self, request, view, obj):
+        if request.method in SAFE_METHODS:
+            return True
+        access = get_access(request.user)
+        role = access.role(view.project_id_of(obj))
+        if view.project_attr == 'pk' and request.method == 'DELETE':
+            return role == 'owner'
+        return role in EDIT_ROLES
+
+
+class ProjectScopedMixin:
+    """
+    Limits a viewset to the projects the user can see and checks the target
+    project of creates and updates
+    """
+    permission_classes = (ProjectAccessPermission,)
+    # Queryset lookup of the project id
+    project_scope = 'project_id'
+    # Dotted path to the project id on an instance
+    project_attr = 'project_id'
+
+    def get_queryset(self):
+        return scope_queryset(super().get_queryset(), self.request.user, self.project_scope)
+
+    def project_id_of(self, obj):
+        return attrgetter(self.project_attr)(obj)
+
+    def target_project_id(self, serializer):
+        """
+        Project a create or update would leave the object in
+        """
+        head, _, rest = self.project_attr.partition('.')
+        field = head[:-3] if head.endswith('_id') and not rest else head
+        if field in serializer.validated_data:
+            value = serializer.validated_data[field]
+            return attrgetter(rest)(value) if rest else getattr(value, 'pk', value)
+        if serializer.instance is not None:
+            return self.project_id_of(serializer.instance)
+        return None
+
+    def check_project_write(self, serializer):
+        """
+        Refuse saves that would put the object in a project the user cannot edit
+        """
+        project_id = self.target_project_id(serializer)
+        if project_id is not None and not get_access(self.request.user).can_edit(project_id):
+            raise PermissionDenied('You do not have write access to this project.')
+
+    def perform_create(self, serializer):
+        self.check_project_write(serializer)
+        super().perform_create(serializer)
+
+    def perform_update(self, serializer):
+        self.check_project_write(serializer)
+        super().perform_update(serializer)
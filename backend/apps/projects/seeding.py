@@ -0,0 +1,539 @@
+"""
+Deterministic synthetic data for benchmarks and load tests.
+
+generate() creates users with their team members, clients, and projects
+with teams and access rows. Then, project by project, it creates:
+- hierarchical tasks (phases with subtasks);
+- a dependency DAG with lags between subtasks;
+- assignments, status transitions and comments;
+- baselines.
+
+Ids and values come from NumPy generators seeded with the seed plus a stream
+number. Every project has its own stream, so the data depends only on the
+seed, the scale and the date it is generated as of (SEED_TODAY unless given),
+not on how many workers wrote it or when.
+
+Rows are written with bulk_create in batches. Projects are shared out
+between forked worker processes, each with its own database connection.
+Signals do not run for bulk writes, so rebuild_derived() afterwards
+refreshes what they would have maintained. No activity log entries are
+generated, so activity feeds stay empty.
+"""
+import math
+import multiprocessing
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from apps.projects.baselines import columns_from_rows, pack_columns
+from apps.projects.models import Project, ProjectAccess, ProjectBaseline
+
+
+SEED_PASSWORD = 'seed-password'
+# Date the data is generated as of, unless another one is given
+SEED_TODAY = date(2026, 1, 1)
+PROJECTS_PER_JOB = 20
+
+FIRST_NAMES = (
+    'Ada', 'Alan', 'Grace', 'Linus', 'Margaret', 'Dennis', 'Barbara', 'Ken', 'Frances', 'Edsger',
+    'Radia', 'Donald', 'Katherine', 'John', 'Hedy', 'Tim', 'Shafi', 'Guido', 'Anita', 'Niklaus',
+)
+LAST_NAMES = (
+    'Lovelace', 'Turing', 'Hopper', 'Torvalds', 'Hamilton', 'Ritchie', 'Liskov', 'Thompson', 'Allen',
+    'Dijkstra', 'Perlman', 'Knuth', 'Johnson', 'McCarthy', 'Lamarr', 'Berners', 'Goldwasser', 'Rossum',
+    'Borg', 'Wirth',
+)
+ROLES = ('Developer', 'Designer', 'QA Engineer', 'Project Manager', 'DevOps Engineer', 'Analyst')
+DEPARTMENTS = ('Engineering', 'Design', 'Quality', 'Operations', 'Product')
+SKILLS = (
+    'Python', 'Django', 'React', 'TypeScript', 'PostgreSQL', 'Docker', 'Kubernetes', 'AWS', 'Figma',
+    'Testing', 'Scrum', 'Data Analysis', 'Security', 'Go', 'GraphQL', 'Redis',
+)
+COMPANY_WORDS = (
+    'Acme', 'Globex', 'Initech', 'Umbrella', 'Stark', 'Wayne', 'Hooli', 'Vandelay', 'Soylent', 'Tyrell',
+    'Cyberdyne', 'Wonka', 'Aperture', 'Massive', 'Dynamic', 'Blue', 'North', 'Summit',
+)
+COMPANY_SUFFIXES = ('Inc', 'Ltd', 'Group', 'Labs', 'Systems', 'Partners')
+PROJECT_WORDS = (
+    'Website', 'Mobile App', 'Data Platform', 'CRM Migration', 'Billing', 'Analytics', 'Portal',
+    'Warehouse', 'Onboarding', 'Checkout', 'Search', 'Reporting', 'Infrastructure', 'Redesign',
+)
+VERBS = (
+    'Design', 'Implement', 'Review', 'Test', 'Deploy', 'Document', 'Refactor', 'Migrate', 'Integrate',
+    'Optimize', 'Audit', 'Prototype',
+)
+NOUNS = (
+    'login flow', 'payment gateway', 'user dashboard', 'API endpoints', 'database schema', 'search page',
+    'notification service', 'export job', 'admin panel', 'caching layer', 'reporting module',
+    'deployment pipeline', 'permissions model', 'landing page', 'import tool', 'audit log',
+)
+PHASES = ('Discovery', 'Design', 'Build', 'Integration', 'Testing', 'Launch', 'Stabilization')
+WORDS = (
+    'the', 'client', 'asked', 'about', 'timeline', 'blocked', 'waiting', 'on', 'review', 'looks', 'good',
+    'needs', 'more', 'tests', 'updated', 'estimate', 'deployed', 'staging', 'please', 'check', 'edge',
+    'cases', 'performance', 'regression', 'fixed', 'merged', 'scope', 'change', 'budget', 'risk',
+)
+
+DEPENDENCY_TYPES = ('FS', 'SS', 'FF', 'SF')
+DEPENDENCY_WEIGHTS = (0.85, 0.1, 0.04, 0.01)
+LAGS = (0, 0, 0, 0, 0, 0, 1, 2, 3, 5, -1)
+PRIORITIES = ('low', 'medium', 'high', 'critical')
+PRIORITY_WEIGHTS = (0.25, 0.45, 0.22, 0.08)
+ALLOCATIONS = (25, 50, 75, 100)
+
+# Subtasks per phase, and how far back a subtask may pick its predecessors
+SUBTASKS_PER_PHASE = 15
+DEPENDENCY_WINDOW = 30
+
+
+def _rng(seed, *stream):
+    return np.random.default_rng([seed, *stream])
+
+
+def _uuids(rng, count):
+    raw = rng.bytes(16 * count)
+    return [uuid.UUID(bytes=raw[offset:offset + 16], version=4) for offset in range(0, 16 * count, 16)]
+
+
+def _money(value):
+    return Decimal(f'{value:.2f}')
+
+
+def _pick(rng, values, size=None, weights=None):
+    if size is None:
+        return values[rng.choice(len(values), p=weights)]
+    return [values[i] for i in rng.choice(len(values), size=size, p=weights)]
+
+
+def _words(rng, count):
+    return ' '.join(_pick(rng, WORDS, count))
+
+
+def _aware(day, hour=9):
+    return timezone.make_aware(datetime.combine(day, time(hour)))
+
+
+# People, clients and projects
+
+def seed_prefix(seed):
+    return f'seed{seed}-'
+
+
+def create_people(seed, members, batch_size):
+    """
+    Users with a team member each. Returns [(member id, user id, hourly rate)].
+    """
+    User = get_user_model()
+    from apps.resources.models import TeamMember
+
+    rng = _rng(seed, 0)
+    prefix = seed_prefix(seed)
+    password = make_password(SEED_PASSWORD)
+    users = []
+    for index in range(members):
+        first, last = _pick(rng, FIRST_NAMES), _pick(rng, LAST_NAMES)
+        users.append(User(
+            username=f'{prefix}{index:07d}',
+            email=f'{first}.{last}.{index}@{prefix}example.com'.lower(),
+            first_name=first,
+            last_name=last,
+            password=password,
+        ))
+    User.objects.bulk_create(users, batch_size=batch_size)
+    user_ids = dict(User.objects.filter(username__startswith=prefix).values_list('username', 'id'))
+
+    member_ids = _uuids(rng, members)
+    rates = np.round(rng.uniform(35, 160, members), 2)
+    team = []
+    for index, user in enumerate(users):
+        team.append(TeamMember(
+            id=member_ids[index],
+            user_id=user_ids[user.username],
+            role=_pick(rng, ROLES),
+            department=_pick(rng, DEPARTMENTS),
+            hourly_rate=_money(rates[index]),
+            capacity_hours_per_week=int(_pick(rng, (20, 32, 40, 40, 40))),
+            skills=sorted(set(_pick(rng, SKILLS, int(rng.integers(2, 6))))),
+        ))
+    TeamMember.objects.bulk_create(team, batch_size=batch_size)
+    return [(member.id, member.user_id, float(rate)) for member, rate in zip(team, rates)]
+
+
+def create_clients(seed, clients, batch_size):
+    from apps.clients.models import Client
+
+    rng = _rng(seed, 1)
+    prefix = seed_prefix(seed)
+    ids = _uuids(rng, clients)
+    rows = []
+    for index in range(clients):
+        company = f'{_pick(rng, COMPANY_WORDS)} {_pick(rng, COMPANY_WORDS)} {_pick(rng, COMPANY_SUFFIXES)}'
+        contact = f'{_pick(rng, FIRST_NAMES)} {_pick(rng, LAST_NAMES)}'
+        rows.append(Client(
+            id=ids[index],
+            name=f'{company} {index}',
+            email=f'contact.{index}@{prefix}example.com',
+            company=company,
+            contact_person=contact,
+            contact_position=_pick(rng, ('CTO', 'Product Owner', 'Director', 'Operations Lead')),
+            notes=_words(rng, 12),
+        ))
+    Client.objects.bulk_create(rows, batch_size=batch_size)
+    return ids
+
+
+def create_projects(seed, task_counts, client_ids, people, batch_size, today):
+    """
+    Projects with their teams and access rows. Returns one spec per project
+    for generating its tasks.
+    """
+    rng = _rng(seed, 2)
+    ids = _uuids(rng, len(task_counts))
+    projects, team_rows, access_rows, specs = [], [], [], []
+    Team = Project.team_members.through
+    for index, task_count in enumerate(task_counts):
+        start = today + timedelta(days=int(rng.integers(-730, 90)))
+        end = start + timedelta(days=int(rng.integers(60, 540)))
+        if start > today:
+            status = 'planning'
+        elif end < today:
+            status = _pick(rng, ('completed', 'completed', 'completed', 'cancelled'))
+        else:
+            status = _pick(rng, ('active', 'active', 'active', 'active', 'on_hold'))
+
+        team = [people[i] for i in rng.choice(len(people), size=min(len(people), int(rng.integers(3, 13))), replace=False)]
+        owner_user_id = team[0][1]
+        budget = task_count * float(rng.uniform(800, 2500))
+        projects.append(Project(
+            id=ids[index],
+            name=f'{_pick(rng, PROJECT_WORDS)} {_pick(rng, PROJECT_WORDS)} {index}',
+            description=_words(rng, 20),
+            client_id=client_ids[int(rng.integers(len(client_ids)))],
+            budget=_money(budget),
+            actual_cost=_money(budget * float(rng.uniform(0, 1.1)) if status != 'planning' else 0),
+            start_date=start,
+            end_date=end,
+            status=status,
+            baseline_start=start,
+            baseline_end=end,
+            baseline_cost=_money(budget),
+            created_by_id=owner_user_id,
+        ))
+        team_rows.extend(Team(project_id=ids[index], teammember_id=member_id) for member_id, _, _ in team)
+        access_rows.append(ProjectAccess(project_id=ids[index], user_id=owner_user_id, role='owner'))
+        access_rows.extend(
+            ProjectAccess(project_id=ids[index], user_id=user_id, role='member') for _, user_id, _ in team[1:]
+        )
+        specs.append({
+            'index': index,
+            'id': ids[index],
+            'start': start,
+            'end': end,
+            'team': team,
+            'tasks': task_count,
+        })
+
+    with transaction.atomic():
+        Project.objects.bulk_create(projects, batch_size=batch_size)
+        Team.objects.bulk_create(team_rows, batch_size=batch_size)
+        ProjectAccess.objects.bulk_create(access_rows, batch_size=batch_size)
+    return specs
+
+
+# Tasks and everything hanging off them
+
+class ProjectRows:
+    """
+    Unsaved rows of a batch of projects, written in foreign key order
+    """
+    def __init__(self):
+        from apps.tasks.models import Comment, Task, TaskAssignment, TaskDependency, TaskStatusTransition
+        self.models = (Task, TaskStatusTransition, TaskDependency, TaskAssignment, Comment, ProjectBaseline)
+        self.rows = {model: [] for model in self.models}
+
+    def __len__(self):
+        return len(self.rows[self.models[0]])
+
+    def add(self, model, rows):
+        self.rows[model].extend(rows)
+
+    def write(self, batch_size):
+        counts = {}
+        with transaction.atomic():
+            for model in self.models:
+                model.objects.bulk_create(self.rows[model], batch_size=batch_size)
+                counts[model._meta.db_table] = len(self.rows[model])
+                self.rows[model] = []
+        return counts
+
+
+def _task_status(start, end, today, rng):
+    if end < today:
+        return 'done' if rng.random() < 0.92 else 'review'
+    if start <= today:
+        return 'in_progress' if rng.random() < 0.7 else 'review'
+    return 'todo' if rng.random() < 0.6 else 'backlog'
+
+
+PROGRESS = {'backlog': 0, 'todo': 0, 'review': 90, 'done': 100}
+# Statuses a task passes through on its way to each status
+STATUS_PATH = {
+    'backlog': ('backlog',),
+    'todo': ('todo',),
+    'in_progress': ('todo', 'in_progress'),
+    'review': ('todo', 'in_progress', 'review'),
+    'done': ('todo', 'in_progress', 'review', 'done'),
+}
+
+
+def build_project(seed, spec, rows, comments_per_task, baselines, today):
+    """
+    Generate one project's tasks, dependencies, assignments, transitions,
+    comments and baselines into rows
+    """
+    from apps.tasks.models import Comment, Task, TaskAssignment, TaskDependency, TaskStatusTransition
+
+    rng = _rng(seed, 3, spec['index'])
+    project_id, project_start = spec['id'], spec['start']
+    span = max((spec['end'] - project_start).days, 1)
+    team = spec['team']
+    mean_rate = sum(rate for _, _, rate in team) / len(team)
+
+    total = spec['tasks']
+    phase_count = max(1, math.ceil(total / (SUBTASKS_PER_PHASE + 1)))
+    subtask_count = total - phase_count
+    ids = _uuids(rng, total)
+    phase_ids, subtask_ids = ids[:phase_count], ids[phase_count:]
+    # Subtasks are spread over the phases in order
+    phase_of = np.sort(rng.integers(0, phase_count, subtask_count)) if subtask_count else np.empty(0, dtype=int)
+
+    starts, ends = [], []
+    dependencies = []
+    for position in range(subtask_count):
+        earliest = project_start + timedelta(days=int(position / max(subtask_count, 1) * span * 0.8))
+        window = min(position, DEPENDENCY_WINDOW)
+        predecessors = rng.choice(window, size=min(window, int(_pick(rng, (0, 1, 1, 1, 2, 3)))), replace=False) if window else ()
+        for offset in predecessors:
+            predecessor = position - 1 - int(offset)
+            lag = int(_pick(rng, LAGS))
+            dependency_type = _pick(rng, DEPENDENCY_TYPES, weights=DEPENDENCY_WEIGHTS)
+            earliest = max(earliest, ends[predecessor] + timedelta(days=lag + 1))
+            dependencies.append((predecessor, position, dependency_type, lag))
+        start = earliest
+        starts.append(start)
+        ends.append(start + timedelta(days=int(rng.integers(1, 11))))
+
+    tasks, transitions, assignments, comments = [], [], [], []
+    order = {}
+
+    def add_task(task_id, title, start, end, parent_id, assign):
+        duration = max((end - start).days, 1)
+        status = _task_status(start, end, today, rng)
+        progress = PROGRESS.get(status, int(rng.integers(10, 90)))
+        hours = duration * float(rng.uniform(2, 8))
+        cost = hours * mean_rate
+        spent = progress / 100 * float(rng.uniform(0.8, 1.3))
+        slipped = rng.random() < 0.3
+        tasks.append(Task(
+            id=task_id,
+            project_id=project_id,
+            title=title,
+            description=_words(rng, 15),
+            status=status,
+            kanban_order=order.setdefault(status, 0),
+            start_date=start,
+            end_date=end,
+            duration=duration,
+            progress=progress,
+            estimated_hours=_money(hours),
+            actual_hours=_money(hours * spent),
+            estimated_cost=_money(cost),
+            actual_cost=_money(cost * spent),
+            baseline_start=start - timedelta(days=int(rng.integers(1, 6))) if slipped else start,
+            baseline_end=end - timedelta(days=int(rng.integers(1, 8))) if slipped else end,
+            baseline_duration=duration,
+            baseline_cost=_money(cost),
+            priority=_pick(rng, PRIORITIES, weights=PRIORITY_WEIGHTS),
+            parent_task_id=parent_id,
+        ))
+        order[status] += 1
+
+        # The task moved through each status on the way to its current one
+        path = STATUS_PATH[status]
+        moments = [start - timedelta(days=7)] + [start + timedelta(days=duration * step // len(path)) for step in range(1, len(path))]
+        previous = ''
+        for to_status, moment in zip(path, moments):
+            transitions.append(TaskStatusTransition(
+                task_id=task_id, project_id=project_id, from_status=previous, to_status=to_status,
+                transitioned_at=_aware(min(moment, today))
+            ))
+            previous = to_status
+
+        if assign:
+            chosen = rng.choice(len(team), size=min(len(team), int(_pick(rng, (1, 1, 1, 2)))), replace=False)
+            for choice in chosen:
+                assignments.append(TaskAssignment(
+                    task_id=task_id,
+                    team_member_id=team[int(choice)][0],
+                    allocated_hours=_money(hours / len(chosen)),
+                    allocation_percentage=int(_pick(rng, ALLOCATIONS)),
+                ))
+            for _ in range(int(rng.poisson(comments_per_task))):
+                comments.append(Comment(
+                    task_id=task_id,
+                    author_id=team[int(rng.integers(len(team)))][1],
+                    content=_words(rng, int(rng.integers(5, 30))),
+                ))
+        return status
+
+    for phase in range(phase_count):
+        members = np.flatnonzero(phase_of == phase)
+        if members.size:
+            phase_start, phase_end = starts[members[0]], max(ends[i] for i in members)
+        else:
+            phase_start = project_start + timedelta(days=int(phase / phase_count * span))
+            phase_end = phase_start + timedelta(days=7)
+        add_task(phase_ids[phase], f'{_pick(rng, PHASES)} phase {phase + 1}', phase_start, phase_end, None, False)
+        for position in members:
+            add_task(
+                subtask_ids[position], f'{_pick(rng, VERBS)} {_pick(rng, NOUNS)} #{position + 1}',
+                starts[position], ends[position], phase_ids[phase], True
+            )
+
+    links = [
+        TaskDependency(
+            predecessor_id=subtask_ids[predecessor], successor_id=subtask_ids[successor],
+            dependency_type=dependency_type, lag=lag
+        )
+        for predecessor, successor, dependency_type, lag in dependencies
+    ]
+    # Ids come from the project's stream rather than the models' uuid4 defaults
+    for objects in (links, assignments, comments):
+        for instance, instance_id in zip(objects, _uuids(rng, len(objects))):
+            instance.id = instance_id
+
+    rows.add(Task, tasks)
+    rows.add(TaskStatusTransition, transitions)
+    rows.add(TaskDependency, links)
+    rows.add(TaskAssignment, assignments)
+    rows.add(Comment, comments)
+
+    columns = columns_from_rows(
+        [task.id.hex for task in tasks], [task.start_date for task in tasks], [task.end_date for task in tasks],
+        [task.duration for task in tasks], [float(task.estimated_cost) for task in tasks],
+    )
+    for number, baseline_id in enumerate(_uuids(rng, baselines), start=1):
+        if number > 1:
+            # Later baselines were taken after some replanning
+            shift = rng.integers(0, 4, len(tasks)).astype(np.int32)
+            columns = dict(columns, start=columns['start'] + shift, end=columns['end'] + shift)
+        rows.add(ProjectBaseline, [ProjectBaseline(
+            id=baseline_id,
+            project_id=project_id,
+            name=f'Baseline {number}',
+            baseline_number=number,
+            baseline_data={'start_date': str(project_start), 'end_date': str(spec['end'])},
+            task_columns=pack_columns(columns),
+            task_count=len(tasks),
+            created_by_id=team[0][1],
+        )])
+
+
+def seed_projects(seed, specs, comments_per_task, baselines, batch_size, today):
+    """
+    Generate and write a group of projects; returns rows written per table
+    """
+    rows, counts = ProjectRows(), {}
+
+    def flush():
+        for table, count in rows.write(batch_size).items():
+            counts[table] = counts.get(table, 0) + count
+
+    for spec in specs:
+        build_project(seed, spec, rows, comments_per_task, baselines, today)
+        if len(rows) >= batch_size:
+            flush()
+    flush()
+    return counts
+
+
+def _seed_projects_job(*args):
+    # Runs in a forked worker; each worker opens its own connection
+    try:
+        return seed_projects(*args)
+    finally:
+        connections.close_all()
+
+
+def split_tasks(tasks, tasks_per_project):
+    projects = max(1, math.ceil(tasks / tasks_per_project))
+    base, extra = divmod(tasks, projects)
+    return [base + (1 if index < extra else 0) for index in range(projects)]
+
+
+def generate(seed=42, tasks=10000, tasks_per_project=200, members=None, clients=None,
+             comments_per_task=0.5, baselines=1, batch_size=5000, workers=1, progress=None, today=SEED_TODAY):
+    """
+    Create a full synthetic dataset as of today. Returns rows written per table.
+    """
+    task_counts = split_tasks(tasks, tasks_per_project)
+    members = members or max(10, tasks // 250)
+    clients = clients or max(1, len(task_counts) // 4)
+
+    people = create_people(seed, members, batch_size)
+    client_ids = create_clients(seed, clients, batch_size)
+    specs = create_projects(seed, task_counts, client_ids, people, batch_size, today)
+    counts = {'users': members, 'team_members': members, 'clients': clients, 'projects': len(specs)}
+    if progress:
+        progress(counts)
+
+    jobs = [specs[start:start + PROJECTS_PER_JOB] for start in range(0, len(specs), PROJECTS_PER_JOB)]
+    arguments = (comments_per_task, baselines, batch_size, today)
+
+    def merge(result):
+        for table, count in result.items():
+            counts[table] = counts.get(table, 0) + count
+        if progress:
+            progress(counts)
+
+    if workers > 1 and connection.vendor != 'sqlite' and 'fork' in multiprocessing.get_all_start_methods():
+        # Children must not share the parent's connection
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork')) as pool:
+            futures = [pool.submit(_seed_projects_job, seed, job, *arguments) for job in jobs]
+            for future in as_completed(futures):
+                merge(future.result())
+    else:
+        for job in jobs:
+            merge(seed_projects(seed, job, *arguments))
+    return counts
+
+
+def rebuild_derived(seed):
+    """
+    Refresh the data signals would have maintained for the seeded rows
+    """
+    from apps.analytics.cache import invalidate_tags, table_tag
+    from apps.clients.models import Client
+    from apps.clients.rollups import refresh_rollups
+    from apps.resources.models import TeamMember, TeamMemberSkill
+    from apps.search import autocomplete
+    from apps.search.services import rebuild_index
+
+    prefix = seed_prefix(seed)
+    TeamMemberSkill.rebuild(TeamMember.objects.filter(user__username__startswith=prefix))
+    refresh_rollups(list(Client.objects.filter(email__endswith=f'@{prefix}example.com').values_list('id', flat=True)))
+    documents = rebuild_index()
+    for kind in autocomplete.AUTOCOMPLETE_KINDS:
+        autocomplete.invalidate(kind)
+    invalidate_tags(*[
+        table_tag(table) for table in ('projects', 'tasks', 'task_assignments', 'team_members', 'clients')
+    ])
+    return documents
@@ -0,0 +1,169 @@
+"""
+Signal handlers that record ActivityLog entries for project and task writes
+and keep the per-user activity feeds and project access rows in step with
+project membership
+"""
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+
+from apps.projects import access, feed
+from apps.projects.activity import record
+from apps.projects.models import Project
+from apps.resources.models import TeamMember
+from apps.tasks.models import Task, TaskDependency, TaskAssignment, Comment
+
+
+# task id -> project id of the tasks being deleted, so the rows their delete
+# cascades to find their project without a query each
+_deleting_tasks = {}
+
+
+def _project_id_through(instance, task_field):
+    """
+    Project of the task an entity hangs off, without a query when the task is
+    already loaded or is being deleted
+    """
+    task = instance._state.fields_cache.get(task_field)
+    if task is not None:
+        return task.project_id
+    task_id = getattr(instance, f'{task_field}_id')
+    if task_id in _deleting_tasks:
+        return _deleting_tasks[task_id]
+    return Task.objects.filter(pk=task_id).values_list('project_id', flat=True).first()
+
+
+def task_deleting(sender, instance, **kwargs):
+    # The collector sends every pre_delete before deleting anything, and
+    # deletes the task's dependent rows before the task itself
+    _deleting_tasks[instance.pk] = instance.project_id
+
+
+def task_deleted(sender, instance, **kwargs):
+    _deleting_tasks.pop(instance.pk, None)
+
+
+pre_delete.connect(task_deleting, sender=Task, dispatch_uid='activity-task-deleting')
+post_delete.connect(task_deleted, sender=Task, dispatch_uid='activity-task-deleted')
+
+
+# model -> (entity type, project id of an instance, label of an instance)
+ACTIVITY_ENTITIES = {
+    Project: ('project', lambda instance: instance.pk, lambda instance: f"Project '{instance.name}'"),
+    Task: ('task', lambda instance: instance.project_id, lambda instance: f"Task '{instance.title}'"),
+    TaskDependency: (
+        'task_dependency',
+        lambda instance: _project_id_through(instance, 'successor'),
+        lambda instance: f"{instance.dependency_type} dependency"
+    ),
+    TaskAssignment: (
+        'task_assignment',
+        lambda instance: _project_id_through(instance, 'task'),
+        lambda instance: 'Task assignment'
+    ),
+    Comment: ('comment', lambda instance: _project_id_through(instance, 'task'), lambda instance: 'Comment'),
+}
+
+
+def entity_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    entity_type, get_project_id, get_label = ACTIVITY_ENTITIES[sender]
+
+    changes = {} if created else instance.activity_changes()
+    instance.reset_activity_snapshot()
+    if not created and not changes:
+        return
+
+    project_id = get_project_id(instance)
+    if project_id is None:
+        return
+    if created:
+        description = f"{get_label(instance)} created"
+    else:
+        description = f"{get_label(instance)} updated: {', '.join(changes)}"
+    record(project_id, 'created' if created else 'updated', entity_type, instance.pk, description, changes)
+
+
+def entity_deleted(sender, instance, **kwargs):
+    if sender is Project:
+        # The project's log is deleted with it
+        return
+    entity_type, get_project_id, get_label = ACTIVITY_ENTITIES[sender]
+    project_id = get_project_id(instance)
+    if project_id is None:
+        return
+    record(project_id, 'deleted', entity_type, instance.pk, f"{get_label(instance)} deleted")
+
+
+for model in ACTIVITY_ENTITIES:
+    post_save.connect(entity_saved, sender=model, dispatch_uid=f'activity-save-{model.__name__}')
+    post_delete.connect(entity_deleted, sender=model, dispatch_uid=f'activity-delete-{model.__name__}')
+
+
+def _team_memberships(instance, action, reverse, pk_set):
+    """
+    (project id, user ids) pairs a Project.team_members change adds or removes
+    """
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return []
+    if reverse:
+        # instance is a TeamMember; pk_set holds project ids
+        project_ids = pk_set if action != 'pre_clear' else instance.projects.values_list('id', flat=True)
+        return [(project_id, [instance.user_id]) for project_id in project_ids]
+    members = TeamMember.objects.filter(id__in=pk_set) if action != 'pre_clear' else instance.team_members.all()
+    return [(instance.pk, list(members.values_list('user_id', flat=True)))]
+
+
+def team_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    for project_id, user_ids in _team_memberships(instance, action, reverse, pk_set):
+        if action == 'post_add':
+            feed.backfill(project_id, user_ids)
+        else:
+            feed.remove(project_id, user_ids)
+
+
+m2m_changed.connect(team_changed, sender=Project.team_members.through, dispatch_uid='activity-feed-team')
+
+
+# Project access
+
+def owner_pre_save(sender, instance, raw=False, **kwargs):
+    """
+    Note the previous creator before the activity snapshot is reset
+    """
+    if raw:
+        return
+    if instance._state.adding:
+        instance._access_owner_changed, instance._access_previous_owner = True, None
+        return
+    changes = instance.activity_changes() if getattr(instance, '_activity_snapshot', None) is not None else {}
+    change = changes.get('created_by_id')
+    instance._access_owner_changed = change is not None
+    instance._access_previous_owner = change['old'] if change else None
+
+
+def owner_saved(sender, instance, raw=False, **kwargs):
+    if raw or not getattr(instance, '_access_owner_changed', False):
+        return
+    instance._access_owner_changed = False
+    if instance._access_previous_owner is not None:
+        access.revoke(instance.pk, [instance._access_previous_owner], 'owner')
+    access.grant(instance.pk, [instance.created_by_id], 'owner')
+
+
+def project_deleting(sender, instance, **kwargs):
+    # The access rows go with the project; drop the users' cached lists
+    access.invalidate(instance.access.values_list('user_id', flat=True))
+
+
+def access_team_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    for project_id, user_ids in _team_memberships(instance, action, reverse, pk_set):
+        if action == 'post_add':
+            access.grant(project_id, user_ids, 'member')
+        else:
+            access.revoke(project_id, user_ids, 'member')
+
+
+pre_save.connect(owner_pre_save, sender=Project, dispatch_uid='access-owner-pre-save')
+post_save.connect(owner_saved, sender=Project, dispatch_uid='access-owner-save')
+pre_delete.connect(project_deleting, sender=Project, dispatch_uid='access-project-delete')
+m2m_changed.connect(access_team_changed, sender=Project.team_members.through, dispatch_uid='access-team')
@@ -0,0 +1,84 @@
+"""
+Background jobs for projects
+"""
+from celery import shared_task
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from apps.projects.archive import archive_expired, ensure_partitions
+from apps.projects.baselines import capture_task_columns, pack_columns
+from apps.projects.models import Project, ProjectBaseline, BaselineCaptureJob
+
+
+@shared_task
+def capture_project_baseline(job_id):
+    """
+    Stream the project's tasks into column arrays and store them as the next baseline
+    """
+    with transaction.atomic():
+        # Lock the job so a redelivered message cannot start it alongside a finished run
+        job = BaselineCaptureJob.objects.select_for_update(of=('self',)).select_related('project').get(id=job_id)
+        if job.status == 'completed':
+            return str(job.baseline_id)
+
+        project = job.project
+        job.status = 'running'
+        job.started_at = timezone.now()
+        job.tasks_total = project.tasks.count()
+        job.tasks_processed = 0
+        job.error = ''
+        job.save(update_fields=['status', 'started_at', 'tasks_total', 'tasks_processed', 'error'])
+
+    def progress(rows):
+        BaselineCaptureJob.objects.filter(id=job_id).update(tasks_processed=rows)
+
+    try:
+        columns, _ = capture_task_columns(project.tasks.all(), progress=progress)
+        task_columns = pack_columns(columns)
+
+        with transaction.atomic():
+            # Lock the project row so concurrent captures take consecutive numbers
+            project = Project.objects.select_for_update().get(id=project.id)
+            # A concurrent run of the same job may have finished while this one was reading
+            current = BaselineCaptureJob.objects.select_for_update().get(id=job_id)
+            if current.status == 'completed':
+                return str(current.baseline_id)
+            latest = project.baselines.aggregate(latest=Max('baseline_number'))['latest'] or 0
+            baseline_number = latest + 1
+            baseline = ProjectBaseline.objects.create(
+                project=project,
+                name=job.name or f'Baseline {baseline_number}',
+                baseline_number=baseline_number,
+                baseline_data={
+                    'name': project.name,
+                    'budget': float(project.budget),
+                    'start_date': str(project.start_date),
+                    'end_date': str(project.end_date),
+                },
+                task_columns=task_columns,
+                task_count=int(columns['id'].size),
+                created_by_id=job.created_by_id
+            )
+            job.baseline = baseline
+            job.status = 'completed'
+            job.tasks_processed = baseline.task_count
+            job.completed_at = timezone.now()
+            job.save(update_fields=['baseline', 'status', 'tasks_processed', 'completed_at'])
+    except Exception as exc:
+        job.status = 'failed'
+        job.error = str(exc)
+        job.completed_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'completed_at'])
+        raise
+
+    return str(baseline.id)
+
+
+@shared_task
+def maintain_activity_logs():
+    """
+    Nightly: create upcoming activity log partitions and archive expired months
+    """
+    ensure_partitions()
+    return len(archive_expired())
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import TeamMember
+from .models import TeamMember, TeamMemberSkill, MemberAvailability
 
 
 @admin.register(TeamMember)
@@ -27,3 +27,20 @@ class TeamMemberAdmin(admin.ModelAdmin):
             'fields': ('created_at', 'updated_at')
         }),
     )
+
+
+@admin.register(TeamMemberSkill)
+class TeamMemberSkillAdmin(admin.ModelAdmin):
+    list_display = ('skill', 'member')
+    search_fields = ('skill', 'member__user__first_name', 'member__user__last_name')
+    raw_id_fields = ('member',)
+    ordering = ('skill',)
+
+
+@admin.register(MemberAvailability)
+class MemberAvailabilityAdmin(admin.ModelAdmin):
+    list_display = ('member', 'kind', 'start_date', 'end_date', 'available_percentage', 'note')
+    list_filter = ('kind', 'start_date')
+    search_fields = ('member__user__first_name', 'member__user__last_name', 'note')
+    raw_id_fields = ('member',)
+    ordering = ('-start_date',)
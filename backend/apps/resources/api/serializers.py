@@ -2,7 +2,7 @@
 Serializers for TeamMember management
 """
 from rest_framework import serializers
-from apps.resources.models import TeamMember
+from apps.resources.models import TeamMember, MemberAvailability
 from apps.accounts.api.serializers import UserSerializer
 
 
@@ -75,3 +75,25 @@ class TeamMemberListSerializer(serializers.ModelSerializer):
             'id', 'full_name', 'email', 'role', 'department',
             'is_active', 'created_at'
         )
+
+
+class MemberAvailabilitySerializer(serializers.ModelSerializer):
+    """
+    Serializer for member availability periods
+    """
+    member_name = serializers.CharField(source='member.full_name', read_only=True, default=None)
+
+    class Meta:
+        model = MemberAvailability
+        fields = (
+            'id', 'member', 'member_name', 'kind', 'start_date', 'end_date',
+            'available_percentage', 'note', 'created_at', 'updated_at'
+        )
+        read_only_fields = ('id', 'created_at', 'updated_at')
+
+    def validate(self, attrs):
+        start_date = attrs.get('start_date', getattr(self.instance, 'start_date', None))
+        end_date = attrs.get('end_date', getattr(self.instance, 'end_date', None))
+        if start_date and end_date and end_date < start_date:
+            raise serializers.ValidationError({"end_date": "End date must not be before start date."})
+        return attrs
@@ -3,9 +3,10 @@ URL patterns for TeamMembers API
 """
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import TeamMemberViewSet
+from .views import TeamMemberViewSet, MemberAvailabilityViewSet
 
 router = DefaultRouter()
+router.register(r'availability-periods', MemberAvailabilityViewSet, basename='member-availability')
 router.register(r'', TeamMemberViewSet, basename='team-member')
 
 urlpatterns = [
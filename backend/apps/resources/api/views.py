@@ -1,23 +1,45 @@
 """
 API views for TeamMember management
 """
-from rest_framework import viewsets, filters
+from uuid import UUID
+
+from rest_framework import viewsets, filters, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.utils.dateparse import parse_date
 from django_filters.rest_framework import DjangoFilterBackend
-from apps.resources.models import TeamMember
+from apps.projects.access import scope_queryset
+from apps.resources.availability import free_capacity, overlapping_periods
+from apps.resources.models import TeamMember, MemberAvailability
+from apps.resources.staffing import recommend
+from apps.tasks.models import Task
 from .serializers import (
     TeamMemberSerializer,
     TeamMemberCreateSerializer,
-    TeamMemberListSerializer
+    TeamMemberListSerializer,
+    MemberAvailabilitySerializer
 )
 
 
+def parse_range(params):
+    """
+    (start, end) dates from ?start=&end=, or None when missing or reversed
+    """
+    start, end = parse_date(params.get('start', '') or ''), parse_date(params.get('end', '') or '')
+    if start is None or end is None or end < start:
+        return None
+    return start, end
+
+
 class TeamMemberViewSet(viewsets.ModelViewSet):
     """
     ViewSet for TeamMember CRUD operations
     """
     queryset = TeamMember.objects.select_related('user').all()
     permission_classes = (IsAuthenticated,)
+    # Only match UUIDs so the availability-periods/ routes are not shadowed
+    lookup_value_regex = '[0-9a-f-]{36}'
     filter_backends = (DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter)
     filterset_fields = ('is_active', 'role', 'department')
     search_fields = ('user__first_name', 'user__last_name', 'user__email', 'role', 'department')
@@ -30,3 +52,118 @@ class TeamMemberViewSet(viewsets.ModelViewSet):
         elif self.action == 'list':
             return TeamMemberListSerializer
         return TeamMemberSerializer
+
+    @action(detail=False, methods=['get'])
+    def staffing(self, request):
+        """
+        Recommend members for work needing some skills between two dates, e.g.
+        ?skills=django,react&start=2025-03-01&end=2025-03-31&hours=60&match=all
+        or ?task=<uuid>&skills=django to use the task's dates and estimate
+        """
+        params = request.query_params
+        skills = [skill for skill in params.get('skills', '').split(',') if skill.strip()]
+        start, end = parse_range(params) or (None, None)
+        hours = params.get('hours')
+        exclude_members = ()
+
+        task_id = params.get('task')
+        if task_id:
+            try:
+                # Only tasks of projects the user can see
+                task = scope_queryset(Task.objects.all(), request.user).filter(id=UUID(task_id)).first()
+            except ValueError:
+                task = None
+            if task is None:
+                return Response({"error": "Task not found"}, status=status.HTTP_404_NOT_FOUND)
+            start, end = start or task.start_date, end or task.end_date
+            hours = hours or task.estimated_hours
+            # Members already on the task are not candidates
+            exclude_members = task.taskassignment_set.values('team_member_id')
+
+        if start is None or end is None or end < start:
+            return Response(
+                {"error": "start and end dates (YYYY-MM-DD, start <= end) or a task are required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            hours = float(hours) if hours else None
+            limit = min(int(params.get('limit', 20)), 100)
+        except ValueError:
+            return Response({"error": "hours and limit must be numbers"}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = recommend(
+            skills, start, end,
+            hours=hours,
+            match_all=params.get('match') == 'all',
+            exclude_task=task_id or None,
+            exclude_members=exclude_members,
+            limit=limit
+        )
+        return Response({
+            'skills': skills,
+            'start': start,
+            'end': end,
+            'hours': hours,
+            'results': results,
+        })
+
+    @action(detail=False, methods=['get'])
+    def availability(self, request):
+        """
+        Free capacity of each (filtered) member between two dates, e.g.
+        ?start=2025-03-01&end=2025-03-31&department=eng
+        """
+        date_range = parse_range(request.query_params)
+        if date_range is None:
+            return Response(
+                {"error": "start and end dates (YYYY-MM-DD, start <= end) are required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        start, end = date_range
+
+        members = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(members)
+        results = self.free_capacity_rows(members if page is None else page, start, end)
+        if page is not None:
+            return self.get_paginated_response(results)
+        return Response(results)
+
+    @staticmethod
+    def free_capacity_rows(members, start, end):
+        members = list(members)
+        capacity = free_capacity(TeamMember.objects.filter(id__in=[member.id for member in members]), start, end)
+        positions = {UUID(member_id): position for position, member_id in enumerate(capacity['id'])}
+        results = []
+        for member in members:
+            position = positions[member.id]
+            results.append({
+                'id': member.id,
+                'name': member.full_name,
+                'role': member.role,
+                'capacity_hours': round(float(capacity['capacity'][position]), 2),
+                'available_hours': round(float(capacity['available'][position]), 2),
+                'committed_hours': round(float(capacity['committed'][position]), 2),
+                'free_hours': round(float(capacity['free'][position]), 2),
+            })
+        return results
+
+
+class MemberAvailabilityViewSet(viewsets.ModelViewSet):
+    """
+    ViewSet for member availability periods (leave, part-time, holidays).
+    ?start=&end= limits the list to periods overlapping that range.
+    """
+    queryset = MemberAvailability.objects.select_related('member__user').all()
+    serializer_class = MemberAvailabilitySerializer
+    permission_classes = (IsAuthenticated,)
+    filter_backends = (DjangoFilterBackend, filters.OrderingFilter)
+    filterset_fields = ('member', 'kind')
+    ordering_fields = ('start_date', 'end_date')
+    ordering = ('start_date',)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        date_range = parse_range(self.request.query_params)
+        if date_range is not None:
+            queryset = queryset.filter(id__in=overlapping_periods(*date_range).values('id'))
+        return queryset
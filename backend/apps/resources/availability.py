@@ -0,0 +1,157 @@
+"""
+Member availability and free capacity.
+
+A member's capacity over a date range is their weekly capacity spread over
+the working days, reduced by the MemberAvailability periods that overlap the
+range (the lowest available share wins on any day), minus the hours already
+booked through open TaskAssignments. Only the overlapping periods are read:
+on PostgreSQL through the GiST index on their date ranges.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.contrib.postgres.fields import DateRangeField
+from django.db import connection
+from django.db.models import CharField, FloatField, Func, Q, Value
+from django.db.models.functions import Cast
+
+from apps.resources.models import MemberAvailability
+from apps.tasks.models import TaskAssignment
+
+
+WORKDAYS_PER_WEEK = 5
+
+ONE_DAY = np.timedelta64(1, 'D')
+
+
+class DateRange(Func):
+    """
+    Inclusive PostgreSQL daterange, matching the expression of the GiST index
+    """
+    function = 'daterange'
+    output_field = DateRangeField()
+
+    def __init__(self, start, end):
+        super().__init__(start, end, Value('[]'))
+
+
+def text(field):
+    return Cast(field, output_field=CharField())
+
+
+def workdays(start, end):
+    """
+    Working days (Mon-Fri) from start to end inclusive
+    """
+    return int(np.busday_count(start, end + timedelta(days=1)))
+
+
+def overlapping_periods(start, end, members=None):
+    """
+    Availability periods overlapping start..end, for the given members
+    (a queryset) plus those that apply to everyone
+    """
+    periods = MemberAvailability.objects.all()
+    if connection.vendor == 'postgresql':
+        periods = periods.alias(
+            period=DateRange('start_date', 'end_date')
+        ).filter(period__overlap=DateRange(Value(start), Value(end)))
+    else:
+        periods = periods.filter(start_date__lte=end, end_date__gte=start)
+    if members is not None:
+        periods = periods.filter(Q(member__isnull=True) | Q(member__in=members))
+    return periods
+
+
+def committed_hours(members, start, end, exclude_task=None):
+    """
+    {member id (as text): hours} already booked between start and end. Each open
+    assignment overlapping the range contributes its allocated hours times
+    the share of its task's working days that fall inside the range.
+    """
+    assignments = TaskAssignment.objects.filter(
+        team_member__in=members,
+        task__start_date__lte=end,
+        task__end_date__gte=start
+    ).exclude(task__status='done')
+    if exclude_task is not None:
+        assignments = assignments.exclude(task_id=exclude_task)
+    rows = list(assignments.annotate(
+        member_text=text('team_member_id'),
+        hours=Cast('allocated_hours', output_field=FloatField()),
+        task_start=text('task__start_date'),
+        task_end=text('task__end_date'),
+    ).values_list('member_text', 'hours', 'task_start', 'task_end'))
+    if not rows:
+        return {}
+
+    member_ids, hours, task_starts, task_ends = zip(*rows)
+    task_starts = np.array(task_starts, dtype='datetime64[D]')
+    task_ends = np.array(task_ends, dtype='datetime64[D]')
+    inside = np.busday_count(
+        np.maximum(task_starts, np.datetime64(start, 'D')),
+        np.minimum(task_ends, np.datetime64(end, 'D')) + ONE_DAY
+    )
+    total = np.maximum(np.busday_count(task_starts, task_ends + ONE_DAY), 1)
+    booked = np.array(hours, dtype=np.float64) * inside / total
+
+    index = {member_id: position for position, member_id in enumerate(dict.fromkeys(member_ids))}
+    sums = np.bincount([index[member_id] for member_id in member_ids], weights=booked, minlength=len(index))
+    return {member_id: float(sums[position]) for member_id, position in index.items()}
+
+
+def available_hours(members, ids, weekly_capacity, start, end):
+    """
+    Hours each member can work between start and end after time off, as an
+    array aligned with ``ids`` (member ids as text, the members of the queryset)
+    """
+    days = np.arange(np.datetime64(start, 'D'), np.datetime64(end, 'D') + ONE_DAY)
+    # Share of a normal day available on each day of the range, for everyone...
+    shared = np.is_busday(days).astype(np.float64)
+    # ...and for members with their own periods
+    personal = {}
+
+    periods = overlapping_periods(start, end, members).annotate(
+        member_text=text('member_id'),
+        start_text=text('start_date'),
+        end_text=text('end_date'),
+    ).values_list('member_text', 'start_text', 'end_text', 'available_percentage')
+    for member_id, period_start, period_end, percentage in periods:
+        first = max(int((np.datetime64(period_start, 'D') - days[0]) / ONE_DAY), 0)
+        last = min(int((np.datetime64(period_end, 'D') - days[0]) / ONE_DAY), days.size - 1)
+        if member_id is None:
+            target = shared
+        else:
+            target = personal.setdefault(member_id, np.ones(days.size))
+        target[first:last + 1] = np.minimum(target[first:last + 1], percentage / 100)
+
+    shared_days = shared.sum()
+    days_available = np.array([
+        (np.minimum(personal[member_id], shared).sum() if member_id in personal else shared_days)
+        for member_id in ids
+    ])
+    return np.array(weekly_capacity, dtype=np.float64) / WORKDAYS_PER_WEEK * days_available
+
+
+def free_capacity(members, start, end, exclude_task=None):
+    """
+    Capacity of every member of a queryset between start and end, as columns:
+    id (text), capacity (nominal hours), available (after time off),
+    committed (booked on open tasks) and free (available minus committed)
+    """
+    rows = list(members.annotate(id_text=text('id')).values_list('id_text', 'capacity_hours_per_week'))
+    if not rows:
+        empty = np.zeros(0)
+        return {'id': (), 'capacity': empty, 'available': empty, 'committed': empty, 'free': empty}
+    ids, weekly_capacity = zip(*rows)
+
+    available = available_hours(members, ids, weekly_capacity, start, end)
+    booked = committed_hours(members, start, end, exclude_task=exclude_task)
+    committed = np.array([booked.get(member_id, 0.0) for member_id in ids])
+    return {
+        'id': ids,
+        'capacity': np.array(weekly_capacity, dtype=np.float64) * workdays(start, end) / WORKDAYS_PER_WEEK,
+        'available': available,
+        'committed': committed,
+        'free': np.maximum(available - committed, 0),
+    }
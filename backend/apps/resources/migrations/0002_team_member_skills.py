@@ -0,0 +1,38 @@
+# Generated by Django 5.0.1 on 2026-10-19 00:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_skill_index(apps, schema_editor):
+    TeamMember = apps.get_model('resources', 'TeamMember')
+    TeamMemberSkill = apps.get_model('resources', 'TeamMemberSkill')
+    rows = [
+        TeamMemberSkill(member_id=member.id, skill=skill)
+        for member in TeamMember.objects.only('id', 'skills').iterator(chunk_size=2000)
+        for skill in {' '.join(str(s).split()).casefold()[:100] for s in (member.skills or []) if str(s).strip()}
+    ]
+    TeamMemberSkill.objects.bulk_create(rows, batch_size=5000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resources', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeamMemberSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('skill', models.CharField(max_length=100)),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skill_index', to='resources.teammember')),
+            ],
+            options={
+                'db_table': 'team_member_skills',
+                'unique_together': {('skill', 'member')},
+            },
+        ),
+        migrations.RunPython(build_skill_index, migrations.RunPython.noop),
+    ]
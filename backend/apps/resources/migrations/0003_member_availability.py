@@ -0,0 +1,59 @@
+# Generated by Django 5.0.1 on 2026-10-19 00:19
+
+import django.core.validators
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+# PostgreSQL: GiST index over the inclusive date range, used by overlap (&&)
+# queries in apps.resources.availability. Other databases rely on the
+# (member, start_date, end_date) b-tree index.
+RANGE_INDEX = (
+    "CREATE INDEX member_availability_period_gist ON member_availability "
+    "USING gist (daterange(start_date, end_date, '[]'))"
+)
+
+
+def create_range_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(RANGE_INDEX)
+
+
+def drop_range_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS member_availability_period_gist')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resources', '0002_team_member_skills'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemberAvailability',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('leave', 'Leave'), ('part_time', 'Part-time'), ('holiday', 'Holiday')], default='leave', max_length=20)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('available_percentage', models.IntegerField(default=0, help_text='Share of normal capacity available during the period', validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(100)])),
+                ('note', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('member', models.ForeignKey(blank=True, help_text='Leave empty for periods that apply to every member', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='availability_periods', to='resources.teammember')),
+            ],
+            options={
+                'db_table': 'member_availability',
+                'ordering': ['start_date'],
+                'indexes': [models.Index(fields=['member', 'start_date', 'end_date'], name='member_avai_member__f0dc58_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='memberavailability',
+            constraint=models.CheckConstraint(check=models.Q(('end_date__gte', models.F('start_date'))), name='member_availability_dates_ordered'),
+        ),
+        migrations.RunPython(create_range_index, drop_range_index),
+    ]
@@ -2,6 +2,7 @@
 Team Members and Resource management models
 """
 import uuid
+from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import models
 from django.conf import settings
 
@@ -54,6 +55,22 @@ class TeamMember(models.Model):
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.role}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored skills so save() only rewrites the index when they change
+        instance._loaded_skills = instance.__dict__.get('skills')
+        return instance
+
+    def save(self, *args, **kwargs):
+        is_new = self._state.adding
+        previous_skills = getattr(self, '_loaded_skills', None)
+        super().save(*args, **kwargs)
+
+        if is_new or previous_skills != self.skills:
+            TeamMemberSkill.sync_member(self)
+        self._loaded_skills = self.skills
+
     @property
     def full_name(self):
         return self.user.get_full_name()
@@ -61,3 +78,116 @@ class TeamMember(models.Model):
     @property
     def email(self):
         return self.user.email
+
+
+def normalize_skill(skill):
+    """
+    Case- and whitespace-insensitive form of a skill name
+    """
+    return ' '.join(str(skill).split()).casefold()[:100]
+
+
+class TeamMemberSkill(models.Model):
+    """
+    Inverted index over TeamMember.skills: one row per member and normalized
+    skill, so members with a skill are found through an index instead of
+    scanning every member's JSON list. Maintained by TeamMember.save().
+    """
+    member = models.ForeignKey(
+        TeamMember,
+        on_delete=models.CASCADE,
+        related_name='skill_index'
+    )
+    skill = models.CharField(max_length=100)
+
+    class Meta:
+        db_table = 'team_member_skills'
+        unique_together = ('skill', 'member')
+
+    def __str__(self):
+        return f"{self.skill} - {self.member_id}"
+
+    @classmethod
+    def skills_of(cls, member):
+        return {normalize_skill(skill) for skill in (member.skills or []) if str(skill).strip()}
+
+    @classmethod
+    def sync_member(cls, member):
+        skills = cls.skills_of(member)
+        cls.objects.filter(member=member).exclude(skill__in=skills).delete()
+        cls.objects.bulk_create(
+            [cls(member=member, skill=skill) for skill in skills],
+            ignore_conflicts=True
+        )
+
+    @classmethod
+    def rebuild(cls, members=None):
+        """
+        Rebuild the index for the given members (all by default), e.g. after bulk writes
+        """
+        if members is None:
+            members = TeamMember.objects.all()
+            cls.objects.all().delete()
+        else:
+            cls.objects.filter(member__in=members).delete()
+        rows = [
+            cls(member_id=member.id, skill=skill)
+            for member in members.only('id', 'skills').iterator(chunk_size=2000)
+            for skill in cls.skills_of(member)
+        ]
+        cls.objects.bulk_create(rows, batch_size=5000, ignore_conflicts=True)
+        return len(rows)
+
+
+class MemberAvailability(models.Model):
+    """
+    A period in which a member works less than their usual capacity: leave,
+    part-time spells or holidays. Periods without a member apply to everyone
+    (e.g. public holidays). Dates are inclusive.
+
+    On PostgreSQL the periods are GiST-indexed as date ranges (see migration
+    0003), so overlap queries do not scan each member's history.
+    """
+    KIND_CHOICES = [
+        ('leave', 'Leave'),
+        ('part_time', 'Part-time'),
+        ('holiday', 'Holiday'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    member = models.ForeignKey(
+        TeamMember,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='availability_periods',
+        help_text="Leave empty for periods that apply to every member"
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='leave')
+    start_date = models.DateField()
+    end_date = models.DateField()
+    available_percentage = models.IntegerField(
+        default=0,
+        validators=[MinValueValidator(0), MaxValueValidator(100)],
+        help_text="Share of normal capacity available during the period"
+    )
+    note = models.CharField(max_length=255, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'member_availability'
+        ordering = ['start_date']
+        indexes = [
+            models.Index(fields=['member', 'start_date', 'end_date']),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(end_date__gte=models.F('start_date')),
+                name='member_availability_dates_ordered'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.start_date} - {self.end_date}"
@@ -0,0 +1,108 @@
+"""
+Staffing recommendations.
+
+Candidates come from the TeamMemberSkill index, so only members holding at
+least one (or all) of the requested skills are read. Their free capacity over
+the date range comes from apps.resources.availability, and the ranking is
+computed column-wise with NumPy. Ids and amounts are cast in SQL so rows
+arrive as plain strings and floats instead of UUID and Decimal objects.
+"""
+from uuid import UUID
+
+import numpy as np
+from django.db.models import Count, FloatField
+from django.db.models.functions import Cast
+
+from apps.resources.availability import available_hours, committed_hours, text, workdays, WORKDAYS_PER_WEEK
+from apps.resources.models import TeamMember, TeamMemberSkill, normalize_skill
+
+
+# Relative weight of each factor in a recommendation score
+STAFFING_WEIGHTS = {'skills': 0.5, 'availability': 0.35, 'cost': 0.15}
+
+
+def _candidates(skills, match_all):
+    """
+    Active members to consider, plus {member id (as text): matched skills}
+    """
+    members = TeamMember.objects.filter(is_active=True)
+    if not skills:
+        return members, {}
+
+    holders = TeamMemberSkill.objects.filter(skill__in=skills, member__is_active=True)
+    if match_all:
+        holders = holders.filter(
+            member__in=holders.values('member_id').annotate(matched=Count('id')).filter(
+                matched=len(skills)
+            ).values('member_id')
+        )
+    matched = {}
+    for member_id, skill in holders.annotate(member_text=text('member_id')).values_list('member_text', 'skill'):
+        matched.setdefault(member_id, set()).add(skill)
+    return members.filter(id__in=holders.values('member_id')), matched
+
+
+def recommend(skills, start, end, hours=None, match_all=False, exclude_task=None, exclude_members=(), limit=20):
+    """
+    Active members ranked by skill match, free capacity between start and
+    end after time off and booked work (against the hours needed when
+    given) and hourly rate
+    """
+    skills = sorted({normalize_skill(skill) for skill in skills if str(skill).strip()})
+    members, matched = _candidates(skills, match_all)
+    if exclude_members:
+        members = members.exclude(id__in=exclude_members)
+
+    rows = list(members.annotate(
+        id_text=text('id'),
+        rate=Cast('hourly_rate', output_field=FloatField()),
+    ).values_list('id_text', 'user__first_name', 'user__last_name', 'role', 'rate', 'capacity_hours_per_week'))
+    if not rows:
+        return []
+    ids, first_names, last_names, roles, rates, weekly_capacity = zip(*rows)
+
+    booked = committed_hours(members, start, end, exclude_task=exclude_task)
+    rates = np.array(rates, dtype=np.float64)
+    capacity = np.array(weekly_capacity, dtype=np.float64) * workdays(start, end) / WORKDAYS_PER_WEEK
+    available = available_hours(members, ids, weekly_capacity, start, end)
+    committed = np.array([booked.get(member_id, 0.0) for member_id in ids])
+    remaining = np.maximum(available - committed, 0)
+
+    if skills:
+        skill_score = np.array([len(matched.get(member_id, ())) for member_id in ids]) / len(skills)
+    else:
+        skill_score = np.ones(len(ids))
+    if hours:
+        availability = np.minimum(remaining / hours, 1)
+    else:
+        availability = np.divide(remaining, capacity, out=np.zeros_like(remaining), where=capacity > 0)
+    rate_range = rates.max() - rates.min()
+    cost_score = 1 - (rates - rates.min()) / rate_range if rate_range else np.ones(len(ids))
+
+    score = (
+        STAFFING_WEIGHTS['skills'] * skill_score
+        + STAFFING_WEIGHTS['availability'] * availability
+        + STAFFING_WEIGHTS['cost'] * cost_score
+    )
+    # Best score first; ties go to the cheaper member
+    order = np.lexsort((rates, -score))[:limit]
+
+    results = []
+    for position in order:
+        member_id = ids[position]
+        member_skills = matched.get(member_id, set())
+        results.append({
+            'id': UUID(member_id),
+            'name': f'{first_names[position]} {last_names[position]}'.strip(),
+            'role': roles[position],
+            'hourly_rate': float(rates[position]),
+            'matched_skills': sorted(member_skills),
+            'missing_skills': [skill for skill in skills if skill not in member_skills],
+            'capacity_hours': round(float(capacity[position]), 2),
+            'available_hours': round(float(available[position]), 2),
+            'committed_hours': round(float(committed[position]), 2),
+            'remaining_hours': round(float(remaining[position]), 2),
+            'estimated_cost': round(float(rates[position]) * hours, 2) if hours else None,
+            'score': round(float(score[position]), 4),
+        })
+    return results
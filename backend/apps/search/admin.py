@@ -0,0 +1,11 @@
+from django.contrib import admin
+from .models import SearchDocument
+
+
+@admin.register(SearchDocument)
+class SearchDocumentAdmin(admin.ModelAdmin):
+    list_display = ('entity_type', 'title', 'entity_id', 'project_id', 'updated_at')
+    list_filter = ('entity_type',)
+    search_fields = ('title', 'entity_id')
+    readonly_fields = ('updated_at',)
+    exclude = ('search_vector',)
@@ -0,0 +1,10 @@
+"""
+URL patterns for Search API
+"""
+from django.urls import path
+from .views import SearchView, AutocompleteView
+
+urlpatterns = [
+    path('', SearchView.as_view(), name='search'),
+    path('autocomplete/', AutocompleteView.as_view(), name='autocomplete'),
+]
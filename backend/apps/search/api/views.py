@@ -0,0 +1,88 @@
+"""
+API views for global search
+"""
+from uuid import UUID
+
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+
+from apps.projects.access import get_access
+from apps.search.autocomplete import AUTOCOMPLETE_KINDS, autocomplete
+from apps.search.services import ENTITY_TYPES, search
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+class SearchView(APIView):
+    """
+    Ranked full-text search across tasks, comments, projects and clients, e.g.
+    ?q=invoice&type=task,comment&project=<uuid>&limit=20&offset=0
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        params = request.query_params
+        query = params.get('q', '').strip()
+        if not query:
+            return Response({"error": "q parameter is required"}, status=400)
+
+        entity_types = [t for t in params.get('type', '').split(',') if t]
+        unknown = set(entity_types) - set(ENTITY_TYPES)
+        if unknown:
+            return Response({"error": f"type must be among {list(ENTITY_TYPES)}"}, status=400)
+
+        project_ids = None
+        if params.get('project'):
+            try:
+                project_ids = [UUID(value) for value in params['project'].split(',')]
+            except ValueError:
+                return Response({"error": "project must be a list of UUIDs"}, status=400)
+
+        try:
+            limit = min(int(params.get('limit', DEFAULT_LIMIT)), MAX_LIMIT)
+            offset = int(params.get('offset', 0))
+        except ValueError:
+            return Response({"error": "limit and offset must be integers"}, status=400)
+        if limit < 1 or offset < 0:
+            return Response({"error": "limit must be positive and offset not negative"}, status=400)
+
+        access = get_access(request.user)
+        # Fetch one extra row to know whether there is a next page
+        results = search(
+            query, entity_types, project_ids, limit=limit + 1, offset=offset,
+            visible_projects=None if access.unrestricted else access.project_filter()
+        )
+        return Response({
+            'query': query,
+            'limit': limit,
+            'offset': offset,
+            'next_offset': offset + limit if len(results) > limit else None,
+            'results': results[:limit],
+        })
+
+
+class AutocompleteView(APIView):
+    """
+    Typeahead matches for pickers, served from in-memory prefix indexes, e.g.
+    ?q=jo sm&type=member&limit=10
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        params = request.query_params
+        query = params.get('q', '').strip()
+        kinds = [t for t in params.get('type', '').split(',') if t]
+        if set(kinds) - set(AUTOCOMPLETE_KINDS):
+            return Response({"error": f"type must be among {list(AUTOCOMPLETE_KINDS)}"}, status=400)
+        try:
+            limit = min(int(params.get('limit', 10)), MAX_LIMIT)
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=400)
+        if limit < 1:
+            return Response({"error": "limit must be positive"}, status=400)
+
+        access = get_access(request.user)
+        visible = None if access.unrestricted else {'project': set(access.roles)}
+        return Response({'results': autocomplete(query, kinds, limit, visible=visible) if query else []})
@@ -0,0 +1,334 @@
+"""
+Typeahead autocomplete for team members, clients and projects.
+
+Each process keeps a sorted in-memory prefix index per kind, built on first
+use (or when a gunicorn worker starts, see gunicorn.conf.py) and kept current
+incrementally. Writes publish the ids they touched under a per-kind version
+counter in the shared cache; before answering, a process compares its index
+version with the shared one and reloads just the published ids, falling back
+to a full rebuild when it has fallen too far behind or the change records
+have expired.
+"""
+import heapq
+import logging
+import re
+import secrets
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+
+from apps.clients.models import Client
+from apps.projects.models import Project
+from apps.resources.models import TeamMember
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'autocomplete:{}:version'
+CHANGES_KEY = 'autocomplete:{}:changes:{}'
+
+# Change records older than this are gone; a process that far behind rebuilds
+CHANGES_TIMEOUT = 24 * 60 * 60
+# Most change records replayed before a full rebuild is cheaper
+MAX_REPLAY = 500
+
+DEFAULT_LIMIT = 10
+
+WORD_RE = re.compile(r'\w+')
+
+
+def normalize(text):
+    """
+    Case- and accent-insensitive form of a string
+    """
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(char for char in text if not unicodedata.combining(char)).casefold()
+
+
+def words(*values):
+    return {word for value in values for word in WORD_RE.findall(normalize(value))}
+
+
+def _local_part(email):
+    return (email or '').split('@')[0]
+
+
+def _member_entry(row):
+    member_id, first_name, last_name, email, role = row
+    label = f'{first_name} {last_name}'.strip() or email
+    return member_id, label, role, words(first_name, last_name, _local_part(email))
+
+
+def _client_entry(row):
+    client_id, name, company, contact_person, email = row
+    return client_id, name, company, words(name, company, contact_person, _local_part(email))
+
+
+def _project_entry(row):
+    project_id, name, client_name = row
+    return project_id, name, client_name, words(name, client_name)
+
+
+# kind -> (queryset of candidates, columns, row -> (id, label, detail, terms))
+AUTOCOMPLETE_SOURCES = {
+    'member': (
+        lambda: TeamMember.objects.filter(is_active=True),
+        ('id', 'user__first_name', 'user__last_name', 'user__email', 'role'),
+        _member_entry,
+    ),
+    'client': (
+        lambda: Client.objects.filter(is_active=True),
+        ('id', 'name', 'company', 'contact_person', 'email'),
+        _client_entry,
+    ),
+    'project': (
+        lambda: Project.objects.exclude(status='cancelled'),
+        ('id', 'name', 'client__name'),
+        _project_entry,
+    ),
+}
+
+AUTOCOMPLETE_KINDS = tuple(AUTOCOMPLETE_SOURCES)
+
+
+def load_entries(kind, ids=None):
+    queryset, columns, to_entry = AUTOCOMPLETE_SOURCES[kind]
+    rows = queryset().order_by()
+    if ids is not None:
+        rows = rows.filter(id__in=ids)
+    return [to_entry(row) for row in rows.values_list(*columns).iterator(chunk_size=5000)]
+
+
+def label_key(label):
+    return ' '.join(WORD_RE.findall(normalize(label)))
+
+
+class PrefixIndex:
+    """
+    Two sorted lists searched by bisection: (label key, id) for labels
+    starting with the query, and (term, label key, id) for any word of the
+    entity starting with a query word. Both are in result order, so a lookup
+    reads at most a handful of entries past the first k matches.
+    """
+    def __init__(self, kind):
+        self.kind = kind
+        self.version = None
+        self.lock = threading.RLock()
+        self.entries = {}
+        self.labels = []
+        self.keys = []
+
+    @staticmethod
+    def _entry(label, detail, terms):
+        return label, detail or '', tuple(sorted(terms)), label_key(label)
+
+    def build(self, entries, version):
+        indexed, labels, keys = {}, [], []
+        for entity_id, label, detail, terms in entries:
+            entity_id = str(entity_id)
+            entry = indexed[entity_id] = self._entry(label, detail, terms)
+            labels.append((entry[3], entity_id))
+            keys.extend((term, entry[3], entity_id) for term in entry[2])
+        labels.sort()
+        keys.sort()
+        with self.lock:
+            self.entries, self.labels, self.keys, self.version = indexed, labels, keys, version
+
+    @staticmethod
+    def _discard(items, item):
+        position = bisect_left(items, item)
+        if position < len(items) and items[position] == item:
+            del items[position]
+
+    def remove(self, entity_id):
+        entry = self.entries.pop(entity_id, None)
+        if entry is None:
+            return
+        self._discard(self.labels, (entry[3], entity_id))
+        for term in entry[2]:
+            self._discard(self.keys, (term, entry[3], entity_id))
+
+    def upsert(self, entity_id, label, detail, terms):
+        entity_id = str(entity_id)
+        self.remove(entity_id)
+        entry = self.entries[entity_id] = self._entry(label, detail, terms)
+        insort(self.labels, (entry[3], entity_id))
+        for term in entry[2]:
+            insort(self.keys, (term, entry[3], entity_id))
+
+    @staticmethod
+    def _range(items, prefix):
+        start = bisect_left(items, (prefix,))
+        # Every string starting with prefix sorts below prefix + the highest code point
+        end = bisect_left(items, (prefix + '\U0010ffff',), start)
+        return start, end
+
+    def search(self, query, limit=DEFAULT_LIMIT, allowed=None):
+        """
+        Best (sort key, id, label, detail) matches, among the ids in allowed
+        when given. Labels starting with the query come first, in label order;
+        then entities where every query word starts one of their words,
+        ordered by the word matched.
+        """
+        query_key = label_key(query)
+        query_words = set(query_key.split())
+        if not query_words:
+            return []
+
+        results, seen = [], set()
+        with self.lock:
+            start, end = self._range(self.labels, query_key)
+            for position in range(start, end):
+                key, entity_id = self.labels[position]
+                if allowed is not None and entity_id not in allowed:
+                    continue
+                label, detail, _, _ = self.entries[entity_id]
+                results.append(((0, key), entity_id, label, detail))
+                seen.add(entity_id)
+                if len(results) == limit:
+                    return results
+
+            # Scan the narrowest word range and check the other words per candidate
+            word, (start, end) = min(
+                ((word, self._range(self.keys, word)) for word in query_words),
+                key=lambda item: item[1][1] - item[1][0]
+            )
+            other_words = query_words - {word}
+            for position in range(start, end):
+                term, key, entity_id = self.keys[position]
+                if entity_id in seen or (allowed is not None and entity_id not in allowed):
+                    continue
+                seen.add(entity_id)
+                label, detail, terms, _ = self.entries[entity_id]
+                if other_words and not all(
+                    any(candidate.startswith(other) for candidate in terms) for other in other_words
+                ):
+                    continue
+                results.append(((1, term, key), entity_id, label, detail))
+                if len(results) == limit:
+                    break
+        return results
+
+
+_indexes = {kind: PrefixIndex(kind) for kind in AUTOCOMPLETE_KINDS}
+
+
+def shared_version(kind):
+    """
+    Current shared version of a kind's index. Counters start at a random
+    value so a flushed cache cannot reproduce a version a process has seen.
+    """
+    key = VERSION_KEY.format(kind)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, secrets.randbits(48), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(kind):
+    key = VERSION_KEY.format(kind)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, secrets.randbits(48), timeout=None)
+        return cache.incr(key)
+
+
+def _publish(kind, ids):
+    version = _bump(kind)
+    cache.set(CHANGES_KEY.format(kind, version), [str(entity_id) for entity_id in ids], CHANGES_TIMEOUT)
+
+
+def entities_changed(kind, ids):
+    """
+    Publish changed (saved or deleted) entity ids once the transaction commits
+    """
+    ids = [entity_id for entity_id in ids if entity_id is not None]
+    if ids:
+        transaction.on_commit(partial(_publish, kind, ids))
+
+
+def invalidate(kind):
+    """
+    Force every process to rebuild a kind's index, e.g. after bulk writes that bypass signals
+    """
+    transaction.on_commit(partial(_bump, kind))
+
+
+def _rebuild(index):
+    # Read the version first so writes committed during the load are replayed later
+    version = shared_version(index.kind)
+    index.build(load_entries(index.kind), version)
+
+
+def sync(index):
+    """
+    Bring a process-local index up to the shared version
+    """
+    current = shared_version(index.kind)
+    if index.version == current:
+        return
+    with index.lock:
+        if index.version == current:
+            return
+        behind = None if index.version is None else current - index.version
+        if behind is None or behind < 0 or behind > MAX_REPLAY:
+            _rebuild(index)
+            return
+
+        versions = range(index.version + 1, current + 1)
+        changes = cache.get_many([CHANGES_KEY.format(index.kind, version) for version in versions])
+        if len(changes) < len(versions):
+            # Expired, or published without ids by invalidate()
+            _rebuild(index)
+            return
+
+        ids = {entity_id for changed in changes.values() for entity_id in changed}
+        found = set()
+        for entity_id, label, detail, terms in load_entries(index.kind, ids):
+            index.upsert(entity_id, label, detail, terms)
+            found.add(str(entity_id))
+        for entity_id in ids - found:
+            index.remove(entity_id)
+        index.version = current
+
+
+def get_index(kind):
+    index = _indexes[kind]
+    sync(index)
+    return index
+
+
+def autocomplete(query, kinds=None, limit=DEFAULT_LIMIT, visible=None):
+    """
+    Top matches across the given kinds, best first. visible maps a kind to
+    the ids (as text) a user may see; kinds not in it are unrestricted.
+    """
+    matches = []
+    for kind in kinds or AUTOCOMPLETE_KINDS:
+        allowed = (visible or {}).get(kind)
+        for sort_key, entity_id, label, detail in get_index(kind).search(query, limit, allowed):
+            matches.append((sort_key, kind, entity_id, label, detail))
+    return [
+        {'type': kind, 'id': entity_id, 'label': label, 'detail': detail}
+        for _, kind, entity_id, label, detail in heapq.nsmallest(limit, matches)
+    ]
+
+
+def warm():
+    """
+    Build every index ahead of the first request
+    """
+    if not settings.AUTOCOMPLETE_WARM_ON_STARTUP:
+        return
+    try:
+        for kind in AUTOCOMPLETE_KINDS:
+            get_index(kind)
+    except DatabaseError:
+        # e.g. before the first migrate; indexes are then built on first use
+        logger.warning('Could not warm autocomplete indexes', exc_info=True)
@@ -0,0 +1,28 @@
+"""
+Filter backend that serves viewset ``?search=`` from the full-text index
+"""
+from rest_framework.filters import SearchFilter
+
+from apps.search.services import filter_matching, supports_full_text
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    Drop-in replacement for SearchFilter on views that set ``search_entity_type``.
+
+    Matches come from the search index instead of ILIKE scans over
+    ``search_fields``, as a subquery of the viewset's queryset, so its access
+    scoping, other filters and pagination see every match. Results are ordered
+    by rank unless ``?ordering=`` is given. Falls back to SearchFilter on
+    databases without a text index.
+    """
+    def filter_queryset(self, request, queryset, view):
+        entity_type = getattr(view, 'search_entity_type', None)
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query or entity_type is None or not supports_full_text():
+            return super().filter_queryset(request, queryset, view)
+
+        queryset = filter_matching(queryset, entity_type, query)
+        if request.query_params.get('ordering'):
+            return queryset
+        return queryset.order_by('-search_rank', 'pk')
@@ -0,0 +1,27 @@
+"""
+Rebuild the full-text search index from the source tables
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.search.services import ENTITY_TYPES, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Reindex tasks, comments, projects and clients for full-text search'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--type', action='append', dest='types', default=None,
+            help=f'Only reindex this entity type ({", ".join(ENTITY_TYPES)}); may be repeated'
+        )
+
+    def handle(self, *args, **options):
+        types = options['types']
+        if types and set(types) - set(ENTITY_TYPES):
+            raise CommandError(f'--type must be one of {", ".join(ENTITY_TYPES)}')
+
+        def progress(entity_type, total):
+            self.stdout.write(f'Indexed {entity_type} ({total} documents so far)')
+
+        total = rebuild_index(types, progress=progress)
+        self.stdout.write(self.style.SUCCESS(f'Indexed {total} documents'))
@@ -0,0 +1,111 @@
+# Generated by Django 5.0.1 on 2026-10-19 00:09
+
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+# PostgreSQL: a trigger keeps search_vector (title weighted A, body B) current
+# and a GIN index serves the @@ matches. SQLite: an external-content FTS5
+# table mirrors title and body through triggers. Other databases get neither.
+
+POSTGRESQL_FORWARD = [
+    """
+    CREATE FUNCTION search_documents_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.body, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER search_documents_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, body ON search_documents
+    FOR EACH ROW EXECUTE FUNCTION search_documents_vector_update()
+    """,
+    'CREATE INDEX search_documents_vector_gin ON search_documents USING GIN (search_vector)',
+]
+
+POSTGRESQL_REVERSE = [
+    'DROP INDEX IF EXISTS search_documents_vector_gin',
+    'DROP TRIGGER IF EXISTS search_documents_vector_trigger ON search_documents',
+    'DROP FUNCTION IF EXISTS search_documents_vector_update()',
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE search_documents_fts USING fts5(
+        title, body, content='search_documents', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER search_documents_fts_insert AFTER INSERT ON search_documents BEGIN
+        INSERT INTO search_documents_fts (rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER search_documents_fts_delete AFTER DELETE ON search_documents BEGIN
+        INSERT INTO search_documents_fts (search_documents_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER search_documents_fts_update AFTER UPDATE OF title, body ON search_documents BEGIN
+        INSERT INTO search_documents_fts (search_documents_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO search_documents_fts (rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+]
+
+SQLITE_REVERSE = [
+    'DROP TRIGGER IF EXISTS search_documents_fts_update',
+    'DROP TRIGGER IF EXISTS search_documents_fts_delete',
+    'DROP TRIGGER IF EXISTS search_documents_fts_insert',
+    'DROP TABLE IF EXISTS search_documents_fts',
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def create_text_index(apps, schema_editor):
+    _run(schema_editor, {'postgresql': POSTGRESQL_FORWARD, 'sqlite': SQLITE_FORWARD})
+
+
+def drop_text_index(apps, schema_editor):
+    _run(schema_editor, {'postgresql': POSTGRESQL_REVERSE, 'sqlite': SQLITE_REVERSE})
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity_type', models.CharField(choices=[('task', 'Task'), ('comment', 'Comment'), ('project', 'Project'), ('client', 'Client')], max_length=20)),
+                ('entity_id', models.UUIDField()),
+                ('project_id', models.UUIDField(blank=True, null=True)),
+                ('parent_id', models.UUIDField(blank=True, null=True)),
+                ('title', models.CharField(blank=True, max_length=255)),
+                ('body', models.TextField(blank=True)),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(editable=False, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'search_documents',
+                'indexes': [models.Index(fields=['project_id'], name='search_docu_project_582e68_idx')],
+                'unique_together': {('entity_type', 'entity_id')},
+            },
+        ),
+        migrations.RunPython(create_text_index, drop_text_index),
+    ]
@@ -0,0 +1,46 @@
+"""
+Search models - a denormalized full-text index over tasks, comments,
+projects and clients
+"""
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models
+
+
+class SearchDocument(models.Model):
+    """
+    The indexed text of one searchable entity.
+
+    On PostgreSQL ``search_vector`` is filled by a trigger and GIN-indexed;
+    on SQLite an FTS5 table mirrors title and body instead (see migration 0001).
+    """
+    ENTITY_CHOICES = [
+        ('task', 'Task'),
+        ('comment', 'Comment'),
+        ('project', 'Project'),
+        ('client', 'Client'),
+    ]
+
+    entity_type = models.CharField(max_length=20, choices=ENTITY_CHOICES)
+    entity_id = models.UUIDField()
+
+    # Project the entity belongs to (the project itself for projects), for scoping
+    project_id = models.UUIDField(null=True, blank=True)
+    # Task a comment belongs to
+    parent_id = models.UUIDField(null=True, blank=True)
+
+    title = models.CharField(max_length=255, blank=True)
+    body = models.TextField(blank=True)
+
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'search_documents'
+        unique_together = ('entity_type', 'entity_id')
+        indexes = [
+            models.Index(fields=['project_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.entity_type}:{self.entity_id}"
@@ -0,0 +1,268 @@
+"""
+Search services - keeping the index up to date and querying it.
+
+PostgreSQL ranks with ts_rank over a weighted tsvector (title A, body B);
+SQLite ranks with FTS5's bm25 using the same title/body weighting. Both
+return higher-is-better ranks.
+"""
+import re
+import uuid
+
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F, OuterRef, Q, Subquery, TextField, UUIDField, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce, Concat
+
+from apps.clients.models import Client
+from apps.projects.models import Project
+from apps.search.models import SearchDocument
+from apps.tasks.models import Task, Comment
+
+
+# Text search configuration used by the PostgreSQL trigger (migration 0001)
+SEARCH_CONFIG = 'english'
+
+# Databases with a text index (see migration 0001)
+FULL_TEXT_VENDORS = ('postgresql', 'sqlite')
+
+INDEX_BATCH_SIZE = 2000
+
+# Title matches count ten times as much as body matches in bm25 (SQLite)
+TITLE_WEIGHT, BODY_WEIGHT = 10.0, 1.0
+
+
+def _text(*parts):
+    """
+    Space-separated concatenation of nullable text columns
+    """
+    values = []
+    for part in parts:
+        if values:
+            values.append(Value(' '))
+        values.append(Coalesce(part, Value('')))
+    return Concat(*values, output_field=TextField())
+
+
+# entity type -> (model, fields whose changes require reindexing, document columns)
+SEARCH_SOURCES = {
+    'task': (Task, {'title', 'description', 'project_id'}, {
+        'project_id': F('project_id'),
+        'parent_id': Value(None, output_field=UUIDField()),
+        'title': F('title'),
+        'body': F('description'),
+    }),
+    'comment': (Comment, {'content', 'task_id'}, {
+        'project_id': F('task__project_id'),
+        'parent_id': F('task_id'),
+        'title': Value(''),
+        'body': F('content'),
+    }),
+    'project': (Project, {'name', 'description', 'client_id'}, {
+        'project_id': F('id'),
+        'parent_id': Value(None, output_field=UUIDField()),
+        'title': F('name'),
+        'body': _text('description', 'client__name'),
+    }),
+    'client': (Client, {'name', 'company', 'contact_person', 'email', 'notes'}, {
+        'project_id': Value(None, output_field=UUIDField()),
+        'parent_id': Value(None, output_field=UUIDField()),
+        'title': F('name'),
+        'body': _text('company', 'contact_person', 'email', 'notes'),
+    }),
+}
+
+ENTITY_TYPES = tuple(SEARCH_SOURCES)
+
+
+def index_entities(entity_type, ids):
+    """
+    Upsert the documents for the given entity ids, removing those whose entity is gone
+    """
+    model, _, columns = SEARCH_SOURCES[entity_type]
+    ids = list(ids)
+    if not ids:
+        return 0
+
+    rows = model.objects.filter(id__in=ids).annotate(
+        **{f'doc_{name}': expression for name, expression in columns.items()}
+    ).values_list('id', *[f'doc_{name}' for name in columns])
+
+    documents = [
+        SearchDocument(
+            entity_type=entity_type,
+            entity_id=entity_id,
+            project_id=project_id,
+            parent_id=parent_id,
+            title=(title or '')[:255],
+            body=body or ''
+        )
+        for entity_id, project_id, parent_id, title, body in rows
+    ]
+    SearchDocument.objects.bulk_create(
+        documents,
+        batch_size=INDEX_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['entity_type', 'entity_id'],
+        update_fields=['project_id', 'parent_id', 'title', 'body', 'updated_at']
+    )
+
+    found = {document.entity_id for document in documents}
+    missing = [entity_id for entity_id in ids if _as_uuid(entity_id) not in found]
+    if missing:
+        remove_entities(entity_type, missing)
+    return len(documents)
+
+
+def remove_entities(entity_type, ids):
+    SearchDocument.objects.filter(entity_type=entity_type, entity_id__in=list(ids)).delete()
+
+
+def rebuild_index(entity_types=None, progress=None):
+    """
+    Reindex every entity of the given types in batches and drop orphaned documents
+    """
+    total = 0
+    for entity_type in entity_types or ENTITY_TYPES:
+        model = SEARCH_SOURCES[entity_type][0]
+        batch = []
+        for entity_id in model.objects.order_by().values_list('id', flat=True).iterator(chunk_size=INDEX_BATCH_SIZE):
+            batch.append(entity_id)
+            if len(batch) >= INDEX_BATCH_SIZE:
+                total += index_entities(entity_type, batch)
+                batch = []
+        total += index_entities(entity_type, batch)
+        SearchDocument.objects.filter(entity_type=entity_type).exclude(
+            entity_id__in=model.objects.values('id')
+        ).delete()
+        if progress:
+            progress(entity_type, total)
+    return total
+
+
+def supports_full_text():
+    return connection.vendor in FULL_TEXT_VENDORS
+
+
+def _as_uuid(value):
+    return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+
+
+def _fts5_query(query):
+    """
+    FTS5 MATCH expression: every word must match, each as a prefix.
+    Quoting the words keeps user input from being read as FTS5 syntax.
+    """
+    words = re.findall(r'\w+', query)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def _result(document, rank, snippet):
+    return {
+        'type': document.entity_type,
+        'id': document.entity_id,
+        'project_id': document.project_id,
+        'parent_id': document.parent_id,
+        'title': document.title,
+        'snippet': snippet or document.body[:200],
+        'rank': round(float(rank), 4),
+    }
+
+
+def _search_postgresql(query, documents, limit, offset):
+    search_query = SearchQuery(query, search_type='websearch', config=SEARCH_CONFIG)
+    matches = documents.filter(search_vector=search_query).annotate(
+        rank=SearchRank(F('search_vector'), search_query),
+        snippet=SearchHeadline('body', search_query, config=SEARCH_CONFIG, max_words=30, min_words=10),
+    ).defer('search_vector').order_by('-rank', 'id')[offset:offset + limit]
+    return [_result(document, document.rank, document.snippet) for document in matches]
+
+
+def _search_sqlite(query, documents, limit, offset):
+    match = _fts5_query(query)
+    if not match:
+        return []
+
+    # Apply the ORM filters (type, project) through an id subquery
+    filter_sql, filter_params = documents.values('id').query.sql_with_params()
+    sql = f"""
+        SELECT search_documents_fts.rowid,
+               bm25(search_documents_fts, {TITLE_WEIGHT}, {BODY_WEIGHT}) AS rank,
+               snippet(search_documents_fts, 1, '<b>', '</b>', '...', 16) AS snippet
+        FROM search_documents_fts
+        WHERE search_documents_fts MATCH %s AND search_documents_fts.rowid IN ({filter_sql})
+        ORDER BY rank, search_documents_fts.rowid
+        LIMIT %s OFFSET %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [match, *filter_params, limit, offset])
+        hits = cursor.fetchall()
+
+    by_id = SearchDocument.objects.defer('search_vector').in_bulk([row_id for row_id, _, _ in hits])
+    # bm25 is lower-is-better; flip it so both backends rank the same way
+    return [_result(by_id[row_id], -rank, snippet) for row_id, rank, snippet in hits if row_id in by_id]
+
+
+def search(query, entity_types=None, project_ids=None, limit=20, offset=0, visible_projects=None):
+    """
+    Ranked documents matching a free-text query. visible_projects (ids or a
+    subquery) hides documents of other projects; clients are not project-scoped.
+    """
+    query = (query or '').strip()
+    if not query:
+        return []
+
+    documents = SearchDocument.objects.all()
+    if entity_types:
+        documents = documents.filter(entity_type__in=entity_types)
+    if project_ids is not None:
+        documents = documents.filter(project_id__in=project_ids)
+    if visible_projects is not None:
+        documents = documents.filter(Q(project_id__in=visible_projects) | Q(entity_type='client'))
+
+    if connection.vendor == 'postgresql':
+        return _search_postgresql(query, documents, limit, offset)
+    return _search_sqlite(query, documents, limit, offset)
+
+
+def filter_matching(queryset, entity_type, query):
+    """
+    A viewset's queryset narrowed in SQL to the entities matching a free-text
+    query, annotated with their search_rank (higher is better). The match is a
+    subquery on the search documents and the rank a correlated one, so the
+    queryset's own filters and pagination apply to every match.
+    """
+    if connection.vendor == 'postgresql':
+        search_query = SearchQuery(query, search_type='websearch', config=SEARCH_CONFIG)
+        documents = SearchDocument.objects.filter(entity_type=entity_type, search_vector=search_query)
+        ranks = documents.filter(entity_id=OuterRef('pk')).annotate(
+            rank=SearchRank(F('search_vector'), search_query)
+        ).values('rank')[:1]
+        return queryset.filter(pk__in=documents.values('entity_id')).annotate(search_rank=Subquery(ranks))
+
+    match = _fts5_query(query)
+    if not match:
+        return queryset.annotate(search_rank=Value(0.0)).none()
+    matches = RawSQL(
+        """
+        SELECT search_documents.entity_id
+        FROM search_documents_fts JOIN search_documents ON search_documents.id = search_documents_fts.rowid
+        WHERE search_documents_fts MATCH %s AND search_documents.entity_type = %s
+        """,
+        [match, entity_type]
+    )
+    # The outer table is not aliased by the ORM, so it is referenced by name
+    meta = queryset.model._meta
+    rank = RawSQL(
+        f"""
+        SELECT -bm25(search_documents_fts, {TITLE_WEIGHT}, {BODY_WEIGHT})
+        FROM search_documents_fts
+        WHERE search_documents_fts MATCH %s AND search_documents_fts.rowid = (
+            SELECT search_documents.id FROM search_documents
+            WHERE search_documents.entity_type = %s
+              AND search_documents.entity_id = "{meta.db_table}"."{meta.pk.column}"
+        )
+        """,
+        [match, entity_type]
+    )
+    return queryset.filter(pk__in=matches).annotate(search_rank=rank)
@@ -0,0 +1,95 @@
+"""
+Signal handlers that keep the search index in step with the indexed models.
+
+Documents are rewritten after the transaction commits, and only when an
+indexed field actually changed. Autocomplete indexes are told which
+members, clients and projects changed.
+"""
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from apps.clients.models import Client
+from apps.projects.models import Project
+from apps.resources.models import TeamMember
+from apps.search.autocomplete import entities_changed
+from apps.search.services import SEARCH_SOURCES, index_entities, remove_entities
+
+
+def _entity_type(sender):
+    for entity_type, (model, _, _) in SEARCH_SOURCES.items():
+        if model is sender:
+            return entity_type
+    return None
+
+
+def mark_dirty(sender, instance, raw=False, **kwargs):
+    """
+    Decide before the save whether the document needs rewriting; the
+    activity snapshot is reset by the activity handlers after the save
+    """
+    if raw:
+        return
+    _, indexed_fields, _ = SEARCH_SOURCES[_entity_type(sender)]
+    if instance._state.adding or not hasattr(instance, 'activity_changes'):
+        instance._search_dirty = True
+        return
+    if getattr(instance, '_activity_snapshot', None) is None:
+        instance._search_dirty = True
+        return
+    instance._search_dirty = bool(indexed_fields & set(instance.activity_changes()))
+
+
+def document_saved(sender, instance, raw=False, **kwargs):
+    if raw or not getattr(instance, '_search_dirty', True):
+        return
+    instance._search_dirty = False
+    entity_type = _entity_type(sender)
+    transaction.on_commit(partial(index_entities, entity_type, [instance.pk]))
+    if entity_type == 'client':
+        # The client's name is part of its projects' documents
+        transaction.on_commit(partial(_reindex_client_projects, instance.pk))
+
+
+def document_deleted(sender, instance, **kwargs):
+    transaction.on_commit(partial(remove_entities, _entity_type(sender), [instance.pk]))
+
+
+def _reindex_client_projects(client_id):
+    index_entities('project', Project.objects.filter(client_id=client_id).values_list('id', flat=True))
+
+
+for entity_type, (model, _, _) in SEARCH_SOURCES.items():
+    pre_save.connect(mark_dirty, sender=model, dispatch_uid=f'search-dirty-{entity_type}')
+    post_save.connect(document_saved, sender=model, dispatch_uid=f'search-save-{entity_type}')
+    post_delete.connect(document_deleted, sender=model, dispatch_uid=f'search-delete-{entity_type}')
+
+
+# Autocomplete
+
+def member_changed(sender, instance, **kwargs):
+    entities_changed('member', [instance.pk])
+
+
+def client_changed(sender, instance, **kwargs):
+    entities_changed('client', [instance.pk])
+    # Projects show their client's name
+    entities_changed('project', Project.objects.filter(client_id=instance.pk).values_list('id', flat=True))
+
+
+def project_changed(sender, instance, **kwargs):
+    entities_changed('project', [instance.pk])
+
+
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    entities_changed('member', TeamMember.objects.filter(user_id=instance.pk).values_list('id', flat=True))
+
+
+for model, handler in ((TeamMember, member_changed), (Client, client_changed), (Project, project_changed)):
+    post_save.connect(handler, sender=model, dispatch_uid=f'autocomplete-save-{model.__name__}')
+    post_delete.connect(handler, sender=model, dispatch_uid=f'autocomplete-delete-{model.__name__}')
+post_save.connect(user_saved, sender=get_user_model(), dispatch_uid='autocomplete-save-user')
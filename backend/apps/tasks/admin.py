@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Task, TaskDependency, TaskAssignment, Comment
+from .models import Task, TaskDependency, TaskAssignment, Comment, TaskStatusTransition
 
 
 class TaskAssignmentInline(admin.TabularInline):
@@ -83,3 +83,11 @@ class CommentAdmin(admin.ModelAdmin):
     def content_preview(self, obj):
         return obj.content[:50] + '...' if len(obj.content) > 50 else obj.content
     content_preview.short_description = 'Content'
+
+
+@admin.register(TaskStatusTransition)
+class TaskStatusTransitionAdmin(admin.ModelAdmin):
+    list_display = ('task', 'from_status', 'to_status', 'transitioned_at')
+    list_filter = ('to_status', 'transitioned_at')
+    raw_id_fields = ('task', 'project')
+    ordering = ('-transitioned_at',)
@@ -2,6 +2,8 @@
 Serializers for Task management
 """
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+from apps.projects.access import scope_queryset
 from apps.tasks.models import Task, TaskDependency, TaskAssignment, Comment
 from apps.resources.api.serializers import TeamMemberListSerializer
 
@@ -36,6 +38,22 @@ class TaskDependencySerializer(serializers.ModelSerializer):
         )
         read_only_fields = ('id', 'created_at')
 
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is not None and request.method not in SAFE_METHODS:
+            # Only tasks of projects the user can see can be linked
+            for name in ('predecessor', 'successor'):
+                fields[name].queryset = scope_queryset(Task.objects.all(), request.user)
+        return fields
+
+    def validate(self, attrs):
+        predecessor = attrs.get('predecessor', getattr(self.instance, 'predecessor', None))
+        successor = attrs.get('successor', getattr(self.instance, 'successor', None))
+        if predecessor and successor and predecessor.project_id != successor.project_id:
+            raise serializers.ValidationError("Predecessor and successor must belong to the same project")
+        return attrs
+
 
 class CommentSerializer(serializers.ModelSerializer):
     """
@@ -1,11 +1,16 @@
 """
 API views for Task management
 """
+from uuid import UUID
+
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from django.db.models import Prefetch
 from django_filters.rest_framework import DjangoFilterBackend
+from apps.projects.access import EDIT_ROLES, scope_queryset
+from apps.projects.permissions import ProjectScopedMixin
+from apps.search.filters import FullTextSearchFilter
 from apps.tasks.models import Task, TaskDependency, TaskAssignment, Comment
 from .serializers import (
     TaskSerializer,
@@ -19,18 +24,31 @@ from .serializers import (
 )
 
 
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(ProjectScopedMixin, viewsets.ModelViewSet):
     """
     ViewSet for Task CRUD operations
     """
-    queryset = Task.objects.select_related('project', 'parent_task').prefetch_related('assigned_to').all()
-    permission_classes = (IsAuthenticated,)
-    filter_backends = (DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter)
+    queryset = Task.objects.select_related('project', 'parent_task').prefetch_related('assigned_to__user').all()
+    # Only match UUIDs so the dependencies/, assignments/ and comments/ routes are not shadowed
+    lookup_value_regex = '[0-9a-f-]{36}'
+    # The search filter runs last so it can order matches by rank
+    filter_backends = (DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter)
     filterset_fields = ('project', 'status', 'priority', 'is_critical', 'assigned_to')
     search_fields = ('title', 'description')
+    search_entity_type = 'task'
     ordering_fields = ('title', 'start_date', 'end_date', 'priority', 'kanban_order')
     ordering = ('start_date',)
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('retrieve', 'update_progress', 'update_status', 'move_kanban'):
+            # TaskSerializer nests assignments and dependencies
+            return queryset.prefetch_related(
+                Prefetch('taskassignment_set', queryset=TaskAssignment.objects.select_related('team_member__user')),
+                Prefetch('predecessors', queryset=TaskDependency.objects.select_related('predecessor', 'successor')),
+            )
+        return queryset
+
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
             return TaskCreateSerializer
@@ -54,7 +72,7 @@ class TaskViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        tasks = self.queryset.filter(project_id=project_id).order_by('kanban_order')
+        tasks = self.get_queryset().filter(project_id=project_id).order_by('kanban_order')
         serializer = self.get_serializer(tasks, many=True)
 
         # Organize by status
@@ -85,19 +103,19 @@ class TaskViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        tasks = self.queryset.filter(project_id=project_id).order_by('start_date')
+        tasks = self.get_queryset().filter(project_id=project_id).order_by('start_date')
         task_serializer = self.get_serializer(tasks, many=True)
 
         # Get dependencies
-        dependencies = TaskDependency.objects.filter(
+        dependencies = scope_queryset(TaskDependency.objects, request.user, 'predecessor__project_id').filter(
             predecessor__project_id=project_id
         )
         dependency_data = []
         for dep in dependencies:
             dependency_data.append({
                 'id': str(dep.id),
-                'source': str(dep.predecessor.id),
-                'target': str(dep.successor.id),
+                'source': str(dep.predecessor_id),
+                'target': str(dep.successor_id),
                 'type': dep.dependency_type.lower().replace('-', '_'),
                 'lag': dep.lag
             })
@@ -167,39 +185,74 @@ class TaskViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(task)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['post'])
+    def bulk_update_status(self, request):
+        """
+        Update the status of many tasks at once
+        """
+        task_ids = request.data.get('ids') or []
+        new_status = request.data.get('status')
+
+        valid_statuses = [choice for choice, _ in Task.STATUS_CHOICES]
+        if new_status not in valid_statuses:
+            return Response(
+                {"error": f"Status must be one of {valid_statuses}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not isinstance(task_ids, list) or not task_ids:
+            return Response(
+                {"error": "ids must be a non-empty list"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            task_ids = [UUID(str(task_id)) for task_id in task_ids]
+        except ValueError:
+            return Response({"error": "ids must be task ids"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Tasks of projects the user cannot edit are left alone
+        tasks = scope_queryset(Task.objects.filter(id__in=task_ids), request.user, roles=EDIT_ROLES)
+        updated = tasks.update_status(new_status)
+        return Response({'updated': updated})
+
 
-class TaskDependencyViewSet(viewsets.ModelViewSet):
+class TaskDependencyViewSet(ProjectScopedMixin, viewsets.ModelViewSet):
     """
     ViewSet for TaskDependency CRUD operations
     """
     queryset = TaskDependency.objects.select_related('predecessor', 'successor').all()
     serializer_class = TaskDependencySerializer
-    permission_classes = (IsAuthenticated,)
+    project_scope = 'successor__project_id'
+    project_attr = 'successor.project_id'
     filter_backends = (DjangoFilterBackend,)
     filterset_fields = ('predecessor', 'successor', 'dependency_type')
 
 
-class TaskAssignmentViewSet(viewsets.ModelViewSet):
+class TaskAssignmentViewSet(ProjectScopedMixin, viewsets.ModelViewSet):
     """
     ViewSet for TaskAssignment CRUD operations
     """
-    queryset = TaskAssignment.objects.select_related('task', 'team_member').all()
+    queryset = TaskAssignment.objects.select_related('task', 'team_member__user').all()
     serializer_class = TaskAssignmentSerializer
-    permission_classes = (IsAuthenticated,)
+    project_scope = 'task__project_id'
+    project_attr = 'task.project_id'
     filter_backends = (DjangoFilterBackend,)
     filterset_fields = ('task', 'team_member')
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ProjectScopedMixin, viewsets.ModelViewSet):
     """
     ViewSet for Comment CRUD operations
     """
     queryset = Comment.objects.select_related('task', 'author').prefetch_related('mentions').all()
     serializer_class = CommentSerializer
-    permission_classes = (IsAuthenticated,)
-    filter_backends = (DjangoFilterBackend, filters.OrderingFilter)
+    project_scope = 'task__project_id'
+    project_attr = 'task.project_id'
+    filter_backends = (DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter)
     filterset_fields = ('task',)
+    search_fields = ('content',)
+    search_entity_type = 'comment'
     ordering = ('-created_at',)
 
     def perform_create(self, serializer):
+        self.check_project_write(serializer)
         serializer.save(author=self.request.user)
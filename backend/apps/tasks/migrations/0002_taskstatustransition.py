@@ -0,0 +1,31 @@
+# Generated by Django 5.0.1 on 2026-10-18 23:48
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0001_initial'),
+        ('tasks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskStatusTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, max_length=20)),
+                ('to_status', models.CharField(max_length=20)),
+                ('transitioned_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('project', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='projects.project')),
+                ('task', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='status_transitions', to='tasks.task')),
+            ],
+            options={
+                'db_table': 'task_status_transitions',
+                'indexes': [models.Index(fields=['project', 'transitioned_at'], name='task_status_project_ad3a6b_idx'), models.Index(fields=['task', 'transitioned_at'], name='task_status_task_id_e23f0e_idx')],
+            },
+        ),
+    ]
@@ -2,12 +2,73 @@
 Task management models with Gantt and Kanban support
 """
 import uuid
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 
+from apps.projects.activity import ActivityTrackedMixin, record_many
 
-class Task(models.Model):
+
+class TaskQuerySet(models.QuerySet):
+    """
+    QuerySet helpers for tasks
+    """
+    def update_status(self, new_status, batch_size=1000):
+        """
+        Bulk status change that still records a transition and an activity
+        log entry for every changed task, with one insert per batch for each
+        """
+        from apps.projects.models import ActivityLog
+        from apps.tasks.signals import tasks_bulk_updated
+
+        now = timezone.now()
+
+        with transaction.atomic():
+            # Lock the rows so a concurrent change cannot slip between the read and the update
+            changed = list(
+                self.exclude(status=new_status)
+                .select_for_update(of=('self',))
+                .order_by('id')
+                .values_list('id', 'project_id', 'status', 'title')
+            )
+            for start in range(0, len(changed), batch_size):
+                batch = changed[start:start + batch_size]
+                Task.objects.filter(id__in=[task_id for task_id, _, _, _ in batch]).update(
+                    status=new_status,
+                    updated_at=now
+                )
+                TaskStatusTransition.objects.bulk_create([
+                    TaskStatusTransition(
+                        task_id=task_id,
+                        project_id=project_id,
+                        from_status=old_status,
+                        to_status=new_status,
+                        transitioned_at=now
+                    )
+                    for task_id, project_id, old_status, _ in batch
+                ])
+                record_many([
+                    ActivityLog(
+                        project_id=project_id,
+                        action='updated',
+                        entity_type='task',
+                        entity_id=task_id,
+                        description=f"Task '{title}' updated: status",
+                        changes={'status': {'old': old_status, 'new': new_status}}
+                    )
+                    for task_id, project_id, old_status, title in batch
+                ])
+
+        if changed:
+            tasks_bulk_updated.send(
+                sender=Task,
+                project_ids={project_id for _, project_id, _, _ in changed}
+            )
+        return len(changed)
+
+
+class Task(ActivityTrackedMixin, models.Model):
     """
     Tasks with Gantt and Kanban support
     """
@@ -102,6 +163,8 @@ class Task(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TaskQuerySet.as_manager()
+
     class Meta:
         db_table = 'tasks'
         ordering = ['kanban_order', 'start_date']
@@ -116,6 +179,20 @@ class Task(models.Model):
     def __str__(self):
         return f"{self.project.name} - {self.title}"
 
+    def save(self, *args, **kwargs):
+        is_new = self._state.adding
+        # Read before saving: the post_save activity receiver resets the snapshot
+        status_change = None if is_new else self.activity_changes().get('status')
+        super().save(*args, **kwargs)
+
+        if is_new or status_change:
+            TaskStatusTransition.objects.create(
+                task=self,
+                project_id=self.project_id,
+                from_status='' if is_new else status_change['old'],
+                to_status=self.status
+            )
+
     @property
     def cost_variance(self):
         """Calculate cost variance (estimated - actual)"""
@@ -129,7 +206,42 @@ class Task(models.Model):
         return 0
 
 
-class TaskDependency(models.Model):
+class TaskStatusTransition(models.Model):
+    """
+    Append-only log of task status changes, used for flow analytics.
+    Kept narrow and lightly indexed because it is written on every status change.
+    """
+    task = models.ForeignKey(
+        Task,
+        on_delete=models.CASCADE,
+        related_name='status_transitions',
+        db_index=False
+    )
+    # Denormalized from the task so per-project scans avoid a join
+    project = models.ForeignKey(
+        'projects.Project',
+        on_delete=models.CASCADE,
+        related_name='+',
+        db_index=False
+    )
+
+    from_status = models.CharField(max_length=20, blank=True)
+    to_status = models.CharField(max_length=20)
+
+    transitioned_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'task_status_transitions'
+        indexes = [
+            models.Index(fields=['project', 'transitioned_at']),
+            models.Index(fields=['task', 'transitioned_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.task_id}: {self.from_status or '-'} -> {self.to_status}"
+
+
+class TaskDependency(ActivityTrackedMixin, models.Model):
     """
     Task Dependencies for Gantt Chart
     """
@@ -204,7 +316,7 @@ class TaskDependency(models.Model):
         return False
 
 
-class TaskAssignment(models.Model):
+class TaskAssignment(ActivityTrackedMixin, models.Model):
     """
     Many-to-Many through table for Task-TeamMember assignments
     """
@@ -228,7 +340,7 @@ class TaskAssignment(models.Model):
         return f"{self.task.title} -> {self.team_member.full_name}"
 
 
-class Comment(models.Model):
+class Comment(ActivityTrackedMixin, models.Model):
     """
     Task comments and collaboration
     """
@@ -0,0 +1,7 @@
+"""
+Custom signals for task writes that bypass model save()
+"""
+from django.dispatch import Signal
+
+# Sent after a queryset-level task update; provides `project_ids`
+tasks_bulk_updated = Signal()
@@ -3,6 +3,7 @@ Django settings for Project Management System.
 """
 from pathlib import Path
 from datetime import timedelta
+from celery.schedules import crontab
 from decouple import config
 
 # Build paths inside the project
@@ -38,9 +39,12 @@ INSTALLED_APPS = [
     'apps.tasks',
     'apps.resources',
     'apps.analytics',
+    'apps.search',
+    'apps.monitoring',
 ]
 
 MIDDLEWARE = [
+    'apps.monitoring.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -48,6 +52,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.projects.activity.ActivityLogMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -126,7 +131,7 @@ AUTH_USER_MODEL = 'accounts.User'
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.accounts.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -147,12 +152,63 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(minutes=config('JWT_REFRESH_TOKEN_LIFETIME', default=10080, cast=int)),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
-    'UPDATE_LAST_LOGIN': True,
+    # Logins update last_login at most every LAST_LOGIN_UPDATE_INTERVAL (accounts serializers)
+    'UPDATE_LAST_LOGIN': False,
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_REFRESH_SERIALIZER': 'apps.accounts.api.serializers.CustomTokenRefreshSerializer',
 }
 
+# Authenticated users are cached per process for AUTH_USER_LOCAL_TTL seconds
+# and in the shared cache for AUTH_USER_CACHE_TIMEOUT seconds; saves invalidate them
+AUTH_USER_LOCAL_TTL = config('AUTH_USER_LOCAL_TTL', default=5, cast=int)
+AUTH_USER_CACHE_TIMEOUT = config('AUTH_USER_CACHE_TIMEOUT', default=300, cast=int)
+# Seconds between last_login writes for a user
+LAST_LOGIN_UPDATE_INTERVAL = config('LAST_LOGIN_UPDATE_INTERVAL', default=3600, cast=int)
+
+# Per-user project access lists (apps.projects.access): shared cache lifetime,
+# and how many project ids are inlined into scoped queries before a subquery is used
+PROJECT_ACCESS_CACHE_TIMEOUT = config('PROJECT_ACCESS_CACHE_TIMEOUT', default=3600, cast=int)
+PROJECT_ACCESS_INLINE_MAX = config('PROJECT_ACCESS_INLINE_MAX', default=500, cast=int)
+
+# Bloom filter in front of the refresh token blacklist (apps.accounts.blacklist, Redis cache only):
+# minimum number of entries it is sized for, and its false-positive rate
+TOKEN_BLACKLIST_FILTER_CAPACITY = config('TOKEN_BLACKLIST_FILTER_CAPACITY', default=1000000, cast=int)
+TOKEN_BLACKLIST_FILTER_ERROR_RATE = config('TOKEN_BLACKLIST_FILTER_ERROR_RATE', default=0.001, cast=float)
+
+# Request metrics (apps.monitoring): how often each worker publishes its counters,
+# when a silent worker is dropped, and who may read /metrics/. With METRICS_TOKEN set every
+# scrape needs the bearer token; otherwise only the networks may, matched against REMOTE_ADDR,
+# which behind a proxy is the proxy's own address, so keep the default of loopback there
+METRICS_PUBLISH_INTERVAL = config('METRICS_PUBLISH_INTERVAL', default=15, cast=int)
+METRICS_WORKER_TIMEOUT = config('METRICS_WORKER_TIMEOUT', default=120, cast=int)
+METRICS_ALLOWED_NETWORKS = config('METRICS_ALLOWED_NETWORKS', default='127.0.0.1/32,::1/128').split(',')
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Server-Timing header (auth, db, serialize, render) on every response
+SERVER_TIMING_ENABLED = config('SERVER_TIMING_ENABLED', default=False, cast=bool)
+# Request profiling (apps.monitoring.profiling): share of requests sampled at random,
+# stack sampling interval (seconds), where profiles are kept and how many,
+# and the longest lifetime of a profiling token
+PROFILE_SAMPLE_RATE = config('PROFILE_SAMPLE_RATE', default=0.0, cast=float)
+PROFILE_INTERVAL = config('PROFILE_INTERVAL', default=0.005, cast=float)
+PROFILE_ROOT = config('PROFILE_ROOT', default=str(BASE_DIR / 'profiles'))
+PROFILE_KEEP = config('PROFILE_KEEP', default=200, cast=int)
+PROFILE_TOKEN_MAX_AGE = config('PROFILE_TOKEN_MAX_AGE', default=3600, cast=int)
+
+# Endpoint benchmarks (manage.py benchmark): the committed baseline and where run results go
+BENCHMARK_BASELINE = config('BENCHMARK_BASELINE', default=str(BASE_DIR / 'benchmarks' / 'baseline.json'))
+BENCHMARK_RESULTS_ROOT = config('BENCHMARK_RESULTS_ROOT', default=str(BASE_DIR / 'benchmarks' / 'results'))
+
+# Slow query capture (apps.monitoring.slow_queries): threshold in milliseconds (0 turns
+# capture off), whether plans use EXPLAIN ANALYZE, how long a plan is kept before
+# it is taken again, and how many recent runs the p95 is computed from
+SLOW_QUERY_THRESHOLD_MS = config('SLOW_QUERY_THRESHOLD_MS', default=200, cast=int)
+SLOW_QUERY_EXPLAIN_ANALYZE = config('SLOW_QUERY_EXPLAIN_ANALYZE', default=False, cast=bool)
+SLOW_QUERY_PLAN_MAX_AGE = config('SLOW_QUERY_PLAN_MAX_AGE', default=24 * 60 * 60, cast=int)
+SLOW_QUERY_SAMPLES = config('SLOW_QUERY_SAMPLES', default=200, cast=int)
+
 # CORS Settings
 CORS_ALLOWED_ORIGINS = config(
     'CORS_ALLOWED_ORIGINS',
@@ -175,6 +231,42 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    'refit-project-forecasts': {
+        'task': 'apps.analytics.tasks.refit_project_forecasts',
+        'schedule': crontab(hour=2, minute=0),
+    },
+    'maintain-activity-logs': {
+        'task': 'apps.projects.tasks.maintain_activity_logs',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    'prune-auth-tokens': {
+        'task': 'apps.accounts.tasks.prune_tokens',
+        'schedule': crontab(hour=4, minute=0),
+    },
+    'refresh-client-rollups': {
+        'task': 'apps.clients.tasks.refresh_client_rollups',
+        'schedule': crontab(hour=0, minute=15),
+    },
+}
+
+# Report exports
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=5000, cast=int)
+
+# Activity logs: months kept in the hot table, monthly partitions created
+# ahead of time (PostgreSQL), and where archived months are written
+ACTIVITY_LOG_RETENTION_MONTHS = config('ACTIVITY_LOG_RETENTION_MONTHS', default=12, cast=int)
+ACTIVITY_PARTITIONS_AHEAD = config('ACTIVITY_PARTITIONS_AHEAD', default=3, cast=int)
+# Recent project activity copied into the feed of a user who joins the project
+ACTIVITY_FEED_BACKFILL = config('ACTIVITY_FEED_BACKFILL', default=200, cast=int)
+ACTIVITY_ARCHIVE_ROOT = config('ACTIVITY_ARCHIVE_ROOT', default=str(BASE_DIR / 'archive' / 'activity'))
+
+# Completion forecasting: weeks of throughput history the nightly fit uses
+FORECAST_HISTORY_WEEKS = config('FORECAST_HISTORY_WEEKS', default=12, cast=int)
+
+# Search (apps.search): build the autocomplete prefix indexes when a gunicorn worker
+# starts (gunicorn.conf.py) instead of on first use
+AUTOCOMPLETE_WARM_ON_STARTUP = config('AUTOCOMPLETE_WARM_ON_STARTUP', default=True, cast=bool)
 
 # Cache
 CACHES = {
@@ -183,3 +275,6 @@ CACHES = {
         'LOCATION': f"redis://{config('REDIS_HOST', default='localhost')}:{config('REDIS_PORT', default='6379')}/1",
     }
 }
+
+# How long cached analytics results live (seconds); writes invalidate them sooner
+ANALYTICS_CACHE_TIMEOUT = config('ANALYTICS_CACHE_TIMEOUT', default=6 * 60 * 60, cast=int)
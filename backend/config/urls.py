@@ -8,6 +8,8 @@ from django.conf.urls.static import static
 from django.http import JsonResponse
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
+from apps.monitoring.views import metrics
+
 
 def health_check(request):
     """Simple health check endpoint"""
@@ -24,6 +26,7 @@ def health_check(request):
 
 urlpatterns = [
     path('', health_check, name='health'),
+    path('metrics/', metrics, name='metrics'),
     path('admin/', admin.site.urls),
 
     # API Documentation
@@ -37,6 +40,8 @@ urlpatterns = [
     path('api/v1/tasks/', include('apps.tasks.api.urls')),
     path('api/v1/team-members/', include('apps.resources.api.urls')),
     path('api/v1/analytics/', include('apps.analytics.api.urls')),
+    path('api/v1/search/', include('apps.search.api.urls')),
+    path('api/v1/monitoring/', include('apps.monitoring.api.urls')),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,10 @@
+"""
+Gunicorn server hooks; read from the working directory (backend/) on start
+"""
+
+
+def post_worker_init(worker):
+    # Load the autocomplete indexes once the worker has loaded the application,
+    # before it takes traffic
+    from apps.search.autocomplete import warm
+    warm()
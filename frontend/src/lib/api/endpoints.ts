@@ -52,6 +52,16 @@ export const teamAPI = {
   create: (data: any) => apiClient.post('/team-members/', data),
   update: (id: string, data: any) => apiClient.patch(`/team-members/${id}/`, data),
   delete: (id: string) => apiClient.delete(`/team-members/${id}/`),
+  staffing: (params: { skills?: string; start?: string; end?: string; hours?: number; task?: string; match?: 'any' | 'all' }) =>
+    apiClient.get('/team-members/staffing/', { params }),
+  availability: (params: { start: string; end: string; department?: string; role?: string; page?: number }) =>
+    apiClient.get('/team-members/availability/', { params }),
+  periods: {
+    list: (params?: any) => apiClient.get('/team-members/availability-periods/', { params }),
+    create: (data: any) => apiClient.post('/team-members/availability-periods/', data),
+    update: (id: string, data: any) => apiClient.patch(`/team-members/availability-periods/${id}/`, data),
+    delete: (id: string) => apiClient.delete(`/team-members/availability-periods/${id}/`),
+  },
 };
 
 /**
@@ -78,3 +88,13 @@ export const dependenciesAPI = {
   update: (id: string, data: any) => apiClient.patch(`/task-dependencies/${id}/`, data),
   delete: (id: string) => apiClient.delete(`/task-dependencies/${id}/`),
 };
+
+/**
+ * Search API
+ */
+export const searchAPI = {
+  search: (params: { q: string; type?: string; project?: string; limit?: number; offset?: number }) =>
+    apiClient.get('/search/', { params }),
+  autocomplete: (q: string, type?: 'member' | 'client' | 'project', limit = 10) =>
+    apiClient.get('/search/autocomplete/', { params: { q, type, limit } }),
+};
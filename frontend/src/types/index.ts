@@ -28,6 +28,8 @@ export interface Client {
   is_active: boolean;
   active_projects_count?: number;
   total_projects_value?: number;
+  total_actual_cost?: number;
+  overdue_tasks_count?: number;
   created_at: string;
   updated_at: string;
 }